@@ -82,6 +82,7 @@ def test_performance():
             processed = text_processor.process_new_text(result)
             if processed:
                 processed_texts.append(processed)
+        final_segments = text_processor.flush()
         
         text_processing_time = time.time() - start_time
         print(f"  ✓ Xử lý {len(ocr_results)} văn bản: {text_processing_time:.2f}s ({text_processing_time/len(ocr_results):.3f}s/văn bản)")
@@ -91,11 +92,12 @@ def test_performance():
         
         start_time = time.time()
         
-        for text_data in processed_texts:
+        for text_data in final_segments:
             storage.save_transcript_entry(session_id, text_data)
         
         storage_time = time.time() - start_time
-        print(f"  ✓ Lưu {len(processed_texts)} entries: {storage_time:.2f}s ({storage_time/len(processed_texts):.3f}s/entry)")
+        print(f"  ✓ Lưu {len(final_segments)} đoạn (từ {len(processed_texts)} bản cập nhật): "
+              f"{storage_time:.2f}s ({storage_time/max(len(final_segments), 1):.3f}s/entry)")
         
         # Test export performance
         print("📊 Kiểm thử hiệu suất xuất file...")
@@ -173,13 +175,17 @@ def test_stress():
             # Xử lý
             processed = text_processor.process_new_text(ocr_result)
             if processed:
-                storage.save_transcript_entry(session_id, processed)
                 processed_count += 1
+            for segment in text_processor.pop_segments():
+                storage.save_transcript_entry(session_id, segment)
             
             # In tiến độ
             if (i + 1) % 20 == 0:
                 print(f"  Đã xử lý: {i + 1}/{num_texts}")
         
+        for segment in text_processor.flush():
+            storage.save_transcript_entry(session_id, segment)
+        
         total_time = time.time() - start_time
         
         print(f"✓ Hoàn thành: {processed_count}/{num_texts} văn bản được xử lý")
@@ -317,9 +323,9 @@ def test_memory_usage():
                 'word_count': 12
             }
             
-            processed = text_processor.process_new_text(ocr_result)
-            if processed:
-                storage.save_transcript_entry(session_id, processed)
+            text_processor.process_new_text(ocr_result)
+            for segment in text_processor.pop_segments():
+                storage.save_transcript_entry(session_id, segment)
         
         # Kiểm tra bộ nhớ sau khi xử lý
         after_processing = process.memory_info().rss / 1024 / 1024  # MB
@@ -348,6 +354,257 @@ def test_memory_usage():
         print(f"❌ Lỗi kiểm thử bộ nhớ: {e}")
         return False
 
+def test_preprocess_benchmark():
+    """So sánh tốc độ PreprocessEngine với OCRProcessor.preprocess_image"""
+    print("\n⚡ Benchmark tiền xử lý ảnh")
+    print("-" * 40)
+    
+    try:
+        from core.ocr_processor import OCRProcessor
+        from core.preprocess import PreprocessEngine
+        from PIL import Image, ImageDraw
+        import numpy as np
+        
+        ocr = OCRProcessor()
+        engine = PreprocessEngine()
+        iterations = 300
+        
+        # Vùng phụ đề điển hình: chữ trắng trên nền đen
+        img = Image.new('RGB', (800, 120), color='black')
+        draw = ImageDraw.Draw(img)
+        draw.text((10, 20), "Live Caption preprocessing benchmark", fill='white')
+        draw.text((10, 70), "Second caption line for the benchmark", fill='white')
+        rgb_frame = np.asarray(img)
+        gray_frame = np.asarray(img.convert('L'))
+        
+        # Kết quả phải giống hệt cách cũ
+        expected = np.asarray(ocr.preprocess_image(img))
+        if not np.array_equal(engine.process(rgb_frame), expected):
+            print("❌ Kết quả tiền xử lý khác với preprocess_image")
+            return False
+        print("  ✓ Kết quả giống hệt preprocess_image")
+        
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            ocr.preprocess_image(img)
+        legacy_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            engine.process(rgb_frame)
+        rgb_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            engine.process(gray_frame)
+        gray_time = time.perf_counter() - start_time
+        
+        print(f"  ✓ preprocess_image (PIL): {legacy_time / iterations * 1000:.3f}ms/ảnh")
+        print(f"  ✓ PreprocessEngine (RGB): {rgb_time / iterations * 1000:.3f}ms/ảnh "
+              f"({legacy_time / rgb_time:.1f}x)")
+        print(f"  ✓ PreprocessEngine (grayscale): {gray_time / iterations * 1000:.3f}ms/ảnh "
+              f"({legacy_time / gray_time:.1f}x)")
+        print(f"  ✓ Số lần cấp phát buffer: {engine.get_stats()['reallocations']}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Lỗi benchmark tiền xử lý: {e}")
+        return False
+
+def test_fake_backend_pipeline():
+    """Đo thông lượng pipeline với backend OCR giả lập (không cần Tesseract)"""
+    print("\n🧩 Benchmark pipeline với backend OCR giả lập")
+    print("-" * 40)
+    
+    try:
+        from core.frame_buffer import FrameRingBuffer
+        from core.frame_diff import FrameChangeDetector
+        from core.ocr_processor import OCRProcessor
+        from core.line_bands import LineBandOCR
+        from core.text_processor import TextProcessor
+        from core.storage import StorageManager
+        from PIL import Image, ImageDraw
+        import numpy as np
+        
+        frame_count = 200
+        vocabulary = ("live caption logger records every spoken sentence quickly while the "
+                      "meeting continues and nobody has to type notes by hand anymore").split()
+        captions = [' '.join(vocabulary[(i + k) % len(vocabulary)] for k in range(7)) + f" {i}"
+                    for i in range(frame_count)]
+        
+        # Phụ đề đổi sau mỗi 4 khung, mỗi khung có hai dòng
+        frames = []
+        for i in range(frame_count):
+            img = Image.new('RGB', (800, 120), color='black')
+            draw = ImageDraw.Draw(img)
+            draw.text((10, 20), captions[i // 4], fill='white')
+            draw.text((10, 70), captions[i // 4 + 1], fill='white')
+            frames.append(np.asarray(img))
+        
+        # Chụp: phát hiện thay đổi một lần khi ghi vào ring buffer, chỉ lấy khung đã thay đổi
+        ring = FrameRingBuffer(capacity=3)
+        detector = FrameChangeDetector()
+        changed = []
+        start_time = time.perf_counter()
+        for frame in frames:
+            slot = ring.acquire_slot(frame.shape)
+            np.copyto(slot, frame)
+            ring.commit(time.time(), detector.should_process(slot))
+            latest = ring.get_latest(changed_only=True)
+            if latest is not None:
+                changed.append(latest[0].copy())
+        capture_time = time.perf_counter() - start_time
+        
+        # OCR: backend giả lập trả lần lượt các phụ đề với độ trễ cố định
+        ocr = OCRProcessor(engine='fake', cache_max_bytes=0,
+                           backend_options={'output': captions, 'latency': 0.002})
+        engine = LineBandOCR(ocr)
+        start_time = time.perf_counter()
+        ocr_results = [engine.extract_text(frame) for frame in changed]
+        ocr_time = time.perf_counter() - start_time
+        
+        text_processor = TextProcessor()
+        start_time = time.perf_counter()
+        processed_texts = [text for text in map(text_processor.process_new_text, ocr_results) if text]
+        final_segments = text_processor.flush()
+        text_time = time.perf_counter() - start_time
+        
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+            db_path = tmp.name
+        storage = StorageManager(db_path)
+        session_id = storage.create_session("Fake Backend Benchmark")
+        start_time = time.perf_counter()
+        for text_data in final_segments:
+            storage.save_transcript_entry(session_id, text_data)
+        storage_time = time.perf_counter() - start_time
+        storage.end_session(session_id)
+        os.unlink(db_path)
+        
+        print(f"  ✓ Chụp + phát hiện thay đổi: {frame_count / capture_time:.0f} khung/giây "
+              f"({len(changed)} khung cần OCR)")
+        print(f"  ✓ OCR giả lập: {len(changed) / ocr_time:.0f} khung/giây, "
+              f"{ocr.backend.calls} lần gọi backend")
+        print(f"  ✓ Xử lý văn bản: {len(ocr_results) / text_time:.0f} kết quả/giây "
+              f"({len(processed_texts)} văn bản mới)")
+        print(f"  ✓ Lưu trữ: {len(final_segments)} đoạn đã chốt, "
+              f"{len(final_segments) / max(storage_time, 1e-9):.0f} entry/giây")
+        
+        return ocr.backend.calls > 0 and len(processed_texts) > 0
+        
+    except Exception as e:
+        print(f"❌ Lỗi benchmark pipeline giả lập: {e}")
+        return False
+
+def test_duplicate_index_benchmark():
+    """So sánh DuplicateIndex với vòng lặp difflib khi kiểm tra trùng lặp"""
+    print("\n🔁 Benchmark phát hiện trùng lặp")
+    print("-" * 40)
+    
+    try:
+        from core.text_processor import TextProcessor
+        import random
+        
+        rng = random.Random(42)
+        vocabulary = ("live caption logger records every spoken sentence quickly while the "
+                      "meeting continues and nobody has to type notes by hand anymore").split()
+        
+        # Dòng phụ đề dài; mỗi dòng được đọc lại vài lần với lỗi OCR ngẫu nhiên
+        texts = []
+        for _ in range(300):
+            caption = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(25, 45)))
+            for _ in range(4):
+                noisy = list(caption)
+                for _ in range(rng.randint(0, 6)):
+                    noisy[rng.randrange(len(noisy))] = rng.choice('abcdeilo1 ')
+                texts.append(''.join(noisy))
+        
+        timings = {}
+        decisions = {}
+        for name, use_index in (("difflib", False), ("DuplicateIndex", True)):
+            processor = TextProcessor(duplicate_index=use_index)
+            previous_texts = []
+            decisions[name] = []
+            start_time = time.perf_counter()
+            for text in texts:
+                duplicate = processor.is_duplicate(text, previous_texts)
+                decisions[name].append(duplicate)
+                if not duplicate:
+                    previous_texts.append(text)
+            timings[name] = time.perf_counter() - start_time
+            if use_index:
+                index_stats = processor.duplicate_index.get_stats()
+        
+        if decisions["difflib"] != decisions["DuplicateIndex"]:
+            print("❌ Kết quả trùng lặp khác với difflib")
+            return False
+        print(f"  ✓ Cùng kết quả với difflib ({sum(decisions['difflib'])}/{len(texts)} trùng lặp, "
+              f"độ dài trung bình {sum(map(len, texts)) // len(texts)} ký tự)")
+        
+        speedup = timings["difflib"] / timings["DuplicateIndex"]
+        print(f"  ✓ difflib: {timings['difflib'] / len(texts) * 1000:.3f}ms/văn bản")
+        print(f"  ✓ DuplicateIndex: {timings['DuplicateIndex'] / len(texts) * 1000:.3f}ms/văn bản "
+              f"({speedup:.1f}x)")
+        print(f"  ✓ Trùng khớp hoàn toàn: {index_stats['exact_hits']}, cặp bị loại bằng cận trên: "
+              f"{index_stats['pruned']}, cặp so bằng difflib: {index_stats['compared']}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Lỗi benchmark trùng lặp: {e}")
+        return False
+
+def test_long_session_benchmark():
+    """Đo chi phí xử lý văn bản mỗi khung trong một phiên dài"""
+    print("\n⏱️  Benchmark phiên dài")
+    print("-" * 40)
+    
+    try:
+        from core.text_processor import TextProcessor
+        import random
+        
+        rng = random.Random(7)
+        vocabulary = ("live caption logger records every spoken sentence quickly while the "
+                      "meeting continues and nobody has to type notes by hand anymore").split()
+        
+        # Mỗi câu hiện trong vài khung, một số khung có lỗi OCR ngẫu nhiên
+        frame_count = 40000
+        bucket = 5000
+        processor = TextProcessor()
+        caption = ''
+        timings = []
+        start_time = time.perf_counter()
+        for frame in range(frame_count):
+            if frame % 3 == 0:
+                caption = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(8, 16)))
+            text = caption
+            if rng.random() < 0.3:
+                noisy = list(text)
+                noisy[rng.randrange(len(noisy))] = rng.choice('abcdeilo1')
+                text = ''.join(noisy)
+            processor.process_new_text({'text': text, 'confidence': 90})
+            
+            if (frame + 1) % bucket == 0:
+                now = time.perf_counter()
+                timings.append((now - start_time) / bucket)
+                start_time = now
+        
+        summary = processor.get_session_summary()
+        for index, per_frame in enumerate(timings):
+            print(f"  ✓ Khung {index * bucket + 1}-{(index + 1) * bucket}: {per_frame * 1e6:.0f}µs/khung")
+        print(f"  ✓ Văn bản phiên: {summary['segment_count']} đoạn, {summary['word_count']} từ, "
+              f"{summary['character_count']} ký tự")
+        
+        # Chi phí mỗi khung không tăng theo độ dài phiên
+        growth = max(timings[-3:]) / min(timings[:3])
+        print(f"  ✓ Chi phí cuối phiên / đầu phiên: {growth:.2f}x")
+        
+        return growth < 2.0
+        
+    except Exception as e:
+        print(f"❌ Lỗi benchmark phiên dài: {e}")
+        return False
+
 def run_comprehensive_tests():
     """Chạy tất cả các test toàn diện"""
     print("🧪 Bắt đầu kiểm thử toàn diện Live Caption Logger")
@@ -357,7 +614,11 @@ def run_comprehensive_tests():
         ("Hiệu suất", test_performance),
         ("Tải nặng", test_stress),
         ("Trường hợp biên", test_edge_cases),
-        ("Sử dụng bộ nhớ", test_memory_usage)
+        ("Sử dụng bộ nhớ", test_memory_usage),
+        ("Benchmark tiền xử lý", test_preprocess_benchmark),
+        ("Benchmark pipeline giả lập", test_fake_backend_pipeline),
+        ("Benchmark trùng lặp", test_duplicate_index_benchmark),
+        ("Benchmark phiên dài", test_long_session_benchmark)
     ]
     
     passed = 0
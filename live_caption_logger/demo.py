@@ -72,16 +72,19 @@ def create_demo_session():
             processed_text = text_processor.process_new_text(ocr_result)
             
             if processed_text:
-                # Lưu vào database
-                storage.save_transcript_entry(session_id, processed_text)
-                
                 print(f"  [{i:2d}] {text}")
                 print(f"       Độ tin cậy: {processed_text['confidence']:.1f}%")
             
+            # Lưu vào database các đoạn đã chốt
+            for segment in text_processor.pop_segments():
+                storage.save_transcript_entry(session_id, segment)
+            
             # Nghỉ một chút để mô phỏng thời gian thực
             time.sleep(0.5)
         
-        # Kết thúc phiên
+        # Kết thúc phiên, lưu đoạn cuối cùng
+        for segment in text_processor.flush():
+            storage.save_transcript_entry(session_id, segment)
         storage.end_session(session_id)
         print("\n✓ Kết thúc phiên ghi chép")
         
@@ -0,0 +1,299 @@
+# Module tự hiệu chỉnh profile OCR cho Live Caption Logger
+
+import difflib
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .frame_diff import Frame
+
+
+class OCRProfile:
+    """
+    Bộ tham số OCR có thể hiệu chỉnh: chế độ Tesseract và các bước tiền xử lý
+    """
+    
+    def __init__(self, psm: int = 6, oem: int = 3, clahe: bool = True, median: bool = True,
+                 scale: float = 1.0, dictionaries: bool = True):
+        """
+        Khởi tạo profile
+        
+        Args:
+            psm: Page Segmentation Mode
+            oem: OCR Engine Mode
+            clahe: Có tăng độ tương phản bằng CLAHE không
+            median: Có khử nhiễu bằng median blur không
+            scale: Hệ số phóng to ảnh trước khi OCR
+            dictionaries: Có dùng từ điển của Tesseract không
+        """
+        self.psm = psm
+        self.oem = oem
+        self.clahe = clahe
+        self.median = median
+        self.scale = scale
+        self.dictionaries = dictionaries
+    
+    @property
+    def backend_key(self) -> Tuple[int, int, bool]:
+        """
+        Các tham số mà khi đổi phải tạo lại backend OCR (nạp lại model)
+        """
+        return (self.psm, self.oem, self.dictionaries)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'psm': self.psm,
+            'oem': self.oem,
+            'clahe': self.clahe,
+            'median': self.median,
+            'scale': self.scale,
+            'dictionaries': self.dictionaries
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'OCRProfile':
+        return cls(**{key: data[key] for key in cls().to_dict() if key in data})
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, OCRProfile) and self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        steps = [name for name, enabled in (('clahe', self.clahe), ('median', self.median),
+                                            ('dict', self.dictionaries)) if enabled]
+        return f"OCRProfile(psm={self.psm}, oem={self.oem}, x{self.scale:g}, {'+'.join(steps) or '-'})"
+
+
+def profile_grid(psms: Sequence[int] = (6, 7), oems: Sequence[int] = (1, 3),
+                 scales: Sequence[float] = (1.0, 1.5, 2.0)) -> List[OCRProfile]:
+    """
+    Tạo lưới profile cần thử: mọi tổ hợp psm, oem, CLAHE, median, hệ số phóng to và từ điển
+    
+    Các profile dùng chung backend (cùng psm, oem, từ điển) đứng liền nhau.
+    OCR theo lô ghép nhiều dòng vào một ảnh nên psm 7 (một dòng) thường không
+    phù hợp; khi bật batch nên bỏ 7 khỏi psms.
+    
+    Args:
+        psms: Các Page Segmentation Mode
+        oems: Các OCR Engine Mode
+        scales: Các hệ số phóng to
+        
+    Returns:
+        Danh sách OCRProfile
+    """
+    return [
+        OCRProfile(psm, oem, clahe, median, scale, dictionaries)
+        for psm, oem, dictionaries, clahe, median, scale in itertools.product(
+            psms, oems, (True, False), (True, False), (True, False), scales)
+    ]
+
+
+def text_agreement(reference: str, text: str) -> float:
+    """
+    Tính mức độ giống nhau giữa văn bản và văn bản tham chiếu
+    
+    Args:
+        reference: Văn bản tham chiếu
+        text: Văn bản cần so sánh
+        
+    Returns:
+        Tỷ lệ giống nhau (0-1), 1 nếu cả hai đều rỗng
+    """
+    if not reference and not text:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference, text).ratio()
+
+
+class OCRCalibrator:
+    """
+    Lớp chọn profile OCR rẻ nhất mà vẫn đủ chính xác
+    
+    Chạy từng profile trong lưới trên một tập khung hình, đo thời gian OCR
+    trung bình, confidence trung bình và độ khớp với văn bản tham chiếu
+    (văn bản cho trước, hoặc kết quả của profile tham chiếu). Chọn profile
+    nhanh nhất có confidence không thấp hơn tham chiếu quá confidence_tolerance
+    và độ khớp không dưới min_agreement.
+    
+    ocr_processor nên tắt cache kết quả để thời gian đo được là thời gian OCR thật.
+    Khi truyền engine_factory (ví dụ tạo LineBandOCR như lúc ghi), khung được
+    OCR qua đúng các dòng cắt theo ROI và các lô dòng như pipeline thật. Các
+    profile được thử theo nhóm backend nên mỗi tổ hợp psm/oem/từ điển chỉ
+    nạp model một lần.
+    """
+    
+    def __init__(self, ocr_processor, profiles: Optional[List[OCRProfile]] = None,
+                 reference_profile: Optional[OCRProfile] = None,
+                 confidence_tolerance: float = 5.0, min_agreement: float = 0.9,
+                 engine_factory: Optional[Callable] = None):
+        """
+        Khởi tạo bộ hiệu chỉnh
+        
+        Args:
+            ocr_processor: OCRProcessor dùng để chạy thử (có apply_profile)
+            profiles: Các profile cần thử (mặc định profile_grid())
+            reference_profile: Profile tham chiếu (mặc định cấu hình gốc)
+            confidence_tolerance: Mức confidence trung bình được phép thấp hơn tham chiếu
+            min_agreement: Độ khớp văn bản tối thiểu với tham chiếu
+            engine_factory: Hàm nhận ocr_processor và trả engine OCR dùng để chạy thử
+                            (mặc định dùng trực tiếp ocr_processor)
+        """
+        self.ocr_processor = ocr_processor
+        self.profiles = profiles if profiles is not None else profile_grid()
+        self.reference_profile = reference_profile or OCRProfile()
+        self.confidence_tolerance = confidence_tolerance
+        self.min_agreement = min_agreement
+        self.engine_factory = engine_factory
+    
+    def evaluate(self, profile: OCRProfile, frames: Sequence[Frame],
+                 references: Sequence[str]) -> Dict:
+        """
+        Đo một profile trên tập khung hình
+        
+        Args:
+            profile: Profile cần đo
+            frames: Các khung hình
+            references: Văn bản tham chiếu của từng khung
+            
+        Returns:
+            Dictionary chứa profile, mean_time, mean_confidence, agreement và texts
+        """
+        self.ocr_processor.apply_profile(profile)
+        
+        # Engine mới cho mỗi profile: cache dòng của profile trước không được dùng lại
+        engine = self.engine_factory(self.ocr_processor) if self.engine_factory else self.ocr_processor
+        
+        elapsed = 0.0
+        confidences = []
+        texts = []
+        for frame in frames:
+            start_time = time.perf_counter()
+            result = engine.extract_text(frame)
+            elapsed += time.perf_counter() - start_time
+            
+            texts.append(result['text'])
+            if result['word_count']:
+                confidences.append(result['confidence'])
+        
+        agreements = [text_agreement(ref, text) for ref, text in zip(references, texts)]
+        return {
+            'profile': profile,
+            'mean_time': elapsed / len(frames),
+            'mean_confidence': sum(confidences) / len(confidences) if confidences else 0,
+            'agreement': sum(agreements) / len(agreements) if agreements else 1.0,
+            'texts': texts
+        }
+    
+    def calibrate(self, frames: Sequence[Frame],
+                  references: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Chọn profile cho tập khung hình
+        
+        Args:
+            frames: Các khung hình (ví dụ vài giây đầu của phiên)
+            references: Văn bản đúng của từng khung (tùy chọn)
+            
+        Returns:
+            Dictionary chứa 'profile' được chọn, số liệu của nó ('best'), của tham chiếu
+            ('reference') và của mọi profile ('results')
+        """
+        if not frames:
+            raise ValueError("Cần ít nhất một khung hình để hiệu chỉnh")
+        
+        baseline = self.evaluate(self.reference_profile, frames,
+                                 references if references is not None else [''] * len(frames))
+        if references is None:
+            references = baseline['texts']
+            baseline['agreement'] = 1.0
+        
+        results = [baseline]
+        # Thử theo nhóm backend (nhóm của tham chiếu trước, model đã được nạp)
+        # để không nạp lại model giữa các profile cùng nhóm
+        reference_key = self.reference_profile.backend_key
+        profiles = sorted(self.profiles, key=lambda profile: (profile.backend_key != reference_key,
+                                                              profile.backend_key))
+        for profile in profiles:
+            if profile != self.reference_profile:
+                results.append(self.evaluate(profile, frames, references))
+        
+        min_confidence = baseline['mean_confidence'] - self.confidence_tolerance
+        eligible = [
+            result for result in results
+            if result['mean_confidence'] >= min_confidence and result['agreement'] >= self.min_agreement
+        ]
+        best = min(eligible, key=lambda result: result['mean_time']) if eligible else baseline
+        
+        self.ocr_processor.apply_profile(best['profile'])
+        return {'profile': best['profile'], 'best': best, 'reference': baseline, 'results': results}
+
+
+class ProfileStore:
+    """
+    Lưu profile OCR đã hiệu chỉnh theo vùng chụp vào file JSON
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Khởi tạo kho profile
+        
+        Args:
+            path: Đường dẫn file JSON
+        """
+        self.path = Path(path)
+        self.profiles: Dict[str, Dict] = {}
+        self.load()
+    
+    @staticmethod
+    def region_key(region: Optional[Tuple[int, int, int, int]]) -> str:
+        return ','.join(str(value) for value in region) if region else 'fullscreen'
+    
+    def load(self):
+        """
+        Đọc file profile (bỏ qua nếu chưa có hoặc bị lỗi)
+        """
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.profiles = json.load(f)
+        except Exception as e:
+            print(f"Lỗi khi đọc profile OCR: {e}")
+            self.profiles = {}
+    
+    def get(self, region: Optional[Tuple[int, int, int, int]]) -> Optional[OCRProfile]:
+        """
+        Lấy profile đã lưu cho vùng chụp
+        
+        Args:
+            region: Vùng chụp (x, y, width, height)
+            
+        Returns:
+            OCRProfile hoặc None nếu chưa hiệu chỉnh
+        """
+        entry = self.profiles.get(self.region_key(region))
+        return OCRProfile.from_dict(entry['profile']) if entry else None
+    
+    def save(self, region: Optional[Tuple[int, int, int, int]], profile: OCRProfile,
+             metrics: Optional[Dict] = None) -> bool:
+        """
+        Lưu profile cho vùng chụp
+        
+        Args:
+            region: Vùng chụp (x, y, width, height)
+            profile: Profile được chọn
+            metrics: Số liệu đo được (thời gian, confidence, độ khớp)
+            
+        Returns:
+            True nếu lưu thành công
+        """
+        self.profiles[self.region_key(region)] = {
+            'profile': profile.to_dict(),
+            'metrics': metrics or {},
+            'calibrated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.profiles, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            print(f"Lỗi khi lưu profile OCR: {e}")
+            return False
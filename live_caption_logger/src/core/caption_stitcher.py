@@ -0,0 +1,172 @@
+# Module ghép phụ đề cuộn theo phần chồng lấn cho Live Caption Logger
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Dấu câu ở hai đầu từ không ảnh hưởng việc so khớp
+_PUNCTUATION = '.,!?;:"\'()-'
+
+
+def prefix_function(tokens: Sequence[str]) -> List[int]:
+    """
+    Hàm tiền tố của KMP trên dãy từ
+    
+    Args:
+        tokens: Dãy từ
+        
+    Returns:
+        pi[i] = độ dài tiền tố thực sự dài nhất của tokens[:i + 1] cũng là hậu tố của nó
+    """
+    pi = [0] * len(tokens)
+    k = 0
+    for i in range(1, len(tokens)):
+        while k and tokens[i] != tokens[k]:
+            k = pi[k - 1]
+        if tokens[i] == tokens[k]:
+            k += 1
+        pi[i] = k
+    return pi
+
+
+def suffix_prefix_overlap(tail: Sequence[str], tokens: Sequence[str]) -> Tuple[int, bool]:
+    """
+    Tìm phần chồng lấn dài nhất giữa cuối `tail` và đầu `tokens` bằng KMP
+    
+    Duyệt `tail` một lần với automaton KMP của `tokens`, nên thời gian là
+    O(len(tail) + len(tokens)).
+    
+    Args:
+        tail: Các từ cuối của văn bản đã ghi
+        tokens: Các từ của dòng mới
+        
+    Returns:
+        Tuple (k, contained): k là số từ lớn nhất sao cho tail[-k:] == tokens[:k],
+        contained là True nếu cả dòng mới đã nằm trong tail
+    """
+    if not tokens:
+        return 0, True
+    
+    pi = prefix_function(tokens)
+    k = 0
+    contained = False
+    for token in tail:
+        if k == len(tokens):
+            k = pi[k - 1]
+        while k and token != tokens[k]:
+            k = pi[k - 1]
+        if token == tokens[k]:
+            k += 1
+        if k == len(tokens):
+            contained = True
+    return k, contained
+
+
+class CaptionStitcher:
+    """
+    Lớp ghép dòng phụ đề cuộn vào cuối văn bản đã ghi
+    
+    Phụ đề cuộn bỏ từ ở đầu và thêm từ ở cuối, nên dòng mới thường bắt đầu
+    bằng các từ cuối của văn bản đã ghi. Phần chồng lấn dài nhất (theo từ,
+    không phân biệt hoa thường và dấu câu ở hai đầu từ) được tìm bằng KMP và
+    chỉ các từ sau phần chồng lấn được ghi thêm. Phần chồng lấn phải đủ dài
+    cả về số từ lẫn tỷ lệ so với dòng mới, để dòng không liên quan chỉ tình
+    cờ bắt đầu bằng vài từ phổ biến ("of the", "in the") không bị mất từ.
+    """
+    
+    def __init__(self, enabled: bool = True, min_overlap: int = 3,
+                 min_overlap_ratio: float = 0.5, tail_words: int = 64):
+        """
+        Khởi tạo bộ ghép
+        
+        Args:
+            enabled: Bật/tắt ghép phụ đề
+            min_overlap: Số từ chồng lấn tối thiểu để coi dòng mới là phần tiếp theo
+            min_overlap_ratio: Tỷ lệ tối thiểu của số từ chồng lấn trên số từ của dòng mới
+            tail_words: Số từ cuối của văn bản đã ghi được giữ để so khớp
+        """
+        self.enabled = enabled
+        self.min_overlap = min_overlap
+        self.min_overlap_ratio = min_overlap_ratio
+        self.tail = deque(maxlen=tail_words)
+        
+        self.lines_stitched = 0
+        self.lines_contained = 0
+        self.words_seen = 0
+        self.words_appended = 0
+    
+    @staticmethod
+    def _normalize(token: str) -> str:
+        """
+        Chuẩn hóa một từ để so khớp
+        """
+        return token.strip(_PUNCTUATION).lower()
+    
+    def align(self, text: str) -> Optional[str]:
+        """
+        Ghép dòng mới vào cuối văn bản đã ghi nếu nó là phần tiếp theo
+        
+        Args:
+            text: Dòng văn bản mới (đã làm sạch)
+            
+        Returns:
+            Các từ mới sau phần chồng lấn ('' nếu cả dòng đã được ghi),
+            hoặc None nếu dòng không nối tiếp văn bản đã ghi
+        """
+        if not self.enabled or not text:
+            return None
+        
+        words = text.split()
+        tokens = [self._normalize(word) for word in words]
+        if len(tokens) < self.min_overlap:
+            return None
+        
+        overlap, contained = suffix_prefix_overlap(list(self.tail), tokens)
+        if contained:
+            self.lines_contained += 1
+            self.words_seen += len(tokens)
+            return ''
+        if overlap < self.min_overlap or overlap < self.min_overlap_ratio * len(tokens):
+            return None
+        
+        self.lines_stitched += 1
+        self.words_seen += len(tokens)
+        self.words_appended += len(tokens) - overlap
+        self.tail.extend(tokens[overlap:])
+        return ' '.join(words[overlap:])
+    
+    def append(self, text: str):
+        """
+        Ghi cả dòng vào cuối văn bản (dòng không nối tiếp văn bản đã ghi)
+        
+        Args:
+            text: Dòng văn bản mới
+        """
+        tokens = [self._normalize(word) for word in text.split()]
+        self.words_seen += len(tokens)
+        self.words_appended += len(tokens)
+        self.tail.extend(tokens)
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê ghép phụ đề
+        
+        Returns:
+            Dictionary chứa số dòng được ghép, số dòng đã ghi trước đó và tỷ lệ từ được ghi thêm
+        """
+        return {
+            'lines_stitched': self.lines_stitched,
+            'lines_contained': self.lines_contained,
+            'words_seen': self.words_seen,
+            'words_appended': self.words_appended,
+            'append_ratio': self.words_appended / self.words_seen if self.words_seen else 0.0
+        }
+    
+    def reset(self):
+        """
+        Xóa văn bản đã ghi và reset bộ đếm
+        """
+        self.tail.clear()
+        self.lines_stitched = 0
+        self.lines_contained = 0
+        self.words_seen = 0
+        self.words_appended = 0
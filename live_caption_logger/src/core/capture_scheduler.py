@@ -0,0 +1,109 @@
+# Module điều phối tần suất chụp màn hình cho Live Caption Logger
+
+import time
+from typing import Dict, Optional
+
+
+class AdaptiveCaptureScheduler:
+    """
+    Lớp điều chỉnh tần suất chụp theo mức độ hoạt động của vùng phụ đề
+    
+    Khi vùng phụ đề thay đổi, tần suất nhảy lên max_hz. Khi không có thay đổi,
+    tần suất giảm dần theo hệ số decay sau mỗi lần chụp cho đến min_hz.
+    Thời điểm chụp được tính theo deadline trên đồng hồ monotonic nên chu kỳ
+    không bị trôi theo thời gian xử lý của mỗi lần chụp.
+    """
+    
+    def __init__(self, min_hz: float = 0.5, max_hz: float = 10.0, decay: float = 0.85):
+        """
+        Khởi tạo scheduler
+        
+        Args:
+            min_hz: Tần suất chụp khi không có hoạt động (lần/giây)
+            max_hz: Tần suất chụp khi phụ đề đang thay đổi (lần/giây)
+            decay: Hệ số nhân tần suất sau mỗi lần chụp không có thay đổi (0-1)
+        """
+        if min_hz <= 0 or max_hz < min_hz:
+            raise ValueError("Cần 0 < min_hz <= max_hz")
+        if not 0 < decay <= 1:
+            raise ValueError("decay phải nằm trong khoảng (0, 1]")
+        
+        self.min_hz = min_hz
+        self.max_hz = max_hz
+        self.decay = decay
+        self.current_hz = max_hz
+        self.next_deadline: Optional[float] = None
+        self.missed_deadlines = 0
+    
+    @classmethod
+    def fixed(cls, interval: float) -> 'AdaptiveCaptureScheduler':
+        """
+        Tạo scheduler với tần suất cố định
+        
+        Args:
+            interval: Khoảng thời gian giữa các lần chụp (giây)
+            
+        Returns:
+            Scheduler có min_hz = max_hz
+        """
+        hz = 1.0 / interval
+        return cls(min_hz=hz, max_hz=hz, decay=1.0)
+    
+    @property
+    def interval(self) -> float:
+        """
+        Chu kỳ chụp hiện tại (giây)
+        """
+        return 1.0 / self.current_hz
+    
+    def start(self):
+        """
+        Bắt đầu chu kỳ chụp mới từ thời điểm hiện tại
+        """
+        self.current_hz = self.max_hz
+        self.next_deadline = time.monotonic()
+        self.missed_deadlines = 0
+    
+    def update(self, changed: bool):
+        """
+        Cập nhật tần suất theo kết quả của lần chụp vừa xong
+        
+        Args:
+            changed: True nếu vùng phụ đề thay đổi so với lần chụp trước
+        """
+        if changed:
+            self.current_hz = self.max_hz
+        else:
+            self.current_hz = max(self.min_hz, self.current_hz * self.decay)
+    
+    def next_delay(self) -> float:
+        """
+        Tiến tới deadline kế tiếp và tính thời gian cần chờ
+        
+        Returns:
+            Số giây cần chờ đến lần chụp tiếp theo (0 nếu đã trễ)
+        """
+        now = time.monotonic()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        
+        self.next_deadline += self.interval
+        if self.next_deadline < now:
+            # Trễ hơn một chu kỳ: bỏ các lần chụp đã lỡ thay vì chụp dồn
+            self.missed_deadlines += 1
+            self.next_deadline = now
+        
+        return self.next_deadline - now
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy trạng thái hiện tại của scheduler
+        
+        Returns:
+            Dictionary chứa tần suất hiện tại và số deadline bị lỡ
+        """
+        return {
+            'current_hz': self.current_hz,
+            'interval': self.interval,
+            'missed_deadlines': self.missed_deadlines
+        }
@@ -0,0 +1,259 @@
+# Module chỉ mục phát hiện văn bản trùng lặp cho Live Caption Logger
+
+import difflib
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+
+def lcs_length(masks: Dict[str, int], length: int, other: str) -> int:
+    """
+    Độ dài dãy con chung dài nhất (LCS) bằng thuật toán song song bit
+    
+    Mỗi ký tự của `other` cập nhật một số nguyên `length` bit bằng vài phép
+    toán số nguyên lớn, nên chi phí là O(len(other)) phép toán trên số nguyên
+    thay vì O(len(a) * len(b)) phép so sánh Python.
+    
+    Args:
+        masks: Bitmask vị trí của từng ký tự trong chuỗi thứ nhất
+        length: Độ dài chuỗi thứ nhất
+        other: Chuỗi thứ hai
+        
+    Returns:
+        Độ dài LCS của hai chuỗi
+    """
+    full = (1 << length) - 1
+    v = full
+    for char in other:
+        u = v & masks.get(char, 0)
+        v = ((v + u) | (v - u)) & full
+    return length - bin(v).count('1')
+
+
+class TextRecord:
+    """
+    Một văn bản cùng dạng chuẩn hóa được tính một lần khi tạo
+    
+    Giữ văn bản gốc, chữ thường, hash của chữ thường, số lần xuất hiện của
+    từng ký tự và số từ. Bitmask vị trí ký tự (cho LCS) chỉ được tính khi
+    văn bản được dùng làm ứng viên so sánh lần đầu.
+    """
+    
+    __slots__ = ('text', 'normalized', 'key', 'counts', 'word_count', '_masks')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.normalized = text.lower()
+        self.key = hash(self.normalized)
+        self.counts = Counter(self.normalized)
+        self.word_count = len(text.split())
+        self._masks: Optional[Dict[str, int]] = None
+    
+    def __len__(self) -> int:
+        return len(self.text)
+    
+    @property
+    def masks(self) -> Dict[str, int]:
+        """
+        Bitmask vị trí của từng ký tự trong dạng chuẩn hóa
+        """
+        if self._masks is None:
+            masks: Dict[str, int] = {}
+            for i, char in enumerate(self.normalized):
+                masks[char] = masks.get(char, 0) | (1 << i)
+            self._masks = masks
+        return self._masks
+
+
+class RecentTexts:
+    """
+    Cửa sổ các văn bản gần đây, mỗi văn bản là một TextRecord
+    
+    Dùng deque có giới hạn nên thêm văn bản và bỏ văn bản cũ đều O(1), lấy
+    k văn bản cuối chỉ duyệt k phần tử thay vì cắt và tạo lại danh sách.
+    """
+    
+    def __init__(self, maxlen: int = 100):
+        """
+        Khởi tạo cửa sổ
+        
+        Args:
+            maxlen: Số văn bản tối đa được giữ
+        """
+        self.records = deque(maxlen=maxlen)
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def __iter__(self) -> Iterator[TextRecord]:
+        return iter(self.records)
+    
+    def append(self, text: Union[str, TextRecord]) -> TextRecord:
+        """
+        Thêm văn bản vào cuối cửa sổ
+        
+        Args:
+            text: Văn bản hoặc TextRecord đã tạo
+        
+        Returns:
+            TextRecord của văn bản
+        """
+        record = text if isinstance(text, TextRecord) else TextRecord(text)
+        self.records.append(record)
+        return record
+    
+    def recent(self, count: int) -> List[TextRecord]:
+        """
+        Lấy các văn bản gần nhất
+        
+        Args:
+            count: Số văn bản cần lấy
+        
+        Returns:
+            Tối đa count TextRecord cuối cùng, theo thứ tự cũ đến mới
+        """
+        records = list(islice(reversed(self.records), count))
+        records.reverse()
+        return records
+    
+    def last(self) -> Optional[TextRecord]:
+        """
+        Văn bản mới nhất (None nếu cửa sổ rỗng)
+        """
+        return self.records[-1] if self.records else None
+    
+    def texts(self) -> List[str]:
+        """
+        Danh sách văn bản gốc theo thứ tự cũ đến mới
+        """
+        return [record.text for record in self.records]
+    
+    def clear(self):
+        """
+        Xóa mọi văn bản
+        """
+        self.records.clear()
+
+
+class DuplicateIndex:
+    """
+    Lớp kiểm tra trùng lặp với cùng ngưỡng như SequenceMatcher.ratio()
+    
+    ratio() = 2 * M / (len(a) + len(b)) với M là số ký tự khớp, nên mọi cận
+    trên của M cho cận trên của ratio. Mỗi ứng viên được loại bằng các cận
+    rẻ dần tới đắt: độ dài, số lần xuất hiện của ký tự, rồi LCS song song bit
+    (M không vượt quá LCS). Chỉ ứng viên vượt qua mọi cận mới được so bằng
+    difflib, nên kết quả giống hệt vòng lặp difflib cũ. Văn bản truyền vào
+    dạng chuỗi được chuẩn hóa một lần và giữ trong cache; TextRecord được
+    dùng trực tiếp.
+    """
+    
+    def __init__(self, threshold: float = 0.8, max_entries: int = 256):
+        """
+        Khởi tạo chỉ mục
+        
+        Args:
+            threshold: Ngưỡng độ giống nhau để coi là trùng lặp (0-1)
+            max_entries: Số văn bản đã chuẩn hóa tối đa được giữ trong cache
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        
+        self.checks = 0
+        self.exact_hits = 0
+        self.pruned = 0
+        self.compared = 0
+    
+    def _record(self, text: Union[str, TextRecord]) -> TextRecord:
+        """
+        Lấy TextRecord của văn bản, tạo và lưu cache nếu chưa có
+        """
+        if isinstance(text, TextRecord):
+            return text
+        
+        record = self.entries.get(text)
+        if record is not None:
+            self.entries.move_to_end(text)
+            return record
+        
+        record = TextRecord(text)
+        self.entries[text] = record
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return record
+    
+    def _matches(self, new_record: TextRecord, prev_record: TextRecord) -> bool:
+        """
+        So một cặp văn bản: loại bằng cận trên trước, chỉ chạy difflib khi cần
+        """
+        new_lower = new_record.normalized
+        prev_lower = prev_record.normalized
+        total = len(new_lower) + len(prev_lower)
+        
+        # Cùng công thức với SequenceMatcher.ratio() để không lệch ở biên ngưỡng
+        bounds = (
+            lambda: min(len(new_lower), len(prev_lower)),
+            lambda: sum((new_record.counts & prev_record.counts).values()),
+            lambda: lcs_length(prev_record.masks, len(prev_lower), new_lower)
+        )
+        for bound in bounds:
+            if 2.0 * bound() / total < self.threshold:
+                self.pruned += 1
+                return False
+        
+        self.compared += 1
+        return difflib.SequenceMatcher(None, new_lower, prev_lower).ratio() >= self.threshold
+    
+    def is_duplicate(self, new_text: Union[str, TextRecord],
+                     previous_texts: Sequence[Union[str, TextRecord]]) -> bool:
+        """
+        Kiểm tra văn bản mới có giống một trong các văn bản trước không
+        
+        Args:
+            new_text: Văn bản mới (chuỗi hoặc TextRecord)
+            previous_texts: Các văn bản cần so (thường là 10 văn bản gần nhất)
+        
+        Returns:
+            True nếu ratio() với ít nhất một văn bản >= threshold
+        """
+        if not new_text or not previous_texts:
+            return False
+        
+        self.checks += 1
+        new_record = self._record(new_text)
+        prev_records = [self._record(text) for text in previous_texts]
+        
+        # Trùng khớp hoàn toàn (không phân biệt hoa thường): ratio = 1
+        if any(record.key == new_record.key and record.normalized == new_record.normalized
+               for record in prev_records):
+            self.exact_hits += 1
+            return True
+        
+        return any(self._matches(new_record, record) for record in prev_records)
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê của chỉ mục
+        
+        Returns:
+            Dictionary chứa số lần kiểm tra, số lần trùng khớp hoàn toàn, số cặp bị
+            loại bằng cận trên và số cặp phải so bằng difflib
+        """
+        return {
+            'checks': self.checks,
+            'exact_hits': self.exact_hits,
+            'pruned': self.pruned,
+            'compared': self.compared,
+            'prune_ratio': self.pruned / (self.pruned + self.compared) if self.pruned + self.compared else 0.0
+        }
+    
+    def reset(self):
+        """
+        Xóa cache văn bản đã chuẩn hóa và reset bộ đếm
+        """
+        self.entries.clear()
+        self.checks = 0
+        self.exact_hits = 0
+        self.pruned = 0
+        self.compared = 0
@@ -0,0 +1,158 @@
+# Module ring buffer khung hình cho Live Caption Logger
+
+import threading
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class FrameRingBuffer:
+    """
+    Ring buffer cố định gồm các slot khung hình NumPy được cấp phát sẵn
+    
+    Luồng chụp ghi thẳng vào slot (acquire_slot + commit), luồng xử lý luôn
+    lấy khung mới nhất (latest-frame-wins). Khung chưa được đọc mà đã có khung
+    mới hơn được tính là bị ghi đè. Slot mà luồng xử lý đang giữ không bao giờ
+    bị ghi vào, nên khung trả về hợp lệ cho đến lần gọi get_latest tiếp theo.
+    
+    Mỗi khung mang cờ thay đổi do luồng chụp tính một lần. Khi khung chưa đọc
+    bị ghi đè, cờ của nó được cộng dồn vào khung mới để thay đổi không bị mất.
+    """
+    
+    def __init__(self, capacity: int = 3):
+        """
+        Khởi tạo ring buffer
+        
+        Args:
+            capacity: Số slot khung hình (tối thiểu 3: đang ghi, mới nhất, đang đọc)
+        """
+        if capacity < 3:
+            raise ValueError("capacity phải >= 3")
+        
+        self.capacity = capacity
+        self.frames: Optional[np.ndarray] = None  # (capacity, height, width, channels)
+        self.sequences = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.changed = np.zeros(capacity, dtype=bool)
+        
+        self.write_index = -1
+        self.latest_index = -1
+        self.reading_index = -1
+        self.latest_seq = 0
+        self.read_seq = 0
+        self.frames_written = 0
+        self.frames_overwritten = 0
+        
+        self.condition = threading.Condition()
+    
+    @property
+    def nbytes(self) -> int:
+        """
+        Dung lượng bộ nhớ của các slot khung hình
+        """
+        return self.frames.nbytes if self.frames is not None else 0
+    
+    def acquire_slot(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Lấy slot để ghi khung hình kế tiếp
+        
+        Args:
+            shape: Kích thước khung hình (height, width, channels)
+            
+        Returns:
+            Mảng slot để ghi ảnh vào
+        """
+        with self.condition:
+            if self.frames is None or self.frames.shape[1:] != tuple(shape):
+                # Vùng chụp thay đổi: cấp phát lại toàn bộ slot và bỏ khung cũ
+                self.frames = np.empty((self.capacity,) + tuple(shape), dtype=np.uint8)
+                self.latest_index = -1
+                self.reading_index = -1
+                self.read_seq = self.latest_seq
+            
+            index = (self.write_index + 1) % self.capacity
+            while index in (self.latest_index, self.reading_index):
+                index = (index + 1) % self.capacity
+            self.write_index = index
+            
+            return self.frames[index]
+    
+    def commit(self, timestamp: float, changed: bool = True) -> int:
+        """
+        Công bố khung vừa ghi vào slot từ acquire_slot
+        
+        Args:
+            timestamp: Thời điểm chụp
+            changed: Khung có khác khung thay đổi gần nhất không
+        
+        Returns:
+            Số thứ tự (sequence) của khung
+        """
+        with self.condition:
+            if self.latest_seq > self.read_seq and self.latest_index >= 0:
+                # Khung mới nhất trước đó chưa được đọc và bị thay thế
+                self.frames_overwritten += 1
+                changed = changed or bool(self.changed[self.latest_index])
+            
+            self.latest_seq += 1
+            self.frames_written += 1
+            self.sequences[self.write_index] = self.latest_seq
+            self.timestamps[self.write_index] = timestamp
+            self.changed[self.write_index] = changed
+            self.latest_index = self.write_index
+            self.condition.notify_all()
+            
+            return self.latest_seq
+    
+    def get_latest(self, timeout: float = 0.0,
+                   changed_only: bool = False) -> Optional[Tuple[np.ndarray, int, float]]:
+        """
+        Lấy khung mới nhất chưa được đọc
+        
+        Args:
+            timeout: Thời gian tối đa chờ khung mới (giây), 0 để không chờ
+            changed_only: Bỏ qua (đánh dấu đã đọc) khung không thay đổi
+        
+        Returns:
+            Tuple (frame, sequence, timestamp) nếu có khung mới, None nếu không
+        """
+        with self.condition:
+            if self.latest_seq <= self.read_seq and timeout > 0:
+                self.condition.wait_for(lambda: self.latest_seq > self.read_seq, timeout)
+            
+            if self.latest_seq <= self.read_seq or self.latest_index < 0:
+                return None
+            
+            index = self.latest_index
+            if changed_only and not self.changed[index]:
+                self.read_seq = int(self.sequences[index])
+                return None
+            
+            self.reading_index = index
+            self.read_seq = int(self.sequences[index])
+            
+            return self.frames[index], self.read_seq, float(self.timestamps[index])
+    
+    def clear(self):
+        """
+        Bỏ các khung chưa đọc (giữ nguyên bộ nhớ đã cấp phát)
+        """
+        with self.condition:
+            self.read_seq = self.latest_seq
+            self.latest_index = -1
+            self.reading_index = -1
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê của ring buffer
+        
+        Returns:
+            Dictionary chứa số khung đã ghi, bị ghi đè và dung lượng bộ nhớ
+        """
+        with self.condition:
+            return {
+                'capacity': self.capacity,
+                'frames_written': self.frames_written,
+                'frames_overwritten': self.frames_overwritten,
+                'latest_seq': self.latest_seq,
+                'memory_bytes': self.nbytes
+            }
@@ -0,0 +1,169 @@
+# Module phát hiện thay đổi khung hình cho Live Caption Logger
+
+import cv2
+import numpy as np
+from PIL import Image
+from typing import Dict, Optional, Union
+
+Frame = Union[Image.Image, np.ndarray]
+
+
+def to_grayscale(image: Frame) -> np.ndarray:
+    """
+    Chuyển ảnh (PIL Image hoặc mảng NumPy RGB/RGBA/gray) sang mảng grayscale uint8
+    
+    Args:
+        image: Ảnh đầu vào
+        
+    Returns:
+        Mảng NumPy 2 chiều kiểu uint8
+    """
+    array = np.asarray(image)
+    if array.ndim == 2:
+        return array
+    if array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+
+class FrameChangeDetector:
+    """
+    Lớp phát hiện khung hình không thay đổi để bỏ qua OCR
+    
+    Mỗi khung hình được so sánh với khung hình cuối cùng đã được OCR bằng
+    perceptual hash (dHash) trên ảnh thu nhỏ, sau đó bằng tỷ lệ điểm ảnh
+    khác biệt. Khung hình chỉ bị bỏ qua khi cả hai phép so sánh đều khớp.
+    """
+    
+    def __init__(self, enabled: bool = True, hash_size: int = 8, hash_threshold: int = 0,
+                 pixel_threshold: int = 30, changed_ratio: float = 0.001,
+                 thumb_width: int = 160):
+        """
+        Khởi tạo bộ phát hiện thay đổi
+        
+        Args:
+            enabled: Bật/tắt việc bỏ qua khung hình
+            hash_size: Kích thước lưới dHash (hash_size x hash_size bit)
+            hash_threshold: Khoảng cách Hamming tối đa để coi hai hash là giống nhau
+            pixel_threshold: Chênh lệch mức xám tối thiểu để coi một điểm ảnh là thay đổi
+            changed_ratio: Tỷ lệ điểm ảnh thay đổi tối đa để coi khung hình là giống nhau
+            thumb_width: Chiều rộng ảnh thu nhỏ dùng để so sánh điểm ảnh
+        """
+        self.enabled = enabled
+        self.hash_size = hash_size
+        self.hash_threshold = hash_threshold
+        self.pixel_threshold = pixel_threshold
+        self.changed_ratio = changed_ratio
+        self.thumb_width = thumb_width
+        
+        self.last_hash = None
+        self.last_thumb = None
+        self.frames_processed = 0
+        self.frames_skipped = 0
+    
+    def compute_hash(self, gray: np.ndarray) -> int:
+        """
+        Tính dHash của ảnh grayscale
+        
+        Args:
+            gray: Ảnh grayscale
+            
+        Returns:
+            Hash dạng số nguyên (hash_size * hash_size bit)
+        """
+        small = cv2.resize(gray, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).ravel()
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    
+    def make_thumbnail(self, gray: np.ndarray) -> np.ndarray:
+        """
+        Thu nhỏ ảnh grayscale để so sánh điểm ảnh
+        
+        Args:
+            gray: Ảnh grayscale
+            
+        Returns:
+            Ảnh thu nhỏ giữ nguyên tỷ lệ
+        """
+        height, width = gray.shape[:2]
+        if width <= self.thumb_width:
+            return gray.copy()
+        thumb_height = max(1, round(height * self.thumb_width / width))
+        return cv2.resize(gray, (self.thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+    
+    def has_changed(self, image: Frame, gray: Optional[np.ndarray] = None) -> bool:
+        """
+        Kiểm tra khung hình có khác khung hình đã OCR gần nhất không
+        
+        Args:
+            image: Khung hình mới
+            gray: Ảnh grayscale đã tính sẵn (tùy chọn)
+            
+        Returns:
+            True nếu khung hình đã thay đổi
+        """
+        if self.last_hash is None:
+            return True
+        
+        if gray is None:
+            gray = to_grayscale(image)
+        
+        frame_hash = self.compute_hash(gray)
+        if bin(frame_hash ^ self.last_hash).count('1') > self.hash_threshold:
+            return True
+        
+        thumb = self.make_thumbnail(gray)
+        if thumb.shape != self.last_thumb.shape:
+            return True
+        
+        diff = cv2.absdiff(thumb, self.last_thumb)
+        changed_pixels = np.count_nonzero(diff > self.pixel_threshold)
+        return changed_pixels > self.changed_ratio * diff.size
+    
+    def should_process(self, image: Frame) -> bool:
+        """
+        Quyết định có đưa khung hình vào OCR không và cập nhật bộ đếm
+        
+        Args:
+            image: Khung hình mới
+            
+        Returns:
+            True nếu cần OCR khung hình này
+        """
+        if not self.enabled:
+            self.frames_processed += 1
+            return True
+        
+        gray = to_grayscale(image)
+        if not self.has_changed(image, gray):
+            self.frames_skipped += 1
+            return False
+        
+        # Khung hình thay đổi trở thành khung tham chiếu mới
+        self.last_hash = self.compute_hash(gray)
+        self.last_thumb = self.make_thumbnail(gray)
+        self.frames_processed += 1
+        return True
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê số khung hình đã xử lý/bỏ qua
+        
+        Returns:
+            Dictionary chứa các bộ đếm
+        """
+        total = self.frames_processed + self.frames_skipped
+        return {
+            'frames_processed': self.frames_processed,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': self.frames_skipped / total if total else 0.0
+        }
+    
+    def reset(self):
+        """
+        Xóa khung tham chiếu và bộ đếm
+        """
+        self.last_hash = None
+        self.last_thumb = None
+        self.frames_processed = 0
+        self.frames_skipped = 0
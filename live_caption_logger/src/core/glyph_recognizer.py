@@ -0,0 +1,318 @@
+# Module nhận dạng nhanh bằng mẫu ký tự cho Live Caption Logger
+
+import threading
+import cv2
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .line_bands import find_line_bands
+from .ocr_words import OCRWords, WORD_DTYPE
+
+# Một ký tự đã tách: cột trái/phải, hàng trên/dưới (phải/dưới không bao gồm)
+Segment = Tuple[int, int, int, int]
+Templates = Tuple[List[str], np.ndarray, np.ndarray]
+
+
+def text_mask(binary: np.ndarray) -> np.ndarray:
+    """
+    Lấy mặt nạ điểm chữ từ ảnh nhị phân, màu nền xác định theo viền ảnh
+    
+    Args:
+        binary: Ảnh nhị phân uint8 (chữ sáng hoặc tối)
+        
+    Returns:
+        Mảng bool, True tại điểm chữ
+    """
+    border = np.concatenate((binary[0], binary[-1], binary[:, 0], binary[:, -1]))
+    if np.count_nonzero(border) * 2 > border.size:
+        return binary == 0
+    return binary != 0
+
+
+def split_glyphs(ink: np.ndarray) -> List[Segment]:
+    """
+    Tách một dòng chữ thành các ký tự theo các cột không có điểm chữ
+    
+    Args:
+        ink: Mặt nạ điểm chữ của một dòng
+        
+    Returns:
+        Danh sách (left, right, top, bottom) theo thứ tự từ trái sang phải
+    """
+    cols = np.flatnonzero(ink.any(axis=0))
+    if cols.size == 0:
+        return []
+    
+    breaks = np.flatnonzero(np.diff(cols) > 1)
+    starts = np.concatenate(([cols[0]], cols[breaks + 1]))
+    ends = np.concatenate((cols[breaks], [cols[-1]])) + 1
+    
+    segments = []
+    for left, right in zip(starts, ends):
+        rows = np.flatnonzero(ink[:, left:right].any(axis=1))
+        segments.append((int(left), int(right), int(rows[0]), int(rows[-1]) + 1))
+    return segments
+
+
+class GlyphRecognizer:
+    """
+    Bộ nhận dạng nhanh cho phông chữ cố định của Live Caption
+    
+    Trong phiên, mỗi kết quả Tesseract có confidence cao được dùng để học mẫu
+    ký tự: dòng được tách thành ký tự theo cột trống, và nếu số ký tự tách
+    được khớp với độ dài từ thì từng ký tự được lưu thành một mẫu (ảnh chuẩn
+    hóa cùng chiều cao, chiều rộng và độ lệch so với đường chân chữ).
+    
+    Khi nhận dạng, mọi ký tự của dòng được so với mọi mẫu bằng một phép nhân
+    ma trận. Nếu có ký tự không khớp đủ tốt (ký tự chưa học, chữ dính nhau)
+    thì trả về None để OCRProcessor dùng Tesseract. Có thể dùng chung giữa
+    các worker.
+    """
+    
+    def __init__(self, enabled: bool = True, glyph_size: int = 16, min_learn_confidence: float = 85,
+                 min_match_score: float = 0.9, size_tolerance: int = 2,
+                 max_templates_per_char: int = 4, max_templates: int = 1024):
+        """
+        Khởi tạo bộ nhận dạng
+        
+        Args:
+            enabled: Bật/tắt nhận dạng nhanh
+            glyph_size: Kích thước ảnh chuẩn hóa của một ký tự (glyph_size x glyph_size)
+            min_learn_confidence: Confidence tối thiểu của một từ Tesseract để học mẫu
+            min_match_score: Độ khớp tối thiểu (0-1) của mọi ký tự trong dòng
+            size_tolerance: Chênh lệch tối đa về kích thước/vị trí so với mẫu (pixel)
+            max_templates_per_char: Số mẫu tối đa cho mỗi ký tự
+            max_templates: Tổng số mẫu tối đa
+        """
+        self.enabled = enabled
+        self.glyph_size = glyph_size
+        self.min_learn_confidence = min_learn_confidence
+        self.min_match_score = min_match_score
+        self.size_tolerance = size_tolerance
+        self.max_templates_per_char = max_templates_per_char
+        self.max_templates = max_templates
+        
+        self.lock = threading.Lock()
+        # (nhãn, ảnh chuẩn hóa, [chiều cao, chiều rộng, độ lệch chân chữ]), thay cả bộ
+        # một lần khi thêm mẫu để luồng khác luôn đọc được trạng thái nhất quán
+        self.templates: Templates = self._empty_templates()
+        
+        # Khoảng trống giữa các ký tự trong từ và giữa các từ, để nhận ra dấu cách
+        self.char_gaps = deque(maxlen=512)
+        self.word_gaps = deque(maxlen=512)
+        self.space_threshold: Optional[float] = None
+        
+        self.lines_fast = 0
+        self.lines_fallback = 0
+        self.glyphs_learned = 0
+    
+    def _empty_templates(self) -> Templates:
+        return ([], np.empty((0, self.glyph_size * self.glyph_size), dtype=np.float32),
+                np.empty((0, 3), dtype=np.float32))
+    
+    @property
+    def ready(self) -> bool:
+        return self.enabled and bool(self.templates[0]) and self.space_threshold is not None
+    
+    def _describe(self, ink: np.ndarray, segments: List[Segment]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Chuẩn hóa các ký tự thành vector hình dạng và đặc trưng kích thước
+        """
+        baseline = float(np.median([bottom for _, _, _, bottom in segments]))
+        shapes = np.empty((len(segments), self.glyph_size * self.glyph_size), dtype=np.float32)
+        metrics = np.empty((len(segments), 3), dtype=np.float32)
+        
+        for i, (left, right, top, bottom) in enumerate(segments):
+            glyph = ink[top:bottom, left:right].astype(np.float32)
+            shapes[i] = cv2.resize(glyph, (self.glyph_size, self.glyph_size),
+                                   interpolation=cv2.INTER_AREA).ravel()
+            metrics[i] = (bottom - top, right - left, bottom - baseline)
+        
+        return shapes, metrics
+    
+    def _match(self, shapes: np.ndarray, metrics: np.ndarray,
+               templates: Templates) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        So mọi ký tự với mọi mẫu, trả về chỉ số mẫu tốt nhất và độ khớp của từng ký tự
+        """
+        _, labels_shapes, labels_metrics = templates
+        
+        # 1 - trung bình (a - b)^2, khai triển để tính bằng một phép nhân ma trận
+        dot = shapes @ labels_shapes.T
+        norm_a = np.einsum('ij,ij->i', shapes, shapes)[:, None]
+        norm_b = np.einsum('ij,ij->i', labels_shapes, labels_shapes)[None, :]
+        scores = 1 - (norm_a + norm_b - 2 * dot) / shapes.shape[1]
+        
+        fits = (np.abs(metrics[:, None, :] - labels_metrics[None, :, :]) <= self.size_tolerance).all(axis=2)
+        scores = np.where(fits, scores, -1.0)
+        
+        best = scores.argmax(axis=1)
+        return best, scores[np.arange(len(best)), best]
+    
+    def recognize(self, binary: np.ndarray) -> Optional[OCRWords]:
+        """
+        Nhận dạng nhanh ảnh nhị phân đã tiền xử lý
+        
+        Args:
+            binary: Ảnh nhị phân của một hoặc vài dòng chữ
+            
+        Returns:
+            Các từ nhận dạng được (tọa độ trong binary), hoặc None nếu cần dùng Tesseract
+        """
+        if not self.ready:
+            return None
+        
+        templates = self.templates
+        labels = templates[0]
+        ink = text_mask(binary)
+        words, confs, boxes = [], [], []
+        
+        for band_top, band_bottom in find_line_bands(ink.view(np.uint8), padding=0):
+            segments = split_glyphs(ink[band_top:band_bottom])
+            shapes, metrics = self._describe(ink[band_top:band_bottom], segments)
+            best, scores = self._match(shapes, metrics, templates)
+            
+            if scores.min() < self.min_match_score:
+                with self.lock:
+                    self.lines_fallback += 1
+                return None
+            
+            # Ghép ký tự thành từ theo khoảng trống
+            start = 0
+            for i in range(1, len(segments) + 1):
+                if i < len(segments) and segments[i][0] - segments[i - 1][1] < self.space_threshold:
+                    continue
+                chars = segments[start:i]
+                words.append(''.join(labels[j] for j in best[start:i]))
+                confs.append(float(scores[start:i].min()) * 100)
+                top = band_top + min(segment[2] for segment in chars)
+                bottom = band_top + max(segment[3] for segment in chars)
+                boxes.append((chars[0][0], top, chars[-1][1] - chars[0][0], bottom - top))
+                start = i
+        
+        if not words:
+            return None
+        
+        array = np.empty(len(words), dtype=WORD_DTYPE)
+        array['conf'] = confs
+        for column, values in zip(('left', 'top', 'width', 'height'), zip(*boxes)):
+            array[column] = values
+        
+        with self.lock:
+            self.lines_fast += 1
+        return OCRWords(tuple(words), array)
+    
+    def learn(self, binary: np.ndarray, words: OCRWords):
+        """
+        Học mẫu ký tự từ kết quả Tesseract của cùng ảnh
+        
+        Args:
+            binary: Ảnh nhị phân đã đưa vào Tesseract
+            words: Các từ Tesseract nhận dạng được (tọa độ trong binary)
+        """
+        if not self.enabled or not len(words):
+            return
+        
+        ink = text_mask(binary)
+        new_shapes, new_metrics, new_labels = [], [], []
+        char_gaps, word_gaps = [], []
+        
+        for band_top, band_bottom in find_line_bands(ink.view(np.uint8), padding=0):
+            segments = split_glyphs(ink[band_top:band_bottom])
+            if not segments:
+                continue
+            shapes, metrics = self._describe(ink[band_top:band_bottom], segments)
+            centers = np.array([(left + right) / 2 for left, right, _, _ in segments])
+            
+            previous_end = None
+            for word, box in zip(words.words, words.boxes):
+                center_y = box['top'] + box['height'] / 2
+                if not band_top <= center_y < band_bottom:
+                    continue
+                
+                inside = np.flatnonzero((centers >= box['left']) & (centers < box['left'] + box['width']))
+                if inside.size == 0:
+                    continue
+                if previous_end is not None:
+                    word_gaps.append(segments[inside[0]][0] - previous_end)
+                previous_end = segments[inside[-1]][1]
+                
+                # Chỉ học khi mỗi ký tự tách được tương ứng đúng một chữ cái
+                if box['conf'] < self.min_learn_confidence or inside.size != len(word):
+                    continue
+                for a, b in zip(inside[:-1], inside[1:]):
+                    char_gaps.append(segments[b][0] - segments[a][1])
+                for char, index in zip(word, inside):
+                    new_labels.append(char)
+                    new_shapes.append(shapes[index])
+                    new_metrics.append(metrics[index])
+        
+        with self.lock:
+            self.char_gaps.extend(char_gaps)
+            self.word_gaps.extend(word_gaps)
+            if self.char_gaps and self.word_gaps:
+                self.space_threshold = (np.median(self.char_gaps) + np.median(self.word_gaps)) / 2
+            
+            if new_labels:
+                self._add_templates(new_labels, np.array(new_shapes), np.array(new_metrics))
+    
+    def _add_templates(self, labels: List[str], shapes: np.ndarray, metrics: np.ndarray):
+        """
+        Thêm mẫu mới, bỏ các mẫu gần trùng với mẫu đã có của cùng ký tự
+        """
+        old_labels, old_shapes, old_metrics = self.templates
+        all_labels = list(old_labels)
+        all_shapes, all_metrics = [old_shapes], [old_metrics]
+        counts = {label: all_labels.count(label) for label in set(labels)}
+        
+        if old_labels:
+            best, scores = self._match(shapes, metrics, self.templates)
+        else:
+            best, scores = np.zeros(len(labels), dtype=int), np.zeros(len(labels))
+        
+        for i, label in enumerate(labels):
+            duplicate = old_labels and old_labels[best[i]] == label and scores[i] >= 0.97
+            if duplicate or counts[label] >= self.max_templates_per_char:
+                continue
+            if len(all_labels) >= self.max_templates:
+                break
+            counts[label] += 1
+            all_labels.append(label)
+            all_shapes.append(shapes[i:i + 1])
+            all_metrics.append(metrics[i:i + 1])
+            self.glyphs_learned += 1
+        
+        self.templates = (all_labels, np.concatenate(all_shapes), np.concatenate(all_metrics))
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê nhận dạng nhanh
+        
+        Returns:
+            Dictionary chứa số dòng nhận dạng nhanh, số lần dùng Tesseract và số mẫu
+        """
+        # Đọc hai bộ đếm cùng lúc để tỷ lệ không bị lệch khi worker khác đang ghi hoặc reset
+        with self.lock:
+            lines_fast, lines_fallback = self.lines_fast, self.lines_fallback
+        lines = lines_fast + lines_fallback
+        return {
+            'glyph_lines_fast': lines_fast,
+            'glyph_lines_fallback': lines_fallback,
+            'glyph_fast_ratio': lines_fast / lines if lines else 0.0,
+            'glyph_templates': len(self.templates[0]),
+            'glyph_chars': len(set(self.templates[0]))
+        }
+    
+    def reset(self):
+        """
+        Xóa mọi mẫu đã học và bộ đếm
+        """
+        with self.lock:
+            self.templates = self._empty_templates()
+            self.char_gaps.clear()
+            self.word_gaps.clear()
+            self.space_threshold = None
+            self.lines_fast = 0
+            self.lines_fallback = 0
+            self.glyphs_learned = 0
@@ -0,0 +1,180 @@
+# Module backend chụp màn hình cho Live Caption Logger
+
+import pyautogui
+import cv2
+import numpy as np
+from PIL import ImageGrab
+from typing import Optional, Tuple
+
+try:
+    import mss
+except ImportError:  # mss là phụ thuộc tùy chọn
+    mss = None
+
+
+class ScreenGrabber:
+    """
+    Lớp cơ sở cho các backend chụp màn hình
+    
+    Backend giữ tài nguyên (kết nối màn hình, buffer) trong suốt phiên chụp.
+    Ảnh trả về là mảng NumPy RGB (height, width, 3) uint8, hoặc grayscale
+    (height, width) khi bật grayscale. Nếu truyền `out`,
+    ảnh được ghi thẳng vào mảng đó; nếu không, backend dùng lại một buffer
+    riêng nên ảnh chỉ hợp lệ đến lần chụp tiếp theo.
+    """
+    
+    name = 'base'
+    
+    def __init__(self, grayscale: bool = False):
+        """
+        Khởi tạo backend
+        
+        Args:
+            grayscale: Chụp thẳng ra ảnh grayscale (bỏ bước chuyển màu khi OCR)
+        """
+        self.grayscale = grayscale
+        self.region = None  # (x, y, width, height)
+        self.buffer = None
+    
+    def open(self, region: Optional[Tuple[int, int, int, int]] = None):
+        """
+        Mở backend cho một vùng chụp
+        
+        Args:
+            region: Vùng chụp (x, y, width, height), None để chụp toàn màn hình
+        """
+        self.region = region
+    
+    def close(self):
+        """
+        Giải phóng tài nguyên của backend
+        """
+        self.buffer = None
+    
+    def grab(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Chụp một khung hình
+        
+        Args:
+            out: Mảng đích có kích thước frame_shape() để ghi ảnh vào
+            
+        Returns:
+            Mảng NumPy RGB/grayscale hoặc None nếu thất bại
+        """
+        raise NotImplementedError
+    
+    def frame_shape(self) -> Optional[Tuple[int, ...]]:
+        """
+        Lấy kích thước khung hình của vùng chụp hiện tại
+        
+        Returns:
+            Tuple (height, width, 3), (height, width) nếu grayscale, hoặc None nếu chưa biết
+        """
+        if self.region:
+            _, _, width, height = self.region
+            return self._shape(height, width)
+        return None
+    
+    def _shape(self, height: int, width: int) -> Tuple[int, ...]:
+        return (height, width) if self.grayscale else (height, width, 3)
+    
+    def _target(self, shape: Tuple[int, ...], out: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Chọn mảng đích, cấp phát lại buffer riêng khi kích thước thay đổi
+        """
+        if out is not None and out.shape == shape:
+            return out
+        if self.buffer is None or self.buffer.shape != shape:
+            self.buffer = np.empty(shape, dtype=np.uint8)
+        return self.buffer
+
+
+class PILGrabber(ScreenGrabber):
+    """
+    Backend dùng ImageGrab/pyautogui (mỗi lần chụp tạo một ảnh PIL mới)
+    """
+    
+    name = 'pil'
+    
+    def grab(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if self.region:
+            x, y, width, height = self.region
+            screenshot = ImageGrab.grab((x, y, x + width, y + height))
+        else:
+            screenshot = pyautogui.screenshot()
+        
+        pixels = np.asarray(screenshot.convert('L' if self.grayscale else 'RGB'))
+        target = self._target(pixels.shape, out)
+        np.copyto(target, pixels)
+        return target
+
+
+class MSSGrabber(ScreenGrabber):
+    """
+    Backend dùng mss, giữ một kết nối màn hình cho cả phiên
+    
+    Trên X11 mss dùng XShmGetImage khi có thể, tránh thiết lập kết nối và
+    cấp phát ảnh PIL ở mỗi lần chụp. Ảnh BGRA được chuyển thẳng sang RGB
+    (hoặc grayscale) vào buffer đích.
+    """
+    
+    name = 'mss'
+    
+    def __init__(self, grayscale: bool = False):
+        super().__init__(grayscale)
+        if mss is None:
+            raise ImportError("Chưa cài đặt mss (pip install mss)")
+        self.sct = None
+        self.monitor = None
+    
+    def open(self, region: Optional[Tuple[int, int, int, int]] = None):
+        # mss phải được tạo trong chính luồng sẽ chụp (yêu cầu trên Windows)
+        super().open(region)
+        self.close()
+        self.sct = mss.mss()
+        if region:
+            x, y, width, height = region
+            self.monitor = {'left': x, 'top': y, 'width': width, 'height': height}
+        else:
+            self.monitor = self.sct.monitors[1]
+    
+    def close(self):
+        if self.sct is not None:
+            self.sct.close()
+            self.sct = None
+        super().close()
+    
+    def grab(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if self.sct is None:
+            self.open(self.region)
+        
+        shot = self.sct.grab(self.monitor)
+        height, width = shot.height, shot.width
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(height, width, 4)
+        target = self._target(self._shape(height, width), out)
+        code = cv2.COLOR_BGRA2GRAY if self.grayscale else cv2.COLOR_BGRA2RGB
+        cv2.cvtColor(bgra, code, dst=target)
+        return target
+    
+    def frame_shape(self) -> Optional[Tuple[int, ...]]:
+        if self.monitor:
+            return self._shape(self.monitor['height'], self.monitor['width'])
+        return super().frame_shape()
+
+
+def create_grabber(backend: str = 'auto', grayscale: bool = False) -> ScreenGrabber:
+    """
+    Tạo backend chụp màn hình theo tên
+    
+    Args:
+        backend: 'auto', 'mss' hoặc 'pil'. 'auto' dùng mss nếu đã cài đặt
+        grayscale: Chụp ảnh grayscale thay vì RGB
+        
+    Returns:
+        Đối tượng ScreenGrabber
+    """
+    if backend == 'mss' or (backend == 'auto' and mss is not None):
+        return MSSGrabber(grayscale)
+    if backend in ('pil', 'auto'):
+        return PILGrabber(grayscale)
+    raise ValueError(f"Backend chụp màn hình không hợp lệ: {backend}")
@@ -0,0 +1,190 @@
+# Module tự động chọn ngôn ngữ OCR theo phiên cho Live Caption Logger
+
+import threading
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
+
+from .frame_diff import Frame
+from .ocr_processor import SCRIPT_LANGUAGES
+
+
+class SessionLanguageDetector:
+    """
+    Lớp chọn ngôn ngữ OCR một lần cho mỗi phiên/vùng chụp
+    
+    Chạy OSD của Tesseract trên vài khung đầu tiên có đủ chữ, lấy hệ chữ
+    được bình chọn nhiều nhất và ánh xạ sang ngôn ngữ OCR. Quyết định được
+    lưu theo vùng chụp; chỉ phát hiện lại khi confidence trung bình của
+    extract_text thấp kéo dài (thường do phụ đề đổi ngôn ngữ). Các khung còn
+    lại không tốn thêm lần OCR nào.
+    
+    Có thể dùng chung giữa các worker OCR: mỗi worker đọc `language` và gọi
+    observe() với kết quả của mình.
+    """
+    
+    def __init__(self, ocr_processor, default_language: str = 'eng', enabled: bool = True,
+                 probe_frames: int = 3, min_words: int = 3, low_confidence: float = 50,
+                 low_window: int = 20, script_languages: Optional[Dict[str, Optional[str]]] = None):
+        """
+        Khởi tạo bộ chọn ngôn ngữ
+        
+        Args:
+            ocr_processor: OCRProcessor riêng dùng để chạy OSD
+            default_language: Ngôn ngữ đã cấu hình, dùng cho đến khi có quyết định
+            enabled: Bật/tắt tự động chọn ngôn ngữ
+            probe_frames: Số khung chạy OSD trước khi quyết định
+            min_words: Số từ tối thiểu để một khung được dùng cho OSD
+            low_confidence: Ngưỡng confidence trung bình để phát hiện lại
+            low_window: Số kết quả liên tiếp dùng để tính confidence trung bình
+            script_languages: Mapping script -> ngôn ngữ (None = ngôn ngữ đã cấu hình)
+        """
+        self.ocr_processor = ocr_processor
+        self.default_language = default_language
+        self.enabled = enabled
+        self.probe_frames = probe_frames
+        self.min_words = min_words
+        self.low_confidence = low_confidence
+        self.script_languages = script_languages if script_languages is not None else SCRIPT_LANGUAGES
+        
+        self.lock = threading.Lock()
+        self.language = default_language
+        self.script: Optional[str] = None
+        self.region = None
+        self.decisions: Dict[Tuple, Tuple[Optional[str], str]] = {}  # vùng chụp -> (script, ngôn ngữ)
+        self.available_languages = None
+        
+        self.votes: Counter = Counter()
+        self.probing = False  # Đang có một luồng chạy OSD
+        self.attempts = 0  # Số lần chạy OSD trong lượt phát hiện hiện tại
+        self.confidences = deque(maxlen=low_window)
+        
+        self.probes = 0
+        self.rechecks = 0
+        self.language_switches = 0
+    
+    def set_region(self, region: Optional[Tuple[int, int, int, int]]):
+        """
+        Chuyển sang vùng chụp mới, dùng lại quyết định cũ nếu vùng này đã được phát hiện
+        
+        Args:
+            region: Vùng chụp (x, y, width, height)
+        """
+        with self.lock:
+            self.region = region
+            self.votes.clear()
+            self.attempts = 0
+            self.confidences.clear()
+            decision = self.decisions.get(region)
+            if decision is not None:
+                self.script, self.language = decision
+            else:
+                self.script, self.language = None, self.default_language
+    
+    def needs_probe(self) -> bool:
+        """
+        Kiểm tra còn cần chạy OSD không
+        
+        Returns:
+            True nếu chưa có quyết định cho vùng chụp hiện tại
+        """
+        return self.enabled and self.region not in self.decisions
+    
+    def observe(self, image: Frame, result: Dict) -> str:
+        """
+        Ghi nhận kết quả OCR của một khung, chạy OSD nếu đang cần phát hiện
+        
+        Args:
+            image: Ảnh vùng phụ đề đã OCR
+            result: Kết quả extract_text tương ứng
+            
+        Returns:
+            Ngôn ngữ OCR hiện tại
+        """
+        if not self.enabled or result['word_count'] == 0:
+            return self.language
+        
+        with self.lock:
+            if not self.needs_probe():
+                self.confidences.append(result['confidence'])
+                if (len(self.confidences) == self.confidences.maxlen
+                        and sum(self.confidences) / len(self.confidences) < self.low_confidence):
+                    # Confidence thấp kéo dài: bỏ quyết định và phát hiện lại
+                    self.decisions.pop(self.region, None)
+                    self.confidences.clear()
+                    self.votes.clear()
+                    self.attempts = 0
+                    self.rechecks += 1
+                return self.language
+            
+            if self.probing or result['word_count'] < self.min_words:
+                return self.language
+            self.probing = True
+        
+        # OSD chạy ngoài lock để các worker khác không bị chặn
+        detected = self.ocr_processor.detect_script(image)
+        
+        with self.lock:
+            self.probing = False
+            self.probes += 1
+            self.attempts += 1
+            if detected is not None:
+                self.votes[detected[0]] += 1
+            
+            # OSD thất bại nhiều lần (ví dụ quá ít chữ): chốt với số phiếu đang có
+            if (sum(self.votes.values()) >= self.probe_frames
+                    or self.attempts >= self.probe_frames * 2):
+                best = self.votes.most_common(1)
+                self._decide(best[0][0] if best else None)
+            return self.language
+    
+    def _decide(self, script: Optional[str]):
+        """
+        Chốt ngôn ngữ cho vùng chụp hiện tại từ script được bình chọn
+        """
+        language = self.script_languages.get(script) or self.default_language
+        
+        if self.available_languages is None:
+            self.available_languages = set(self.ocr_processor.get_available_languages())
+        if language not in self.available_languages:
+            print(f"Chưa cài dữ liệu ngôn ngữ '{language}' cho script {script}, "
+                  f"giữ '{self.default_language}'")
+            language = self.default_language
+        
+        if language != self.language:
+            self.language_switches += 1
+        self.script = script
+        self.language = language
+        self.decisions[self.region] = (script, language)
+        self.votes.clear()
+        self.attempts = 0
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê chọn ngôn ngữ
+        
+        Returns:
+            Dictionary chứa ngôn ngữ hiện tại, số lần chạy OSD và số lần phát hiện lại
+        """
+        with self.lock:
+            return {
+                'language': self.language,
+                'script': self.script,
+                'probes': self.probes,
+                'rechecks': self.rechecks,
+                'language_switches': self.language_switches
+            }
+    
+    def reset(self):
+        """
+        Xóa mọi quyết định đã lưu và bộ đếm
+        """
+        with self.lock:
+            self.decisions.clear()
+            self.votes.clear()
+            self.confidences.clear()
+            self.attempts = 0
+            self.script = None
+            self.language = self.default_language
+            self.probes = 0
+            self.rechecks = 0
+            self.language_switches = 0
@@ -0,0 +1,71 @@
+# Module đo độ trễ từ lúc chụp đến lúc có văn bản cho Live Caption Logger
+
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, Optional
+
+
+class LatencyStats:
+    """
+    Lớp thu thập độ trễ capture-to-text của một phiên và tính các phân vị
+    
+    Mỗi mẫu là khoảng thời gian từ lúc khung hình được chụp đến lúc văn bản
+    của nó được xử lý xong. Chỉ giữ max_samples mẫu gần nhất để bộ nhớ không
+    tăng theo độ dài phiên.
+    """
+    
+    def __init__(self, max_samples: int = 100000):
+        """
+        Khởi tạo bộ đo
+        
+        Args:
+            max_samples: Số mẫu gần nhất được giữ để tính phân vị
+        """
+        self.samples = deque(maxlen=max_samples)
+        self.lock = threading.Lock()
+    
+    def record(self, capture_time: float, done_time: Optional[float] = None) -> float:
+        """
+        Ghi một mẫu độ trễ
+        
+        Args:
+            capture_time: Thời điểm chụp khung (time.time())
+            done_time: Thời điểm có văn bản (mặc định là bây giờ)
+            
+        Returns:
+            Độ trễ (giây)
+        """
+        latency = (done_time if done_time is not None else time.time()) - capture_time
+        with self.lock:
+            self.samples.append(latency)
+        return latency
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy các phân vị độ trễ
+        
+        Returns:
+            Dictionary chứa count, p50, p95, p99 và max (giây, 0 nếu chưa có mẫu)
+        """
+        with self.lock:
+            samples = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        if samples.size == 0:
+            return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        return {
+            'count': int(samples.size),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(samples.max())
+        }
+    
+    def reset(self):
+        """
+        Xóa mọi mẫu (bắt đầu phiên mới)
+        """
+        with self.lock:
+            self.samples.clear()
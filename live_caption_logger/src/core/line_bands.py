@@ -0,0 +1,511 @@
+# Module tách dòng phụ đề và OCR theo dòng cho Live Caption Logger
+
+import hashlib
+import threading
+import time
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .frame_diff import Frame, to_grayscale
+from .ocr_processor import failed_result, is_failed_result
+from .ocr_words import OCRWords
+from .scroll_detector import ScrollDetector
+from .text_roi import TextROITracker
+
+
+def binarize_text(gray: np.ndarray) -> np.ndarray:
+    """
+    Nhị phân hóa ảnh grayscale sao cho điểm ảnh chữ có giá trị 255
+    
+    Dùng Otsu, sau đó lấy lớp chiếm thiểu số làm chữ để hỗ trợ cả chữ sáng
+    trên nền tối (Live Caption mặc định) lẫn chữ tối trên nền sáng.
+    
+    Args:
+        gray: Ảnh grayscale
+        
+    Returns:
+        Ảnh nhị phân uint8 (chữ = 255)
+    """
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) * 2 > binary.size:
+        cv2.bitwise_not(binary, dst=binary)
+    return binary
+
+
+def find_line_bands(binary: np.ndarray, min_band_height: int = 6, max_gap: int = 1,
+                    padding: int = 3, min_row_pixels: int = 1) -> List[Tuple[int, int]]:
+    """
+    Tách ảnh thành các dải dòng chữ theo chiều ngang bằng row-projection profile
+    
+    Args:
+        binary: Ảnh nhị phân (chữ = 255)
+        min_band_height: Chiều cao tối thiểu của một dải chữ
+        max_gap: Số hàng trống tối đa bên trong một dòng chữ
+        padding: Lề thêm vào trên/dưới mỗi dải (không vượt qua điểm giữa hai dải)
+        min_row_pixels: Số điểm ảnh chữ tối thiểu để coi một hàng là có chữ
+        
+    Returns:
+        Danh sách (top, bottom) với bottom không bao gồm
+    """
+    profile = np.count_nonzero(binary, axis=1)
+    rows = np.flatnonzero(profile >= min_row_pixels)
+    if rows.size == 0:
+        return []
+    
+    # Gom các hàng có chữ liên tiếp (cho phép khoảng trống nhỏ) thành dải
+    breaks = np.flatnonzero(np.diff(rows) > max_gap + 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+    
+    raw_bands = [(int(s), int(e)) for s, e in zip(starts, ends) if e - s >= min_band_height]
+    
+    height = binary.shape[0]
+    bands = []
+    for i, (top, bottom) in enumerate(raw_bands):
+        upper_limit = 0 if i == 0 else (raw_bands[i - 1][1] + top + 1) // 2
+        lower_limit = height if i == len(raw_bands) - 1 else (bottom + raw_bands[i + 1][0]) // 2
+        bands.append((max(upper_limit, top - padding), min(lower_limit, bottom + padding)))
+    
+    return bands
+
+
+class BandLine:
+    """
+    Kết quả OCR của một dòng, có thể còn đang được OCR ở worker khác
+    
+    Dòng cần OCR được đưa vào trạng thái chung ngay khi khung được lập kế
+    hoạch, nên khung kế tiếp (có thể ở worker khác) dùng lại được dòng đó và
+    chờ kết quả thay vì OCR lại.
+    """
+    
+    __slots__ = ('result', 'event')
+    
+    def __init__(self, result: Optional[Dict] = None):
+        self.result = result
+        self.event = threading.Event()
+        if result is not None:
+            self.event.set()
+    
+    @property
+    def failed(self) -> bool:
+        """
+        Dòng đã có kết quả và lần OCR đó quá thời gian hoặc lỗi
+        """
+        return self.event.is_set() and is_failed_result(self.result)
+    
+    def set(self, result: Dict):
+        """
+        Ghi kết quả OCR và đánh thức các khung đang chờ
+        """
+        self.result = result
+        self.event.set()
+    
+    def wait(self) -> Dict:
+        """
+        Chờ và lấy kết quả OCR của dòng
+        """
+        self.event.wait()
+        return self.result
+
+
+class LineBandState:
+    """
+    Trạng thái theo dòng dùng chung giữa các worker OCR
+    
+    Gồm cache dòng, khung trước cùng các dòng của nó (cho phát hiện cuộn) và
+    ROI. Mọi thay đổi diễn ra dưới một khóa, theo thứ tự các worker nhận
+    khung, nên mỗi khung luôn được so với khung ngay trước nó dù các khung
+    liên tiếp chạy trên các worker khác nhau. Dòng của khung trước có thể
+    còn đang được OCR; khung sau chờ kết quả của dòng đó (khung trước luôn
+    được lập kế hoạch trước nên không thể chờ vòng).
+    """
+    
+    def __init__(self, cache_size: int = 64, scroll_detector: Optional[ScrollDetector] = None,
+                 roi_tracker: Optional[TextROITracker] = None):
+        """
+        Khởi tạo trạng thái
+        
+        Args:
+            cache_size: Số dải tối đa giữ trong cache
+            scroll_detector: Bộ phát hiện cuộn (mặc định tạo mới)
+            roi_tracker: Bộ theo dõi vùng chứa chữ (mặc định tạo mới)
+        """
+        self.lock = threading.Lock()
+        self.cache_size = cache_size
+        self.scroll_detector = scroll_detector or ScrollDetector()
+        self.roi_tracker = roi_tracker or TextROITracker()
+        
+        self.band_cache: "OrderedDict[bytes, BandLine]" = OrderedDict()
+        
+        # Khung trước và các dòng của nó, dùng để ánh xạ dòng khi phụ đề cuộn
+        self.prev_gray: Optional[np.ndarray] = None
+        self.prev_lines: List[Tuple[int, int, BandLine]] = []
+    
+    def find_scrolled_line(self, gray: np.ndarray, top: int, bottom: int,
+                           shift: int) -> Optional[BandLine]:
+        """
+        Tìm dòng của khung trước mà dải hiện tại là bản dịch lên shift pixel
+        """
+        if not self.scroll_detector.region_matches(self.prev_gray, gray, top, bottom, shift):
+            return None
+        
+        # Chọn dòng trước có phần giao lớn nhất với vị trí cũ của dải
+        old_top, old_bottom = top + shift, bottom + shift
+        best_line, best_overlap = None, 0
+        for prev_top, prev_bottom, line in self.prev_lines:
+            overlap = min(old_bottom, prev_bottom) - max(old_top, prev_top)
+            if overlap > best_overlap:
+                best_line, best_overlap = line, overlap
+        
+        if best_overlap * 5 < (bottom - top) * 4:  # Cần giao ít nhất 80%
+            return None
+        # Dòng OCR thất bại không được dùng lại khi cuộn, để được OCR lại
+        if best_line.failed:
+            return None
+        return best_line
+    
+    def store(self, band_hash: bytes, line: BandLine):
+        """
+        Lưu một dải vào cache LRU
+        """
+        self.band_cache[band_hash] = line
+        if len(self.band_cache) > self.cache_size:
+            self.band_cache.popitem(last=False)
+    
+    def discard(self, line: BandLine):
+        """
+        Bỏ dòng OCR thất bại khỏi cache và khỏi khung trước để được OCR lại
+        """
+        with self.lock:
+            for band_hash in [key for key, value in self.band_cache.items() if value is line]:
+                del self.band_cache[band_hash]
+            self.prev_lines = [entry for entry in self.prev_lines if entry[2] is not line]
+    
+    def remember_frame(self, gray: np.ndarray, lines: List[Tuple[int, int, BandLine]]):
+        """
+        Lưu khung hiện tại làm khung tham chiếu cho phát hiện cuộn
+        """
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.prev_gray = np.empty_like(gray)
+        np.copyto(self.prev_gray, gray)
+        self.prev_lines = [line for line in lines if not line[2].failed]
+    
+    def clear(self):
+        """
+        Bỏ văn bản trong cache và khung trước (ví dụ khi đổi ngôn ngữ)
+        """
+        with self.lock:
+            self.band_cache.clear()
+            self.prev_gray = None
+            self.prev_lines = []
+    
+    def reset(self):
+        """
+        Xóa cache dòng, khung trước và bộ đếm của bộ phát hiện cuộn và ROI
+        """
+        self.clear()
+        with self.lock:
+            self.scroll_detector.reset()
+            self.roi_tracker.reset()
+
+
+class LineBandOCR:
+    """
+    Lớp OCR theo dòng: chỉ gửi các dòng đã thay đổi tới OCR
+    
+    Vùng phụ đề được tách thành các dải dòng chữ. Mỗi dải được băm theo nội
+    dung điểm ảnh; dải đã gặp trước đó dùng lại văn bản trong cache. Khi phụ
+    đề cuộn lên, dải chỉ bị dịch chuyển so với khung trước dùng lại văn bản
+    của dòng tương ứng, nên chỉ dòng mới xuất hiện được OCR. Khi có nhiều dòng
+    cần OCR, chúng được ghép lại và OCR bằng một lần gọi Tesseract. Mỗi dòng
+    chỉ được cắt theo chiều ngang trong vùng chứa chữ (ROI), bỏ phần nền trống
+    hai bên. Kết quả có cùng dạng với OCRProcessor.extract_text.
+    
+    Các worker OCR song song dùng chung một LineBandState (cache dòng, khung
+    trước, ROI); mỗi worker có OCRProcessor và bộ đếm riêng.
+    """
+    
+    def __init__(self, ocr_processor, enabled: bool = True, min_band_height: int = 6,
+                 max_gap: int = 1, padding: int = 3, cache_size: int = 64,
+                 scroll_detector: Optional[ScrollDetector] = None, batch: bool = True,
+                 language_detector=None, roi_tracker: Optional[TextROITracker] = None,
+                 state: Optional[LineBandState] = None):
+        """
+        Khởi tạo OCR theo dòng
+        
+        Args:
+            ocr_processor: OCRProcessor dùng để OCR từng dải
+            enabled: Tắt để OCR toàn bộ ảnh như trước
+            min_band_height: Chiều cao tối thiểu của một dải chữ
+            max_gap: Số hàng trống tối đa bên trong một dòng chữ
+            padding: Lề thêm vào trên/dưới mỗi dải
+            cache_size: Số dải tối đa giữ trong cache (khi không truyền state)
+            scroll_detector: Bộ phát hiện cuộn (khi không truyền state, mặc định tạo mới)
+            batch: OCR nhiều dòng mới bằng một lần gọi (extract_text_batch)
+            language_detector: SessionLanguageDetector dùng chung để tự chọn ngôn ngữ (tùy chọn)
+            roi_tracker: Bộ theo dõi vùng chứa chữ (khi không truyền state, mặc định tạo mới)
+            state: Trạng thái theo dòng dùng chung giữa các worker (mặc định tạo riêng)
+        """
+        self.ocr_processor = ocr_processor
+        self.enabled = enabled
+        self.min_band_height = min_band_height
+        self.max_gap = max_gap
+        self.padding = padding
+        self.batch = batch
+        self.language_detector = language_detector
+        self.state = state or LineBandState(cache_size, scroll_detector, roi_tracker)
+        
+        self.bands_total = 0
+        self.bands_ocr = 0
+        self.bands_scrolled = 0
+        self.pixels_total = 0
+        self.pixels_ocr = 0
+        self.pixels_band = 0  # Diện tích các dòng đã OCR nếu không cắt ROI
+        self.ocr_calls = 0
+        self.ocr_time = 0.0
+    
+    @staticmethod
+    def hash_band(gray_band: np.ndarray) -> bytes:
+        """
+        Tính hash nội dung của một dải
+        
+        Args:
+            gray_band: Dải ảnh grayscale
+            
+        Returns:
+            Digest dạng bytes
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(gray_band).data)
+        digest.update(str(gray_band.shape).encode())
+        return digest.digest()
+    
+    def split_bands(self, gray: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Tách ảnh grayscale thành các dải dòng chữ
+        
+        Args:
+            gray: Ảnh grayscale của vùng phụ đề
+            
+        Returns:
+            Danh sách (top, bottom)
+        """
+        return find_line_bands(
+            binarize_text(gray),
+            min_band_height=self.min_band_height,
+            max_gap=self.max_gap,
+            padding=self.padding
+        )
+    
+    def extract_text(self, image: Frame) -> Dict:
+        """
+        Trích xuất văn bản, chỉ OCR các dòng đã thay đổi
+        
+        Args:
+            image: Ảnh vùng phụ đề (PIL Image hoặc mảng NumPy RGB)
+            
+        Returns:
+            Dictionary cùng dạng với OCRProcessor.extract_text, kèm 'lines'
+        """
+        if self.language_detector is not None:
+            self._sync_language()
+        
+        if not self.enabled:
+            result = self.ocr_processor.extract_text(image)
+        else:
+            result = self._extract_lines(np.asarray(image))
+        
+        if self.language_detector is not None:
+            self.language_detector.observe(image, result)
+        
+        return result
+    
+    def _sync_language(self):
+        """
+        Áp dụng ngôn ngữ do bộ chọn ngôn ngữ quyết định; văn bản cũ trong cache bị bỏ
+        """
+        language = self.language_detector.language
+        if language != self.ocr_processor.language:
+            self.ocr_processor.set_language(language)
+            self.state.clear()
+    
+    def _plan_lines(self, array: np.ndarray) -> Tuple[List[Tuple[int, int, BandLine]], List[int],
+                                                      int, int]:
+        """
+        Tách dòng và chọn dòng cần OCR, cập nhật trạng thái chung dưới khóa
+        
+        Returns:
+            Tuple (các dòng (top, bottom, BandLine), vị trí các dòng cần OCR,
+            left, right của ROI)
+        """
+        state = self.state
+        with state.lock:
+            gray = to_grayscale(array)
+            height, width = gray.shape
+            self.pixels_total += height * width
+            
+            binary = binarize_text(gray)
+            bands = find_line_bands(
+                binary,
+                min_band_height=self.min_band_height,
+                max_gap=self.max_gap,
+                padding=self.padding
+            )
+            
+            # Chỉ OCR phần có chữ theo chiều ngang; ROI giữ nguyên khi bố cục ổn định
+            roi = state.roi_tracker.update(binary)
+            left, right = (roi[2], roi[3]) if roi else (0, width)
+            
+            hashes = [self.hash_band(gray[top:bottom]) for top, bottom in bands]
+            
+            # Chỉ chạy phase correlation khi có dòng không có trong cache
+            shift = None
+            if state.prev_gray is not None and any(h not in state.band_cache for h in hashes):
+                shift = state.scroll_detector.detect(state.prev_gray, gray)
+            
+            lines = []
+            pending = []  # Vị trí các dòng cần OCR
+            for (top, bottom), band_hash in zip(bands, hashes):
+                self.bands_total += 1
+                line = state.band_cache.get(band_hash)
+                
+                if line is not None:
+                    state.band_cache.move_to_end(band_hash)
+                elif shift:
+                    line = state.find_scrolled_line(gray, top, bottom, shift)
+                    if line is not None:
+                        self.bands_scrolled += 1
+                        state.store(band_hash, line)
+                
+                if line is None:
+                    # Đưa vào cache ngay để khung sau dùng lại trong khi dòng đang được OCR
+                    line = BandLine()
+                    state.store(band_hash, line)
+                    pending.append(len(lines))
+                    self.bands_ocr += 1
+                    self.pixels_ocr += (bottom - top) * (right - left)
+                    self.pixels_band += (bottom - top) * width
+                
+                lines.append((top, bottom, line))
+            
+            state.remember_frame(gray, lines)
+        
+        return lines, pending, left, right
+    
+    def _extract_lines(self, array: np.ndarray) -> Dict:
+        """
+        OCR theo dòng cho một khung hình
+        """
+        lines, pending, left, right = self._plan_lines(array)
+        
+        ocr_results = []
+        try:
+            if pending:
+                crops = [array[lines[i][0]:lines[i][1], left:right] for i in pending]
+                start_time = time.perf_counter()
+                if self.batch and len(crops) > 1:
+                    ocr_results = self.ocr_processor.extract_text_batch(crops)
+                    self.ocr_calls += 1
+                else:
+                    ocr_results = [self.ocr_processor.extract_text(crop) for crop in crops]
+                    self.ocr_calls += len(crops)
+                self.ocr_time += time.perf_counter() - start_time
+        finally:
+            # Luôn ghi kết quả để các khung đang chờ dòng này không bị treo
+            ocr_results = list(ocr_results) + [failed_result('error')] * (len(pending) - len(ocr_results))
+            for i, result in zip(pending, ocr_results):
+                if left and result.get('words') is not None:
+                    # Đổi hộp bao từ tọa độ ảnh cắt về tọa độ dòng
+                    result = dict(result, words=result['words'].shifted(0, left))
+                line = lines[i][2]
+                line.set(result)
+                # Dòng quá thời gian hoặc lỗi được OCR lại ở khung sau
+                if line.failed:
+                    self.state.discard(line)
+        
+        fresh = [False] * len(lines)
+        for i in pending:
+            fresh[i] = True
+        
+        return self.combine_results([line.wait() for _, _, line in lines],
+                                    [top for top, _, _ in lines], fresh)
+    
+    @staticmethod
+    def combine_results(line_results: List[Dict], tops: Optional[List[int]] = None,
+                        fresh: Optional[List[bool]] = None) -> Dict:
+        """
+        Ghép kết quả OCR của các dòng thành một kết quả
+        
+        Args:
+            line_results: Kết quả OCR theo thứ tự từ trên xuống
+            tops: Vị trí trên của từng dòng, dùng để đổi hộp bao về tọa độ vùng chụp
+            fresh: Dòng nào được OCR ở khung này (False nếu lấy từ cache hoặc dòng
+                   đã cuộn); mặc định mọi dòng
+                   
+        Returns:
+            Dictionary cùng dạng với OCRProcessor.extract_text, kèm 'lines',
+            'line_words' (từ của từng dòng, tọa độ vùng chụp) và 'line_fresh'
+        """
+        texts = [result['text'] for result in line_results if result['text']]
+        word_count = sum(result['word_count'] for result in line_results)
+        weighted = sum(result['confidence'] * result['word_count'] for result in line_results)
+        
+        tops = tops or [0] * len(line_results)
+        line_words = [
+            result['words'].shifted(top) if result.get('words') is not None else OCRWords.empty()
+            for result, top in zip(line_results, tops)
+        ]
+        
+        return {
+            'text': ' '.join(texts),
+            'confidence': weighted / word_count if word_count else 0,
+            'word_count': word_count,
+            'raw_data': None,
+            'words': OCRWords.concatenate(line_words),
+            'lines': [result['text'] for result in line_results],
+            'line_words': line_words,
+            'line_fresh': fresh if fresh is not None else [True] * len(line_results)
+        }
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê số dải và số điểm ảnh đã gửi tới OCR
+        
+        Returns:
+            Dictionary thống kê, kèm mức giảm điểm ảnh nhờ cắt ROI và thời gian OCR
+            tiết kiệm được (ước lượng, coi thời gian OCR tỷ lệ với số điểm ảnh)
+        """
+        roi_reduction = self.pixels_band / self.pixels_ocr if self.pixels_ocr else 0.0
+        stats = {
+            'bands_total': self.bands_total,
+            'bands_ocr': self.bands_ocr,
+            'bands_cached': self.bands_total - self.bands_ocr - self.bands_scrolled,
+            'bands_scrolled': self.bands_scrolled,
+            'pixels_total': self.pixels_total,
+            'pixels_ocr': self.pixels_ocr,
+            'pixels_band': self.pixels_band,
+            'ocr_calls': self.ocr_calls,
+            'pixel_reduction': self.pixels_total / self.pixels_ocr if self.pixels_ocr else 0.0,
+            'roi_pixel_reduction': roi_reduction,
+            'ocr_time': self.ocr_time,
+            'ocr_time_saved': self.ocr_time * (roi_reduction - 1) if roi_reduction else 0.0,
+            'ocr_timeouts': getattr(self.ocr_processor, 'timeouts', 0)
+        }
+        stats.update(self.state.roi_tracker.get_stats())
+        return stats
+    
+    def reset(self):
+        """
+        Xóa cache dòng (dùng chung) và bộ đếm
+        """
+        self.state.reset()
+        self.bands_total = 0
+        self.bands_ocr = 0
+        self.bands_scrolled = 0
+        self.pixels_total = 0
+        self.pixels_ocr = 0
+        self.pixels_band = 0
+        self.ocr_calls = 0
+        self.ocr_time = 0.0
@@ -0,0 +1,412 @@
+# Module backend OCR cho Live Caption Logger
+
+import itertools
+import time
+import pytesseract
+import numpy as np
+from PIL import Image
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .tesseract_engine import InProcessTesseract, TSV_COLUMNS
+
+OCRImage = Union[Image.Image, np.ndarray]
+
+
+class OCRTimeoutError(RuntimeError):
+    """
+    Lỗi khi một lần nhận dạng vượt quá thời gian cho phép của backend
+    """
+
+
+def stack_images(images: Sequence[np.ndarray], separator: int = 16) -> Tuple[np.ndarray, List[int]]:
+    """
+    Xếp chồng các ảnh grayscale (chữ tối trên nền trắng) theo chiều dọc
+    
+    Args:
+        images: Các ảnh 2 chiều uint8
+        separator: Chiều cao dải nền ngăn cách giữa các ảnh (pixel)
+        
+    Returns:
+        Tuple (ảnh ghép, vị trí trên của từng ảnh)
+    """
+    width = max(image.shape[1] for image in images)
+    height = separator + sum(image.shape[0] + separator for image in images)
+    canvas = np.full((height, width), 255, dtype=np.uint8)
+    
+    offsets = []
+    y = separator
+    for image in images:
+        canvas[y:y + image.shape[0], :image.shape[1]] = image
+        offsets.append(y)
+        y += image.shape[0] + separator
+    return canvas, offsets
+
+
+def split_stacked_data(data: Dict[str, List], offsets: List[int]) -> List[Dict[str, List]]:
+    """
+    Chia dữ liệu image_to_data của ảnh ghép về từng ảnh theo tâm dọc của hộp bao
+    
+    Args:
+        data: Dictionary giống pytesseract.Output.DICT của ảnh ghép
+        offsets: Vị trí trên của từng ảnh trong ảnh ghép
+        
+    Returns:
+        Danh sách dictionary, tọa độ trong từng ảnh
+    """
+    tops = np.asarray(data['top'], dtype=np.int64)
+    centers = tops + np.asarray(data['height'], dtype=np.int64) // 2
+    slots = np.maximum(np.searchsorted(offsets, centers, side='right') - 1, 0)
+    
+    parts = []
+    for slot, offset in enumerate(offsets):
+        indices = np.flatnonzero(slots == slot)
+        part = {column: [values[i] for i in indices] for column, values in data.items()}
+        part['top'] = [int(tops[i]) - offset for i in indices]
+        parts.append(part)
+    return parts
+
+
+def parse_osd(osd: str) -> Optional[Tuple[str, float]]:
+    """
+    Lấy script và độ tin cậy từ đầu ra OSD của Tesseract
+    
+    Args:
+        osd: Văn bản OSD
+        
+    Returns:
+        Tuple (script, độ tin cậy) hoặc None nếu không có script
+    """
+    script, confidence = None, 0.0
+    for line in osd.split('\n'):
+        if line.startswith('Script:'):
+            script = line.split(':')[1].strip()
+        elif line.startswith('Script confidence:'):
+            confidence = float(line.split(':')[1])
+    return (script, confidence) if script else None
+
+
+class OCRBackend:
+    """
+    Lớp cơ sở cho các backend OCR
+    
+    OCRProcessor lo tiền xử lý, cache và lọc từ; backend chỉ nhận dạng ảnh
+    đã tiền xử lý và trả về dữ liệu theo từ cùng dạng pytesseract.Output.DICT
+    (ít nhất các cột text, conf, left, top, width, height).
+    """
+    
+    name = 'base'
+    
+    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3,
+                 variables: Optional[Dict[str, str]] = None, timeout: float = 0.0):
+        """
+        Khởi tạo backend
+        
+        Args:
+            language: Ngôn ngữ OCR
+            psm: Page Segmentation Mode
+            oem: OCR Engine Mode
+            variables: Biến cấu hình Tesseract (ví dụ tắt từ điển)
+            timeout: Thời gian tối đa của một lần nhận dạng (giây, 0 = không giới hạn);
+                     quá thời gian thì image_to_data ném OCRTimeoutError
+        """
+        self.language = language
+        self.psm = psm
+        self.oem = oem
+        self.variables = variables or {}
+        self.timeout = timeout
+    
+    def image_to_data(self, image: OCRImage) -> Dict[str, List]:
+        """
+        Nhận dạng một ảnh
+        
+        Args:
+            image: Ảnh đã tiền xử lý (PIL Image hoặc mảng NumPy)
+            
+        Returns:
+            Dictionary giống pytesseract.Output.DICT
+        """
+        raise NotImplementedError
+    
+    def image_to_data_batch(self, images: Sequence[np.ndarray],
+                            separator: int = 16) -> List[Dict[str, List]]:
+        """
+        Nhận dạng nhiều ảnh nhỏ bằng một lần gọi image_to_data trên ảnh ghép
+        
+        Args:
+            images: Các ảnh grayscale chữ tối trên nền trắng
+            separator: Chiều cao dải nền ngăn cách giữa các ảnh (pixel)
+            
+        Returns:
+            Dữ liệu của từng ảnh theo thứ tự đầu vào, tọa độ trong từng ảnh
+        """
+        canvas, offsets = stack_images(images, separator)
+        return split_stacked_data(self.image_to_data(canvas), offsets)
+    
+    def image_to_string(self, image: OCRImage) -> str:
+        """
+        Nhận dạng ảnh và trả về văn bản thuần
+        
+        Args:
+            image: Ảnh đầu vào
+            
+        Returns:
+            Văn bản được nhận dạng
+        """
+        data = self.image_to_data(image)
+        return ' '.join(text for text in data['text'] if text.strip())
+    
+    def get_languages(self) -> List[str]:
+        """
+        Lấy danh sách ngôn ngữ có sẵn
+        
+        Returns:
+            Danh sách mã ngôn ngữ
+        """
+        return [self.language]
+    
+    def set_language(self, language: str):
+        """
+        Đổi ngôn ngữ OCR
+        
+        Args:
+            language: Mã ngôn ngữ
+        """
+        self.language = language
+    
+    def detect_script(self, image: OCRImage) -> Optional[Tuple[str, float]]:
+        """
+        Phát hiện hệ chữ trong ảnh
+        
+        Args:
+            image: Ảnh đã tiền xử lý
+            
+        Returns:
+            Tuple (script, độ tin cậy) hoặc None nếu backend không hỗ trợ
+        """
+        return None
+    
+    def warm_up(self):
+        """
+        Nhận dạng thử một ảnh trống để nạp model trước khung hình đầu tiên
+        """
+        self.image_to_data(np.full((32, 32), 255, dtype=np.uint8))
+    
+    def close(self):
+        """
+        Giải phóng tài nguyên của backend
+        """
+
+
+class SubprocessTesseractBackend(OCRBackend):
+    """
+    Backend gọi chương trình tesseract qua pytesseract (mỗi lần gọi một tiến trình)
+    """
+    
+    name = 'subprocess'
+    
+    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3,
+                 variables: Optional[Dict[str, str]] = None, timeout: float = 0.0):
+        super().__init__(language, psm, oem, variables, timeout)
+        self.config = f'--psm {psm} --oem {oem}' + ''.join(
+            f' -c {key}={value}' for key, value in self.variables.items())
+        
+        # Kiểm tra xem Tesseract có được cài đặt không
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception as e:
+            print(f"Lỗi: Tesseract chưa được cài đặt hoặc không tìm thấy: {e}")
+            print("Vui lòng cài đặt Tesseract OCR")
+    
+    def image_to_data(self, image: OCRImage) -> Dict[str, List]:
+        try:
+            return pytesseract.image_to_data(
+                image,
+                lang=self.language,
+                config=self.config,
+                output_type=pytesseract.Output.DICT,
+                timeout=self.timeout
+            )
+        except RuntimeError as e:
+            # pytesseract kill tiến trình và ném RuntimeError('Tesseract process timeout')
+            if 'timeout' in str(e).lower():
+                raise OCRTimeoutError(str(e)) from e
+            raise
+    
+    def image_to_string(self, image: OCRImage) -> str:
+        try:
+            return pytesseract.image_to_string(image, lang=self.language, config=self.config,
+                                               timeout=self.timeout)
+        except RuntimeError as e:
+            if 'timeout' in str(e).lower():
+                raise OCRTimeoutError(str(e)) from e
+            raise
+    
+    def get_languages(self) -> List[str]:
+        return pytesseract.get_languages()
+    
+    def detect_script(self, image: OCRImage) -> Optional[Tuple[str, float]]:
+        return parse_osd(pytesseract.image_to_osd(image))
+
+
+class InProcessTesseractBackend(OCRBackend):
+    """
+    Backend Tesseract nạp một lần trong tiến trình (tesserocr)
+    """
+    
+    name = 'inprocess'
+    
+    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3,
+                 variables: Optional[Dict[str, str]] = None, timeout: float = 0.0):
+        super().__init__(language, psm, oem, variables, timeout)
+        self.engine = InProcessTesseract(language, psm, oem, self.variables)
+    
+    def image_to_data(self, image: OCRImage) -> Dict[str, List]:
+        try:
+            return self.engine.image_to_data(image, self.timeout)
+        except TimeoutError as e:
+            raise OCRTimeoutError(str(e)) from e
+    
+    def image_to_string(self, image: OCRImage) -> str:
+        return self.engine.image_to_string(image)
+    
+    def get_languages(self) -> List[str]:
+        return self.engine.get_languages()
+    
+    def set_language(self, language: str):
+        self.engine.set_language(language)
+        self.language = language
+    
+    def detect_script(self, image: OCRImage) -> Optional[Tuple[str, float]]:
+        # OSD cần traineddata riêng (osd), chạy qua pytesseract như trước
+        return parse_osd(pytesseract.image_to_osd(image))
+    
+    def close(self):
+        self.engine.close()
+
+
+class FakeOCRBackend(OCRBackend):
+    """
+    Backend giả lập có độ trễ và kết quả cấu hình được, không cần Tesseract
+    
+    Dùng để đo thông lượng của phần còn lại của pipeline (chụp màn hình, xử
+    lý văn bản, lưu trữ) một cách lặp lại được. Mỗi lần nhận dạng một ảnh trả
+    về văn bản kế tiếp của `output` (lặp vòng), các từ được chia đều theo
+    chiều rộng ảnh.
+    """
+    
+    name = 'fake'
+    
+    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3,
+                 variables: Optional[Dict[str, str]] = None, timeout: float = 0.0,
+                 output: Union[str, Sequence[str], Callable[[OCRImage], str]] = 'fake caption text',
+                 latency: float = 0.0, batch_latency: Optional[float] = None,
+                 confidence: float = 90.0, script: Optional[str] = 'Latin',
+                 languages: Optional[Sequence[str]] = None):
+        """
+        Khởi tạo backend giả lập
+        
+        Args:
+            language: Ngôn ngữ OCR
+            psm: Page Segmentation Mode (không dùng)
+            oem: OCR Engine Mode (không dùng)
+            variables: Biến cấu hình Tesseract (không dùng)
+            timeout: Thời gian tối đa của một lần gọi; latency lớn hơn thì ném OCRTimeoutError
+            output: Văn bản trả về: một chuỗi, danh sách chuỗi (lặp vòng) hoặc hàm nhận ảnh
+            latency: Độ trễ giả lập cho mỗi lần gọi image_to_data (giây)
+            batch_latency: Độ trễ của một lần gọi theo lô (mặc định bằng latency)
+            confidence: Confidence của mọi từ
+            script: Script trả về khi phát hiện hệ chữ (None = không xác định được)
+            languages: Danh sách ngôn ngữ có sẵn (mặc định chỉ ngôn ngữ hiện tại)
+        """
+        super().__init__(language, psm, oem, variables, timeout)
+        if isinstance(output, str):
+            output = [output]
+        self.output = output if callable(output) else itertools.cycle(list(output))
+        self.latency = latency
+        self.batch_latency = latency if batch_latency is None else batch_latency
+        self.confidence = confidence
+        self.script = script
+        self.languages = list(languages) if languages is not None else None
+        
+        self.calls = 0
+        self.images = 0
+    
+    def _sleep(self, latency: float):
+        """
+        Giả lập thời gian nhận dạng, dừng ở timeout như backend thật
+        """
+        if self.timeout and latency > self.timeout:
+            time.sleep(self.timeout)
+            raise OCRTimeoutError("Backend giả lập nhận dạng quá thời gian")
+        if latency:
+            time.sleep(latency)
+    
+    def _next_text(self, image: OCRImage) -> str:
+        return self.output(image) if callable(self.output) else next(self.output)
+    
+    def _make_data(self, image: OCRImage) -> Dict[str, List]:
+        """
+        Tạo dữ liệu theo từ cho một ảnh, chia đều các từ theo chiều rộng
+        """
+        width, height = image.size if isinstance(image, Image.Image) else (image.shape[1], image.shape[0])
+        words = self._next_text(image).split()
+        step = width // max(len(words), 1)
+        
+        data = {column: [] for column in TSV_COLUMNS}
+        for i, word in enumerate(words):
+            for column, value in (('level', 5), ('page_num', 1), ('block_num', 1), ('par_num', 1),
+                                  ('line_num', 1), ('word_num', i + 1), ('left', i * step),
+                                  ('top', 0), ('width', step), ('height', height),
+                                  ('conf', self.confidence), ('text', word)):
+                data[column].append(value)
+        self.images += 1
+        return data
+    
+    def image_to_data(self, image: OCRImage) -> Dict[str, List]:
+        self.calls += 1
+        self._sleep(self.latency)
+        return self._make_data(image)
+    
+    def image_to_data_batch(self, images: Sequence[np.ndarray],
+                            separator: int = 16) -> List[Dict[str, List]]:
+        self.calls += 1
+        self._sleep(self.batch_latency)
+        return [self._make_data(image) for image in images]
+    
+    def get_languages(self) -> List[str]:
+        return self.languages if self.languages is not None else [self.language]
+    
+    def detect_script(self, image: OCRImage) -> Optional[Tuple[str, float]]:
+        return (self.script, 100.0) if self.script else None
+
+
+def create_backend(backend: str = 'auto', language: str = 'eng', psm: int = 6, oem: int = 3,
+                   variables: Optional[Dict[str, str]] = None, timeout: float = 0.0,
+                   **options) -> OCRBackend:
+    """
+    Tạo backend OCR theo tên
+    
+    Args:
+        backend: 'subprocess', 'inprocess', 'auto' (inprocess nếu đã cài tesserocr) hoặc 'fake'
+        language: Ngôn ngữ OCR
+        psm: Page Segmentation Mode
+        oem: OCR Engine Mode
+        variables: Biến cấu hình Tesseract
+        timeout: Thời gian tối đa của một lần nhận dạng (giây, 0 = không giới hạn)
+        **options: Tham số riêng của backend giả lập (output, latency, ...)
+        
+    Returns:
+        Đối tượng OCRBackend
+    """
+    if backend == 'fake':
+        return FakeOCRBackend(language, psm, oem, variables, timeout, **options)
+    if backend in ('inprocess', 'auto'):
+        try:
+            return InProcessTesseractBackend(language, psm, oem, variables, timeout)
+        except Exception as e:
+            if backend == 'inprocess':
+                print(f"Không thể khởi tạo Tesseract trong tiến trình, dùng pytesseract: {e}")
+        return SubprocessTesseractBackend(language, psm, oem, variables, timeout)
+    if backend == 'subprocess':
+        return SubprocessTesseractBackend(language, psm, oem, variables, timeout)
+    raise ValueError(f"Backend OCR không hợp lệ: {backend}")
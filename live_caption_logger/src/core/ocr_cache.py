@@ -0,0 +1,151 @@
+# Module cache kết quả OCR cho Live Caption Logger
+
+import hashlib
+import sys
+import threading
+import numpy as np
+from collections import OrderedDict
+from PIL import Image
+from typing import Dict, Optional, Union
+
+
+def estimate_result_size(result: Dict) -> int:
+    """
+    Ước lượng dung lượng bộ nhớ của một kết quả extract_text
+    
+    Args:
+        result: Kết quả OCR
+        
+    Returns:
+        Số byte ước lượng
+    """
+    size = sys.getsizeof(result) + sys.getsizeof(result.get('text', ''))
+    words = result.get('words')
+    if words is not None:
+        size += sys.getsizeof(words) + words.nbytes
+    raw_data = result.get('raw_data')
+    if isinstance(raw_data, dict):
+        for values in raw_data.values():
+            size += sys.getsizeof(values) + 28 * len(values)
+        size += sum(len(word) for word in raw_data.get('text', []))
+    return size
+
+
+class OCRResultCache:
+    """
+    Cache LRU có giới hạn cho kết quả OCR
+    
+    Khóa là hash của ảnh đã nhị phân hóa (đầu ra của preprocess_image) cùng
+    ngôn ngữ và chuỗi cấu hình Tesseract, nên cùng một dòng phụ đề xuất hiện
+    lại (trong nhiều khung hoặc sau này) không phải OCR lần nữa. Có thể dùng
+    chung giữa nhiều worker OCR.
+    """
+    
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, max_entries: int = 2048):
+        """
+        Khởi tạo cache
+        
+        Args:
+            max_bytes: Dung lượng bộ nhớ tối đa (ước lượng)
+            max_entries: Số mục tối đa
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()  # Khóa -> (kết quả, kích thước)
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(image: Union[Image.Image, np.ndarray], language: str, config: str) -> bytes:
+        """
+        Tạo khóa cache từ ảnh đã tiền xử lý
+        
+        Args:
+            image: Ảnh đã nhị phân hóa
+            language: Ngôn ngữ OCR
+            config: Chuỗi cấu hình Tesseract
+            
+        Returns:
+            Digest dạng bytes
+        """
+        pixels = np.ascontiguousarray(np.asarray(image))
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pixels.data)
+        digest.update(f"{pixels.shape}|{pixels.dtype}|{language}|{config}".encode())
+        return digest.digest()
+    
+    def get(self, key: bytes) -> Optional[Dict]:
+        """
+        Lấy kết quả trong cache
+        
+        Args:
+            key: Khóa cache
+            
+        Returns:
+            Kết quả OCR hoặc None nếu không có
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: bytes, result: Dict):
+        """
+        Lưu kết quả vào cache, loại bỏ mục ít dùng nhất khi vượt giới hạn
+        
+        Args:
+            key: Khóa cache
+            result: Kết quả OCR
+        """
+        size = estimate_result_size(result)
+        if size > self.max_bytes:
+            return
+        
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            
+            self.entries[key] = (result, size)
+            self.current_bytes += size
+            
+            while self.current_bytes > self.max_bytes or len(self.entries) > self.max_entries:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        """
+        Xóa toàn bộ cache (giữ bộ đếm)
+        """
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê cache
+        
+        Returns:
+            Dictionary chứa hit/miss/eviction và dung lượng hiện tại
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
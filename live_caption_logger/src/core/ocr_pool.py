@@ -0,0 +1,234 @@
+# Module thực thi OCR song song cho Live Caption Logger
+
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Tuple
+
+
+class OCRExecutor:
+    """
+    Lớp phân phối khung hình tới nhiều worker OCR và sắp xếp lại kết quả
+    
+    Mỗi luồng worker tạo một engine OCR riêng qua engine_factory (engine-per-
+    thread), vì Tesseract và các cache theo dòng không dùng chung được giữa
+    các luồng. OpenCV và Tesseract nhả GIL khi xử lý nên dùng luồng là đủ.
+    
+    Kết quả được trả ra theo đúng thứ tự số khung (sequence). Khung đang chờ
+    mà đã có khung mới hơn hoàn thành được coi là lỗi thời và bị bỏ. Khi mọi
+    worker đều bận, khung mới thay thế khung cũ nhất chưa bắt đầu OCR, nên
+    khung xếp hàng chờ worker rảnh luôn là khung mới nhất. Với
+    latency_budget, khung đã quá hạn mà có khung mới hơn đang chờ cũng bị bỏ
+    (luồng vẫn chạy hết lần OCR đó, thời gian bị chặn bởi timeout của Tesseract).
+    """
+    
+    def __init__(self, engine_factory: Callable[[], object], workers: int = 2,
+                 max_pending: int = 0, latency_budget: float = 0.0):
+        """
+        Khởi tạo executor
+        
+        Args:
+            engine_factory: Hàm tạo engine OCR có phương thức extract_text(image)
+            workers: Số luồng worker
+            max_pending: Số khung tối đa đang chờ OCR (0 = số worker + 1: mỗi worker một
+                khung và một khung xếp hàng)
+            latency_budget: Thời gian tối đa từ lúc chụp một khung đến khi có kết quả
+                trước khi khung bị bỏ cho khung mới hơn (giây, 0 = không giới hạn)
+        """
+        self.engine_factory = engine_factory
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers + 1
+        self.latency_budget = latency_budget
+        
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr')
+        self.local = threading.local()
+        self.engines: List[object] = []
+        self.engines_lock = threading.Lock()
+        self.engine_generation = 0  # Tăng khi đổi engine_factory
+        
+        self.pending: Dict[int, Tuple[Future, float]] = {}
+        self.last_emitted_seq = 0
+        self.frames_submitted = 0
+        self.frames_emitted = 0
+        self.frames_dropped = 0
+        self.frames_superseded = 0  # Bị khung mới thay thế trước khi OCR
+        self.frames_over_budget = 0  # Bị bỏ vì quá latency_budget
+    
+    def _get_engine(self):
+        """
+        Lấy engine OCR của luồng hiện tại, tạo mới ở lần đầu
+        """
+        engine = getattr(self.local, 'engine', None)
+        if engine is None or self.local.generation != self.engine_generation:
+            with self.engines_lock:
+                generation, factory = self.engine_generation, self.engine_factory
+            engine = factory()
+            self.local.engine = engine
+            self.local.generation = generation
+            with self.engines_lock:
+                self.engines.append(engine)
+        return engine
+    
+    def set_engine_factory(self, engine_factory: Callable[[], object]):
+        """
+        Đổi hàm tạo engine; mỗi worker tạo engine mới ở khung kế tiếp của nó
+        
+        Args:
+            engine_factory: Hàm tạo engine OCR mới
+        """
+        with self.engines_lock:
+            self.engine_factory = engine_factory
+            self.engine_generation += 1
+    
+    def _run(self, image: np.ndarray) -> Dict:
+        return self._get_engine().extract_text(image)
+    
+    def has_capacity(self) -> bool:
+        """
+        Kiểm tra còn chỗ nhận khung mới không
+        
+        Returns:
+            True nếu số khung đang chờ nhỏ hơn max_pending, hoặc có khung đang xếp
+            hàng (chưa bắt đầu OCR) mà khung mới sẽ thay thế
+        """
+        if len(self.pending) < self.max_pending:
+            return True
+        return any(not future.running() and not future.done() for future, _ in self.pending.values())
+    
+    def submit(self, seq: int, image: np.ndarray, timestamp: float) -> bool:
+        """
+        Gửi một khung tới OCR
+        
+        Args:
+            seq: Số thứ tự khung (tăng dần)
+            image: Ảnh khung hình; được sao chép vì slot của ring buffer sẽ được dùng lại
+            timestamp: Thời điểm chụp
+            
+        Returns:
+            True nếu đã nhận khung, False nếu hết chỗ hoặc khung đã lỗi thời
+        """
+        if seq <= self.last_emitted_seq:
+            return False
+        
+        # Mọi worker đều bận: khung mới thay thế khung cũ nhất còn đang xếp hàng
+        if len(self.pending) >= self.workers:
+            for old_seq in sorted(self.pending):
+                if self.pending[old_seq][0].cancel():
+                    del self.pending[old_seq]
+                    self.frames_dropped += 1
+                    self.frames_superseded += 1
+                    break
+        
+        if not self.has_capacity():
+            return False
+        
+        frame = np.array(image, copy=True)
+        self.pending[seq] = (self.pool.submit(self._run, frame), timestamp)
+        self.frames_submitted += 1
+        return True
+    
+    def wait(self, timeout: float) -> bool:
+        """
+        Chờ đến khi có ít nhất một khung OCR xong
+        
+        Args:
+            timeout: Thời gian chờ tối đa (giây)
+            
+        Returns:
+            True nếu có khung đã xong
+        """
+        if not self.pending:
+            return False
+        futures = [future for future, _ in self.pending.values()]
+        done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        return bool(done)
+    
+    def collect(self) -> List[Tuple[int, float, Dict]]:
+        """
+        Lấy các kết quả đã xong theo thứ tự khung, bỏ các khung lỗi thời
+        
+        Returns:
+            Danh sách (seq, timestamp, ocr_result) theo seq tăng dần
+        """
+        if self.latency_budget > 0:
+            self._drop_over_budget()
+        
+        done_seqs = [seq for seq, (future, _) in self.pending.items() if future.done()]
+        if not done_seqs:
+            return []
+        
+        newest_done = max(done_seqs)
+        results = []
+        
+        for seq in sorted(self.pending):
+            future, timestamp = self.pending[seq]
+            if seq > newest_done:
+                break
+            
+            del self.pending[seq]
+            if not future.done():
+                # Khung cũ hơn một khung đã xong: hủy nếu chưa chạy, bỏ kết quả nếu đang chạy
+                future.cancel()
+                self.frames_dropped += 1
+                continue
+            
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Lỗi khi xử lý OCR khung {seq}: {e}")
+                self.frames_dropped += 1
+                continue
+            
+            results.append((seq, timestamp, result))
+        
+        if results:
+            self.last_emitted_seq = results[-1][0]
+            self.frames_emitted += len(results)
+        
+        return results
+    
+    def _drop_over_budget(self):
+        """
+        Bỏ các khung đã quá latency_budget nếu có khung mới hơn đang chờ
+        """
+        now = time.time()
+        newest = max(self.pending, default=0)
+        for seq in sorted(self.pending):
+            future, timestamp = self.pending[seq]
+            if seq == newest:
+                break
+            if not future.done() and now - timestamp > self.latency_budget:
+                future.cancel()
+                del self.pending[seq]
+                self.frames_dropped += 1
+                self.frames_over_budget += 1
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê của executor
+        
+        Returns:
+            Dictionary chứa số khung đã gửi, đã trả và bị bỏ
+        """
+        return {
+            'workers': self.workers,
+            'frames_submitted': self.frames_submitted,
+            'frames_emitted': self.frames_emitted,
+            'frames_dropped': self.frames_dropped,
+            'frames_superseded': self.frames_superseded,
+            'frames_over_budget': self.frames_over_budget,
+            'pending': len(self.pending)
+        }
+    
+    def shutdown(self, wait_for_pending: bool = False):
+        """
+        Dừng executor
+        
+        Args:
+            wait_for_pending: Chờ các khung đang xử lý hoàn thành
+        """
+        for future, _ in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.pool.shutdown(wait=wait_for_pending)
@@ -1,18 +1,58 @@
 # Module xử lý OCR cho Live Caption Logger
 
-import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple, Union
 import re
 
+from .ocr_backends import OCRTimeoutError, create_backend
+from .ocr_cache import OCRResultCache
+from .preprocess import PreprocessEngine
+from .ocr_words import OCRWords
+
+# Mapping một số script phổ biến sang ngôn ngữ Tesseract
+SCRIPT_LANGUAGES = {
+    'Latin': 'eng',
+    'Han': 'chi_sim',
+    'Hiragana': 'jpn',
+    'Katakana': 'jpn',
+    'Hangul': 'kor',
+    'Cyrillic': 'rus'
+}
+
+
+def failed_result(reason: str) -> Dict:
+    """
+    Kết quả rỗng của một lần OCR thất bại
+    
+    Args:
+        reason: 'timed_out' (quá thời gian) hoặc 'error' (lỗi backend)
+    
+    Returns:
+        Kết quả rỗng cùng dạng extract_text, có khóa reason = True
+    """
+    result = OCRWords.empty().to_result()
+    result[reason] = True
+    return result
+
+
+def is_failed_result(result: Dict) -> bool:
+    """
+    Kiểm tra kết quả có phải của lần OCR thất bại không (không được lưu cache)
+    """
+    return bool(result.get('timed_out') or result.get('error'))
+
 class OCRProcessor:
     """
     Lớp chịu trách nhiệm xử lý OCR để trích xuất văn bản từ ảnh
     """
     
-    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3):
+    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3,
+                 engine: str = 'subprocess', cache: Optional[OCRResultCache] = None,
+                 cache_max_bytes: int = 8 * 1024 * 1024, debug: bool = False,
+                 glyph_recognizer=None, backend_options: Optional[Dict] = None,
+                 timeout: float = 0.0):
         """
         Khởi tạo OCR processor
         
@@ -20,18 +60,93 @@ class OCRProcessor:
             language: Ngôn ngữ OCR (eng, vie, etc.)
             psm: Page Segmentation Mode
             oem: OCR Engine Mode
+            engine: Backend OCR: 'subprocess' (pytesseract), 'inprocess' (tesserocr, nạp
+                model một lần), 'auto' (inprocess nếu đã cài tesserocr) hoặc 'fake' (giả lập)
+            cache: Cache kết quả OCR dùng chung (tùy chọn)
+            cache_max_bytes: Dung lượng cache riêng khi không truyền cache (0 để tắt)
+            debug: Giữ nguyên dữ liệu image_to_data trong 'raw_data' của kết quả
+            glyph_recognizer: GlyphRecognizer nhận dạng nhanh trước khi gọi Tesseract (tùy chọn)
+            backend_options: Tham số riêng của backend (ví dụ latency, output của 'fake')
+            timeout: Thời gian tối đa của một lần gọi Tesseract (giây, 0 = không giới hạn);
+                     quá thời gian thì khung đó trả về kết quả rỗng
         """
         self.language = language
         self.psm = psm
         self.oem = oem
-        self.config = f'--psm {psm} --oem {oem}'
+        self.dictionaries = True
+        self.config = self._make_config()
+        self.engine_mode = engine
+        self.backend_options = backend_options or {}
+        self.backend = None
+        self.timeout = timeout
+        self.timeouts = 0
+        self.debug = debug
+        
+        # Tiền xử lý dùng lại CLAHE và buffer tạm giữa các khung
+        self.preprocessor = PreprocessEngine()
+        
+        # Mẫu ký tự học từ kết quả Tesseract, có thể dùng chung giữa các worker
+        self.glyph_recognizer = glyph_recognizer
         
-        # Kiểm tra xem Tesseract có được cài đặt không
+        # Cache LRU theo hash của ảnh đã nhị phân hóa
+        if cache is None and cache_max_bytes > 0:
+            cache = OCRResultCache(max_bytes=cache_max_bytes)
+        self.cache = cache
+        
+        self._init_backend()
+    
+    def _make_config(self) -> str:
+        """
+        Tạo chuỗi cấu hình Tesseract (dùng trong khóa cache)
+        """
+        config = f'--psm {self.psm} --oem {self.oem}'
+        if not self.dictionaries:
+            config += ' -c load_system_dawg=0 -c load_freq_dawg=0'
+        return config
+    
+    def _init_backend(self):
+        """
+        Khởi tạo backend OCR theo engine_mode và cấu hình hiện tại
+        """
+        variables = {} if self.dictionaries else {'load_system_dawg': '0', 'load_freq_dawg': '0'}
+        self.backend = create_backend(self.engine_mode, self.language, self.psm, self.oem,
+                                      variables, self.timeout, **self.backend_options)
+    
+    def warm_up(self):
+        """
+        Nạp model của backend trước khung hình đầu tiên
+        """
         try:
-            pytesseract.get_tesseract_version()
+            self.backend.warm_up()
         except Exception as e:
-            print(f"Lỗi: Tesseract chưa được cài đặt hoặc không tìm thấy: {e}")
-            print("Vui lòng cài đặt Tesseract OCR")
+            print(f"Lỗi khi khởi động backend OCR: {e}")
+    
+    def apply_profile(self, profile):
+        """
+        Áp dụng một profile OCR (psm, oem, bước tiền xử lý, hệ số phóng to, từ điển)
+        
+        Backend chỉ được tạo lại (nạp lại model) khi psm, oem hoặc từ điển thay
+        đổi. GlyphRecognizer dùng chung không bị reset ở đây; nơi chốt profile
+        mới reset nó một lần.
+        
+        Args:
+            profile: Đối tượng OCRProfile
+        """
+        backend_changed = profile.backend_key != (self.psm, self.oem, self.dictionaries)
+        
+        self.psm = profile.psm
+        self.oem = profile.oem
+        self.dictionaries = profile.dictionaries
+        self.config = self._make_config()
+        self.preprocessor = PreprocessEngine(
+            use_clahe=profile.clahe,
+            use_median=profile.median,
+            scale=profile.scale
+        )
+        
+        if backend_changed:
+            self.backend.close()
+            self._init_backend()
     
     def preprocess_image(self, image: Image.Image) -> Image.Image:
         """
@@ -64,63 +179,168 @@ class OCRProcessor:
         
         return processed_image
     
-    def extract_text(self, image: Image.Image, preprocess: bool = True) -> Dict:
+    def extract_text(self, image: Union[Image.Image, np.ndarray], preprocess: bool = True) -> Dict:
         """
         Trích xuất văn bản từ ảnh
         
         Args:
-            image: Ảnh đầu vào
+            image: Ảnh đầu vào (PIL Image hoặc mảng NumPy grayscale/RGB)
             preprocess: Có tiền xử lý ảnh không
             
         Returns:
-            Dictionary chứa text và confidence
+            Dictionary chứa text, confidence, word_count, words (OCRWords)
+            và raw_data (chỉ ở chế độ debug). Khi OCR quá thời gian hoặc lỗi,
+            kết quả rỗng có thêm 'timed_out' hoặc 'error' = True
         """
         try:
             # Tiền xử lý ảnh nếu cần
             if preprocess:
-                processed_image = self.preprocess_image(image)
+                # Ảnh nhị phân nằm trong buffer của preprocessor, đưa thẳng tới OCR
+                processed_image = self.preprocessor.process(image)
             else:
                 processed_image = image
             
-            # Trích xuất văn bản với confidence
-            data = pytesseract.image_to_data(
-                processed_image, 
-                lang=self.language,
-                config=self.config,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # Lọc và ghép các từ có confidence cao
-            words = []
-            confidences = []
-            
-            for i in range(len(data['text'])):
-                word = data['text'][i].strip()
-                conf = int(data['conf'][i])
+            # Dùng lại kết quả nếu ảnh nhị phân này đã được OCR
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(processed_image, self.language, self.config)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            # Thử nhận dạng nhanh bằng mẫu ký tự, chỉ gọi Tesseract khi không chắc chắn
+            data = None
+            words = None
+            if preprocess and self.glyph_recognizer is not None:
+                words = self.glyph_recognizer.recognize(processed_image)
+            
+            if words is None:
+                # Trích xuất văn bản với confidence
+                data = self.image_to_data(processed_image)
                 
-                if word and conf > 0:  # Chỉ lấy từ có confidence > 0
-                    words.append(word)
-                    confidences.append(conf)
+                # Lọc các từ có confidence > 0 và ghép thành câu (vector hóa)
+                words = OCRWords.from_data(data)
+                if preprocess and self.glyph_recognizer is not None:
+                    self.glyph_recognizer.learn(processed_image, words)
             
-            # Ghép thành câu
-            text = ' '.join(words)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            if preprocess and self.preprocessor.scale != 1.0:
+                words = words.rescaled(1 / self.preprocessor.scale)
+            result = words.to_result(data if self.debug else None)
             
-            return {
-                'text': text,
-                'confidence': avg_confidence,
-                'word_count': len(words),
-                'raw_data': data
-            }
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
             
+            return result
+            
+        except OCRTimeoutError:
+            # Khung quá khó (nhiễu, chữ lớn) không được giữ worker quá timeout
+            self.timeouts += 1
+            return failed_result('timed_out')
         except Exception as e:
             print(f"Lỗi khi xử lý OCR: {e}")
-            return {
-                'text': '',
-                'confidence': 0,
-                'word_count': 0,
-                'raw_data': None
-            }
+            return failed_result('error')
+    
+    def extract_text_batch(self, images: List[Union[Image.Image, np.ndarray]],
+                           preprocess: bool = True, separator: int = 16) -> List[Dict]:
+        """
+        Trích xuất văn bản từ nhiều ảnh nhỏ bằng một lần gọi Tesseract
+        
+        Các ảnh (sau tiền xử lý) được đưa về chữ tối trên nền trắng rồi gửi tới
+        backend một lần. Backend Tesseract xếp chồng chúng theo chiều dọc, cách
+        nhau bởi dải nền trống, và trả từ về cho ảnh chứa tâm hộp bao của nó
+        (theo 'top'). Ảnh đã có trong cache không được OCR lại.
+        
+        Args:
+            images: Danh sách ảnh đầu vào (PIL Image hoặc mảng NumPy)
+            preprocess: Có tiền xử lý ảnh không
+            separator: Chiều cao dải nền ngăn cách giữa các ảnh (pixel)
+            
+        Returns:
+            Danh sách kết quả cùng dạng extract_text, theo thứ tự đầu vào
+        """
+        results: List[Optional[Dict]] = [None] * len(images)
+        pending = []  # (vị trí, ảnh nhị phân, khóa cache)
+        
+        try:
+            for index, image in enumerate(images):
+                processed = self.preprocessor.process(image) if preprocess else np.asarray(image)
+                
+                cache_key = None
+                if self.cache is not None:
+                    cache_key = self.cache.make_key(processed, self.language, self.config)
+                    results[index] = self.cache.get(cache_key)
+                    if results[index] is not None:
+                        continue
+                
+                # Đưa về chữ tối trên nền trắng để ghép chung một nền. Màu nền lấy
+                # theo viền ảnh (ảnh cắt sát chữ có thể có nhiều điểm chữ hơn nền).
+                # Sao chép vì buffer của preprocessor được dùng lại.
+                border = np.concatenate((processed[0], processed[-1],
+                                         processed[:, 0], processed[:, -1]))
+                if np.count_nonzero(border) * 2 < border.size:
+                    binary = cv2.bitwise_not(processed)
+                else:
+                    binary = processed.copy()
+                
+                words = None
+                if preprocess and self.glyph_recognizer is not None:
+                    words = self.glyph_recognizer.recognize(binary)
+                if words is not None:
+                    if self.preprocessor.scale != 1.0:
+                        words = words.rescaled(1 / self.preprocessor.scale)
+                    results[index] = words.to_result()
+                    if cache_key is not None:
+                        self.cache.put(cache_key, results[index])
+                    continue
+                
+                pending.append((index, binary, cache_key))
+            
+            if pending:
+                # Backend Tesseract ghép các ảnh và nhận dạng bằng một lần gọi
+                batch_data = self.backend.image_to_data_batch(
+                    [binary for _, binary, _ in pending], separator)
+                
+                for (index, binary, cache_key), data in zip(pending, batch_data):
+                    part = OCRWords.from_data(data)
+                    if preprocess and self.glyph_recognizer is not None:
+                        self.glyph_recognizer.learn(binary, part)
+                    if preprocess and self.preprocessor.scale != 1.0:
+                        part = part.rescaled(1 / self.preprocessor.scale)
+                    results[index] = part.to_result()
+                    if cache_key is not None:
+                        self.cache.put(cache_key, results[index])
+            
+            return results
+            
+        except OCRTimeoutError:
+            self.timeouts += 1
+            return [result if result is not None else failed_result('timed_out')
+                    for result in results]
+        except Exception as e:
+            print(f"Lỗi khi xử lý OCR theo lô: {e}")
+            return [result if result is not None else failed_result('error')
+                    for result in results]
+    
+    def image_to_data(self, image: Union[Image.Image, np.ndarray]) -> Dict:
+        """
+        Chạy Tesseract và lấy dữ liệu theo từ (text, conf, vị trí)
+        
+        Args:
+            image: Ảnh đã tiền xử lý (PIL Image hoặc mảng NumPy)
+            
+        Returns:
+            Dictionary giống pytesseract.Output.DICT
+        """
+        return self.backend.image_to_data(image)
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        Lấy thống kê cache kết quả OCR
+        
+        Returns:
+            Dictionary chứa hit/miss/eviction, rỗng nếu cache bị tắt
+        """
+        return self.cache.get_stats() if self.cache is not None else {}
     
     def extract_text_simple(self, image: Image.Image) -> str:
         """
@@ -134,16 +354,29 @@ class OCRProcessor:
         """
         try:
             processed_image = self.preprocess_image(image)
-            text = pytesseract.image_to_string(
-                processed_image,
-                lang=self.language,
-                config=self.config
-            )
-            return text.strip()
+            return self.backend.image_to_string(processed_image).strip()
         except Exception as e:
             print(f"Lỗi khi xử lý OCR đơn giản: {e}")
             return ""
     
+    def detect_script(self, image: Union[Image.Image, np.ndarray]) -> Optional[Tuple[str, float]]:
+        """
+        Phát hiện hệ chữ (script) trong ảnh bằng OSD của Tesseract
+        
+        Args:
+            image: Ảnh đầu vào
+            
+        Returns:
+            Tuple (script, độ tin cậy) hoặc None nếu không xác định được
+        """
+        try:
+            processed_image = self.preprocessor.process(image)
+            return self.backend.detect_script(processed_image)
+            
+        except Exception as e:
+            print(f"Lỗi khi phát hiện hệ chữ: {e}")
+            return None
+    
     def detect_language(self, image: Image.Image) -> str:
         """
         Phát hiện ngôn ngữ trong ảnh
@@ -154,28 +387,10 @@ class OCRProcessor:
         Returns:
             Mã ngôn ngữ được phát hiện
         """
-        try:
-            processed_image = self.preprocess_image(image)
-            languages = pytesseract.image_to_osd(processed_image)
-            
-            # Parse kết quả để lấy ngôn ngữ
-            for line in languages.split('\n'):
-                if 'Script:' in line:
-                    script = line.split(':')[1].strip()
-                    # Mapping một số script phổ biến
-                    script_mapping = {
-                        'Latin': 'eng',
-                        'Han': 'chi_sim',
-                        'Hiragana': 'jpn',
-                        'Katakana': 'jpn'
-                    }
-                    return script_mapping.get(script, 'eng')
-            
+        detected = self.detect_script(image)
+        if detected is None:
             return 'eng'  # Mặc định là tiếng Anh
-            
-        except Exception as e:
-            print(f"Lỗi khi phát hiện ngôn ngữ: {e}")
-            return 'eng'
+        return SCRIPT_LANGUAGES.get(detected[0], 'eng')
     
     def set_language(self, language: str):
         """
@@ -185,6 +400,7 @@ class OCRProcessor:
             language: Mã ngôn ngữ (eng, vie, chi_sim, etc.)
         """
         self.language = language
+        self.backend.set_language(language)
     
     def get_available_languages(self) -> List[str]:
         """
@@ -194,8 +410,7 @@ class OCRProcessor:
             Danh sách mã ngôn ngữ
         """
         try:
-            languages = pytesseract.get_languages()
-            return languages
+            return self.backend.get_languages()
         except Exception as e:
             print(f"Lỗi khi lấy danh sách ngôn ngữ: {e}")
             return ['eng']
@@ -0,0 +1,161 @@
+# Module lưu trữ gọn kết quả OCR theo từ cho Live Caption Logger
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Độ tin cậy và hộp bao của mỗi từ, lưu liền nhau trong một mảng có cấu trúc
+WORD_DTYPE = np.dtype([
+    ('conf', np.float32),
+    ('left', np.int32),
+    ('top', np.int32),
+    ('width', np.int32),
+    ('height', np.int32)
+])
+
+
+class OCRWords:
+    """
+    Danh sách từ OCR dạng mảng thay cho dict các list của image_to_data
+    
+    Chỉ giữ các từ hợp lệ (khác rỗng, confidence > 0): văn bản trong một
+    tuple, confidence và hộp bao trong một mảng NumPy có cấu trúc. Việc lọc
+    và tính confidence trung bình được vector hóa.
+    """
+    
+    __slots__ = ('words', 'boxes')
+    
+    def __init__(self, words: Tuple[str, ...], boxes: np.ndarray):
+        """
+        Khởi tạo danh sách từ
+        
+        Args:
+            words: Văn bản của từng từ
+            boxes: Mảng WORD_DTYPE cùng độ dài với words
+        """
+        self.words = words
+        self.boxes = boxes
+    
+    @classmethod
+    def empty(cls) -> 'OCRWords':
+        """
+        Tạo danh sách từ rỗng
+        """
+        return cls((), np.empty(0, dtype=WORD_DTYPE))
+    
+    @classmethod
+    def from_data(cls, data: Dict[str, List]) -> 'OCRWords':
+        """
+        Lọc dữ liệu image_to_data, chỉ giữ các từ có nội dung và confidence > 0
+        
+        Args:
+            data: Dictionary giống pytesseract.Output.DICT
+            
+        Returns:
+            Đối tượng OCRWords
+        """
+        if not data['text']:
+            return cls.empty()
+        
+        texts = np.char.strip(np.asarray(data['text'], dtype=str))
+        conf = np.asarray(data['conf'], dtype=np.float32)
+        mask = (texts != '') & (conf > 0)
+        
+        boxes = np.empty(int(np.count_nonzero(mask)), dtype=WORD_DTYPE)
+        boxes['conf'] = conf[mask]
+        for column in ('left', 'top', 'width', 'height'):
+            boxes[column] = np.asarray(data[column])[mask]
+        
+        return cls(tuple(texts[mask].tolist()), boxes)
+    
+    @classmethod
+    def concatenate(cls, parts: Sequence['OCRWords']) -> 'OCRWords':
+        """
+        Nối nhiều danh sách từ theo thứ tự
+        
+        Args:
+            parts: Các danh sách từ
+            
+        Returns:
+            Đối tượng OCRWords
+        """
+        if not parts:
+            return cls.empty()
+        words = tuple(word for part in parts for word in part.words)
+        return cls(words, np.concatenate([part.boxes for part in parts]))
+    
+    def __len__(self) -> int:
+        return len(self.words)
+    
+    @property
+    def text(self) -> str:
+        return ' '.join(self.words)
+    
+    @property
+    def mean_confidence(self) -> float:
+        return float(self.boxes['conf'].mean()) if len(self.words) else 0
+    
+    @property
+    def nbytes(self) -> int:
+        return self.boxes.nbytes + sum(len(word) for word in self.words)
+    
+    def select(self, mask: np.ndarray) -> 'OCRWords':
+        """
+        Lấy các từ theo mặt nạ boolean
+        
+        Args:
+            mask: Mảng boolean cùng độ dài
+            
+        Returns:
+            Đối tượng OCRWords mới
+        """
+        indices = np.flatnonzero(mask)
+        return OCRWords(tuple(self.words[i] for i in indices), self.boxes[indices])
+    
+    def shifted(self, dy: int, dx: int = 0) -> 'OCRWords':
+        """
+        Dịch hộp bao (ví dụ từ tọa độ dòng sang tọa độ vùng chụp)
+        
+        Args:
+            dy: Số pixel dịch xuống
+            dx: Số pixel dịch sang phải
+            
+        Returns:
+            Đối tượng OCRWords mới
+        """
+        boxes = self.boxes.copy()
+        boxes['top'] += dy
+        boxes['left'] += dx
+        return OCRWords(self.words, boxes)
+    
+    def rescaled(self, factor: float) -> 'OCRWords':
+        """
+        Nhân tọa độ hộp bao với một hệ số (ví dụ đổi về kích thước ảnh trước khi phóng to)
+        
+        Args:
+            factor: Hệ số nhân
+            
+        Returns:
+            Đối tượng OCRWords mới
+        """
+        boxes = self.boxes.copy()
+        for column in ('left', 'top', 'width', 'height'):
+            boxes[column] = np.rint(boxes[column] * factor)
+        return OCRWords(self.words, boxes)
+    
+    def to_result(self, raw_data: Optional[Dict] = None) -> Dict:
+        """
+        Tạo kết quả cùng dạng OCRProcessor.extract_text
+        
+        Args:
+            raw_data: Dữ liệu image_to_data gốc (chỉ giữ ở chế độ debug)
+            
+        Returns:
+            Dictionary chứa text, confidence, word_count, raw_data và words
+        """
+        return {
+            'text': self.text,
+            'confidence': self.mean_confidence,
+            'word_count': len(self.words),
+            'raw_data': raw_data,
+            'words': self
+        }
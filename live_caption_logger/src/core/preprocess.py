@@ -0,0 +1,147 @@
+# Module tiền xử lý ảnh cho OCR của Live Caption Logger
+
+import cv2
+import numpy as np
+from typing import Dict, Tuple
+
+from .frame_diff import Frame
+
+
+class PreprocessEngine:
+    """
+    Lớp tiền xử lý ảnh trước khi OCR, không cấp phát bộ nhớ ở mỗi khung
+    
+    Thực hiện cùng chuỗi bước với OCRProcessor.preprocess_image (grayscale,
+    CLAHE, median blur, Otsu) nhưng dùng lại một đối tượng CLAHE và ghi kết
+    quả vào các buffer tạm cấp phát sẵn. Nhận mảng NumPy (grayscale hoặc
+    RGB/RGBA) và trả về mảng NumPy, không chuyển qua lại PIL. CLAHE, median
+    blur và việc phóng to có thể bật/tắt theo profile OCR.
+    
+    Buffer chỉ được cấp phát lại khi số điểm ảnh vượt dung lượng hiện có,
+    nên các dải dòng có chiều cao khác nhau dùng chung một vùng nhớ. Ảnh trả
+    về là view của buffer nội bộ: chỉ hợp lệ đến lần gọi process tiếp theo.
+    """
+    
+    def __init__(self, clip_limit: float = 2.0, tile_grid_size: Tuple[int, int] = (8, 8),
+                 median_ksize: int = 3, use_clahe: bool = True, use_median: bool = True,
+                 scale: float = 1.0):
+        """
+        Khởi tạo engine tiền xử lý
+        
+        Args:
+            clip_limit: Ngưỡng cắt của CLAHE
+            tile_grid_size: Kích thước lưới của CLAHE
+            median_ksize: Kích thước nhân median blur
+            use_clahe: Có tăng độ tương phản bằng CLAHE không
+            use_median: Có khử nhiễu bằng median blur không
+            scale: Hệ số phóng to ảnh trước khi OCR (1.0 = giữ nguyên)
+        """
+        self.use_clahe = use_clahe
+        self.use_median = use_median
+        self.scale = scale
+        self.clip_limit = clip_limit
+        self.tile_grid_size = tile_grid_size
+        self.median_ksize = median_ksize
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        
+        # Buffer phẳng, được cắt và reshape theo kích thước từng ảnh
+        self.capacity = 0
+        self._gray = None
+        self._scaled = None
+        self._enhanced = None
+        self._denoised = None
+        self._binary = None
+        
+        self.frames_processed = 0
+        self.reallocations = 0
+    
+    def _reserve(self, size: int):
+        """
+        Đảm bảo các buffer tạm đủ chứa size điểm ảnh
+        """
+        if size <= self.capacity:
+            return
+        self.capacity = size
+        self._gray = np.empty(size, dtype=np.uint8)
+        self._scaled = np.empty(size, dtype=np.uint8)
+        self._enhanced = np.empty(size, dtype=np.uint8)
+        self._denoised = np.empty(size, dtype=np.uint8)
+        self._binary = np.empty(size, dtype=np.uint8)
+        self.reallocations += 1
+    
+    @staticmethod
+    def _view(buffer: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        return buffer[:shape[0] * shape[1]].reshape(shape)
+    
+    def process(self, image: Frame) -> np.ndarray:
+        """
+        Tiền xử lý ảnh thành ảnh nhị phân cho OCR
+        
+        Args:
+            image: Ảnh đầu vào (mảng NumPy grayscale/RGB/RGBA hoặc PIL Image)
+            
+        Returns:
+            Ảnh nhị phân uint8 (view của buffer nội bộ)
+        """
+        array = np.asarray(image)
+        shape = array.shape[:2]
+        out_shape = self.output_shape(shape)
+        self._reserve(max(shape[0] * shape[1], out_shape[0] * out_shape[1]))
+        
+        if array.ndim == 2:
+            current = array
+        else:
+            current = self._view(self._gray, shape)
+            code = cv2.COLOR_RGBA2GRAY if array.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+            cv2.cvtColor(array, code, dst=current)
+        
+        if out_shape != shape:
+            scaled = self._view(self._scaled, out_shape)
+            cv2.resize(current, (out_shape[1], out_shape[0]), dst=scaled,
+                       interpolation=cv2.INTER_CUBIC)
+            current = scaled
+        
+        # Tăng độ tương phản
+        if self.use_clahe:
+            enhanced = self._view(self._enhanced, out_shape)
+            self.clahe.apply(current, dst=enhanced)
+            current = enhanced
+        
+        # Khử nhiễu
+        if self.use_median:
+            denoised = self._view(self._denoised, out_shape)
+            cv2.medianBlur(current, self.median_ksize, dst=denoised)
+            current = denoised
+        
+        binary = self._view(self._binary, out_shape)
+        cv2.threshold(current, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=binary)
+        
+        self.frames_processed += 1
+        return binary
+    
+    def output_shape(self, shape: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        Tính kích thước ảnh sau khi phóng to
+        
+        Args:
+            shape: Kích thước đầu vào (height, width)
+            
+        Returns:
+            Kích thước đầu ra (height, width)
+        """
+        if self.scale == 1.0:
+            return tuple(shape)
+        return (max(1, int(round(shape[0] * self.scale))), max(1, int(round(shape[1] * self.scale))))
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê tiền xử lý
+        
+        Returns:
+            Dictionary chứa số ảnh đã xử lý, số lần cấp phát lại và dung lượng buffer
+        """
+        return {
+            'frames_processed': self.frames_processed,
+            'reallocations': self.reallocations,
+            'buffer_bytes': self.capacity * 5
+        }
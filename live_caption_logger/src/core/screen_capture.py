@@ -5,20 +5,42 @@ import cv2
 import numpy as np
 from PIL import Image, ImageGrab
 import time
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import threading
-import queue
+
+from .grabbers import ScreenGrabber, create_grabber
+from .capture_scheduler import AdaptiveCaptureScheduler
+from .frame_diff import FrameChangeDetector
+from .frame_buffer import FrameRingBuffer
 
 class ScreenCapture:
     """
     Lớp chịu trách nhiệm chụp màn hình và quản lý vùng chụp
     """
     
-    def __init__(self):
+    def __init__(self, backend: str = 'auto', buffer_slots: int = 3, grayscale: bool = False,
+                 change_detector: Optional[FrameChangeDetector] = None):
+        """
+        Khởi tạo screen capture
+        
+        Args:
+            backend: Backend chụp màn hình liên tục ('auto', 'mss', 'pil')
+            buffer_slots: Số slot khung hình cấp phát sẵn trong ring buffer
+            grayscale: Chụp liên tục ra ảnh grayscale thay vì RGB
+            change_detector: Bộ phát hiện thay đổi chạy một lần cho mỗi khung chụp;
+                             kết quả dùng cho cả scheduler và quyết định OCR
+        """
         self.capture_region = None  # (x, y, width, height)
         self.is_capturing = False
         self.capture_thread = None
-        self.image_queue = queue.Queue(maxsize=10)
+        self.stop_event = threading.Event()
+        self.scheduler: Optional[AdaptiveCaptureScheduler] = None
+        self.change_detector = change_detector or FrameChangeDetector()
+        self.grabber: ScreenGrabber = create_grabber(backend, grayscale)
+        
+        # Ring buffer khung hình cấp phát sẵn, luồng xử lý luôn lấy khung mới nhất
+        self.frame_buffer = FrameRingBuffer(capacity=buffer_slots)
+        self.frame_shape: Optional[Tuple[int, ...]] = None  # Kích thước thực tế học từ lần chụp đầu
         
         # Tắt fail-safe của pyautogui để tránh lỗi khi chạy trong môi trường headless
         pyautogui.FAILSAFE = False
@@ -32,6 +54,7 @@ class ScreenCapture:
             width, height: Kích thước vùng chụp
         """
         self.capture_region = (x, y, width, height)
+        self.frame_shape = None
     
     def auto_detect_live_caption_region(self) -> Optional[Tuple[int, int, int, int]]:
         """
@@ -85,20 +108,63 @@ class ScreenCapture:
             print(f"Lỗi khi chụp màn hình: {e}")
             return None
     
-    def start_continuous_capture(self, interval: float = 1.0):
+    def capture_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Chụp một khung hình bằng backend liên tục
+        
+        Args:
+            out: Mảng đích để ghi ảnh vào (tùy chọn)
+            
+        Returns:
+            Mảng NumPy RGB (hoặc grayscale) nếu thành công, None nếu thất bại
+        """
+        try:
+            return self.grabber.grab(out)
+        except Exception as e:
+            print(f"Lỗi khi chụp màn hình: {e}")
+            return None
+    
+    def _grab_into_buffer(self) -> Optional[np.ndarray]:
+        """
+        Chụp một khung hình thẳng vào slot kế tiếp của ring buffer
+        
+        Kích thước khung được học từ lần chụp đầu (có thể khác vùng chụp khi màn
+        hình HiDPI hoặc chụp toàn màn hình), nên ring buffer chỉ được cấp phát
+        cho kích thước thực tế.
+        """
+        shape = self.frame_shape
+        slot = self.frame_buffer.acquire_slot(shape) if shape else None
+        frame = self.capture_frame(slot)
+        
+        if frame is not None and frame is not slot:
+            # Lần chụp đầu hoặc kích thước thay đổi: ghi nhớ kích thước thực tế
+            self.frame_shape = frame.shape
+            slot = self.frame_buffer.acquire_slot(frame.shape)
+            np.copyto(slot, frame)
+            frame = slot
+        
+        return frame
+    
+    def start_continuous_capture(self, interval: float = 1.0,
+                                 scheduler: Optional[AdaptiveCaptureScheduler] = None):
         """
         Bắt đầu chụp màn hình liên tục
         
         Args:
-            interval: Khoảng thời gian giữa các lần chụp (giây)
+            interval: Khoảng thời gian giữa các lần chụp (giây), dùng khi không có scheduler
+            scheduler: Scheduler điều chỉnh tần suất theo hoạt động của phụ đề (tùy chọn)
         """
         if self.is_capturing:
             return
         
+        self.scheduler = scheduler or AdaptiveCaptureScheduler.fixed(interval)
+        self.frame_shape = None
+        self.change_detector.reset()
+        self.frame_buffer.clear()
+        self.stop_event.clear()
         self.is_capturing = True
         self.capture_thread = threading.Thread(
             target=self._capture_loop, 
-            args=(interval,),
             daemon=True
         )
         self.capture_thread.start()
@@ -108,40 +174,73 @@ class ScreenCapture:
         Dừng chụp màn hình liên tục
         """
         self.is_capturing = False
+        self.stop_event.set()
         if self.capture_thread:
             self.capture_thread.join(timeout=2.0)
     
-    def _capture_loop(self, interval: float):
+    def _capture_loop(self):
         """
         Vòng lặp chụp màn hình liên tục
         """
-        while self.is_capturing:
-            screenshot = self.capture_screenshot()
-            if screenshot:
-                try:
-                    # Thêm ảnh vào queue, bỏ qua nếu queue đầy
-                    self.image_queue.put_nowait((screenshot, time.time()))
-                except queue.Full:
-                    # Bỏ ảnh cũ nhất nếu queue đầy
-                    try:
-                        self.image_queue.get_nowait()
-                        self.image_queue.put_nowait((screenshot, time.time()))
-                    except queue.Empty:
-                        pass
+        # Mở backend trong luồng chụp và giữ kết nối màn hình cho cả phiên
+        self.grabber.open(self.capture_region)
+        self.scheduler.start()
+        
+        try:
+            while self.is_capturing:
+                screenshot = self._grab_into_buffer()
+                if screenshot is not None:
+                    # Phát hiện thay đổi một lần: tăng tần suất khi phụ đề thay đổi,
+                    # giảm dần khi im lặng; cờ được lưu cùng khung cho luồng xử lý
+                    changed = self.change_detector.should_process(screenshot)
+                    self.scheduler.update(changed)
+                    self.frame_buffer.commit(time.time(), changed)
+                
+                # Chờ đến deadline kế tiếp; dừng ngay khi stop_event được đặt
+                self.stop_event.wait(self.scheduler.next_delay())
+        finally:
+            self.grabber.close()
+    
+    def get_latest_frame(self, timeout: float = 0.0,
+                         changed_only: bool = False) -> Optional[Tuple[np.ndarray, int, float]]:
+        """
+        Lấy khung hình mới nhất chưa được xử lý kèm số thứ tự
+        
+        Args:
+            timeout: Thời gian tối đa chờ khung mới (giây)
+            changed_only: Chỉ trả khung đã thay đổi so với khung thay đổi gần nhất
             
-            time.sleep(interval)
+        Returns:
+            Tuple (image, sequence, timestamp) nếu có, None nếu không.
+            Ảnh là slot NumPy RGB của ring buffer, hợp lệ đến lần lấy tiếp theo
+        """
+        return self.frame_buffer.get_latest(timeout, changed_only)
     
-    def get_latest_screenshot(self) -> Optional[Tuple[Image.Image, float]]:
+    def get_latest_screenshot(self, timeout: float = 0.0) -> Optional[Tuple[np.ndarray, float]]:
         """
         Lấy ảnh chụp màn hình mới nhất
         
+        Args:
+            timeout: Thời gian tối đa chờ khung mới (giây)
+            
         Returns:
-            Tuple (image, timestamp) nếu có, None nếu không
+            Tuple (image, timestamp) nếu có, None nếu không.
+            Ảnh là slot NumPy RGB của ring buffer, hợp lệ đến lần lấy tiếp theo
         """
-        try:
-            return self.image_queue.get_nowait()
-        except queue.Empty:
+        latest = self.get_latest_frame(timeout)
+        if latest is None:
             return None
+        image, _, timestamp = latest
+        return image, timestamp
+    
+    def get_buffer_stats(self) -> Dict:
+        """
+        Lấy thống kê ring buffer (số khung bị ghi đè, bộ nhớ)
+        
+        Returns:
+            Dictionary thống kê
+        """
+        return self.frame_buffer.get_stats()
     
     def get_screen_size(self) -> Tuple[int, int]:
         """
@@ -0,0 +1,116 @@
+# Module phát hiện cuộn phụ đề cho Live Caption Logger
+
+import cv2
+import numpy as np
+from typing import Dict, Optional
+
+
+class ScrollDetector:
+    """
+    Lớp phát hiện vùng phụ đề bị cuộn lên giữa hai khung hình liên tiếp
+    
+    Dùng phase correlation trên ảnh grayscale để ước lượng độ dịch theo
+    chiều dọc. Chỉ chấp nhận dịch chuyển thuần dọc, hướng lên (phụ đề cuộn
+    khi có dòng mới) và có độ tin cậy đủ cao.
+    """
+    
+    def __init__(self, enabled: bool = True, min_response: float = 0.2,
+                 max_shift_ratio: float = 0.8, max_horizontal_shift: float = 1.0):
+        """
+        Khởi tạo bộ phát hiện cuộn
+        
+        Args:
+            enabled: Bật/tắt phát hiện cuộn
+            min_response: Độ tin cậy tối thiểu của phase correlation (0-1)
+            max_shift_ratio: Độ dịch tối đa so với chiều cao vùng chụp
+            max_horizontal_shift: Độ dịch ngang tối đa cho phép (pixel)
+        """
+        self.enabled = enabled
+        self.min_response = min_response
+        self.max_shift_ratio = max_shift_ratio
+        self.max_horizontal_shift = max_horizontal_shift
+        
+        self.scrolls_detected = 0
+        self.checks = 0
+        
+        self._prev_float = None
+        self._curr_float = None
+    
+    def _as_float(self, gray: np.ndarray, buffer: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Chuyển ảnh sang float32 vào buffer dùng lại
+        """
+        if buffer is None or buffer.shape != gray.shape:
+            buffer = np.empty(gray.shape, dtype=np.float32)
+        np.copyto(buffer, gray, casting='unsafe')
+        return buffer
+    
+    def detect(self, prev_gray: np.ndarray, gray: np.ndarray) -> Optional[int]:
+        """
+        Ước lượng số pixel mà nội dung đã cuộn lên
+        
+        Args:
+            prev_gray: Khung grayscale trước
+            gray: Khung grayscale hiện tại (cùng kích thước)
+            
+        Returns:
+            Số pixel cuộn lên (> 0), hoặc None nếu không phát hiện cuộn
+        """
+        if not self.enabled or prev_gray.shape != gray.shape:
+            return None
+        
+        self.checks += 1
+        self._prev_float = self._as_float(prev_gray, self._prev_float)
+        self._curr_float = self._as_float(gray, self._curr_float)
+        
+        (dx, dy), response = cv2.phaseCorrelate(self._prev_float, self._curr_float)
+        shift = int(round(-dy))
+        
+        if response < self.min_response or abs(dx) > self.max_horizontal_shift:
+            return None
+        if shift <= 0 or shift > gray.shape[0] * self.max_shift_ratio:
+            return None
+        
+        self.scrolls_detected += 1
+        return shift
+    
+    @staticmethod
+    def region_matches(prev_gray: np.ndarray, gray: np.ndarray, top: int, bottom: int,
+                       shift: int, tolerance: float = 2.0) -> bool:
+        """
+        Kiểm tra dải [top, bottom) của khung hiện tại có khớp với khung trước dịch lên shift pixel
+        
+        Args:
+            prev_gray: Khung grayscale trước
+            gray: Khung grayscale hiện tại
+            top, bottom: Giới hạn dải trong khung hiện tại
+            shift: Số pixel cuộn lên
+            tolerance: Chênh lệch mức xám trung bình tối đa
+            
+        Returns:
+            True nếu dải chỉ đơn thuần bị dịch chuyển
+        """
+        if bottom + shift > prev_gray.shape[0]:
+            return False
+        current = gray[top:bottom]
+        previous = prev_gray[top + shift:bottom + shift]
+        return float(cv2.absdiff(current, previous).mean()) <= tolerance
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê phát hiện cuộn
+        
+        Returns:
+            Dictionary chứa số lần kiểm tra và số lần phát hiện cuộn
+        """
+        return {
+            'scroll_checks': self.checks,
+            'scrolls_detected': self.scrolls_detected
+        }
+    
+    def reset(self):
+        """
+        Reset bộ đếm
+        """
+        self.scrolls_detected = 0
+        self.checks = 0
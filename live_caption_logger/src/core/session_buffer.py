@@ -0,0 +1,99 @@
+# Module bộ đệm văn bản phiên cho Live Caption Logger
+
+from typing import Dict, List, Optional
+
+
+class SessionTextBuffer:
+    """
+    Lớp lưu văn bản của phiên dưới dạng danh sách đoạn
+    
+    Mỗi đoạn là một lần ghi văn bản mới; các đoạn được nối bằng một khoảng
+    trắng khi cần cả văn bản. Số từ và số ký tự được cộng dồn khi thêm hoặc
+    thay đoạn nên thêm đoạn, thay đoạn cuối và đọc thống kê đều O(1) thay vì
+    nối chuỗi và tách lại cả văn bản ở mỗi khung. Văn bản đầy đủ chỉ được
+    ghép khi đọc `text` và được giữ lại tới lần thay đổi tiếp theo.
+    """
+    
+    def __init__(self):
+        """
+        Khởi tạo bộ đệm rỗng
+        """
+        self.segments: List[str] = []
+        self.segment_words: List[int] = []
+        self.word_count = 0
+        self.segment_chars = 0  # Tổng độ dài các đoạn, chưa tính khoảng trắng nối
+        self._text: Optional[str] = ''
+    
+    def __len__(self) -> int:
+        return len(self.segments)
+    
+    @property
+    def char_count(self) -> int:
+        """
+        Số ký tự của văn bản đầy đủ (kể cả khoảng trắng nối giữa các đoạn)
+        """
+        return self.segment_chars + max(len(self.segments) - 1, 0)
+    
+    @property
+    def text(self) -> str:
+        """
+        Văn bản đầy đủ của phiên
+        """
+        if self._text is None:
+            self._text = ' '.join(self.segments)
+        return self._text
+    
+    def append(self, segment: str):
+        """
+        Thêm một đoạn vào cuối văn bản
+        
+        Args:
+            segment: Đoạn văn bản (đã làm sạch, không có khoảng trắng ở hai đầu)
+        """
+        words = len(segment.split())
+        self.segments.append(segment)
+        self.segment_words.append(words)
+        self.word_count += words
+        self.segment_chars += len(segment)
+        self._text = None
+    
+    def replace_last(self, segment: str):
+        """
+        Thay đoạn cuối bằng đoạn mới (cập nhật tăng dần của cùng một câu)
+        
+        Args:
+            segment: Đoạn văn bản mới
+        """
+        if not self.segments:
+            self.append(segment)
+            return
+        
+        words = len(segment.split())
+        self.word_count += words - self.segment_words[-1]
+        self.segment_chars += len(segment) - len(self.segments[-1])
+        self.segments[-1] = segment
+        self.segment_words[-1] = words
+        self._text = None
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê văn bản
+        
+        Returns:
+            Dictionary chứa số đoạn, số từ và số ký tự
+        """
+        return {
+            'segment_count': len(self.segments),
+            'word_count': self.word_count,
+            'character_count': self.char_count
+        }
+    
+    def clear(self):
+        """
+        Xóa toàn bộ văn bản
+        """
+        self.segments = []
+        self.segment_words = []
+        self.word_count = 0
+        self.segment_chars = 0
+        self._text = ''
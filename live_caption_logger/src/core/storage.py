@@ -53,11 +53,17 @@ class StorageManager:
                     timestamp TIMESTAMP NOT NULL,
                     confidence REAL,
                     is_incremental BOOLEAN DEFAULT FALSE,
+                    status TEXT DEFAULT 'final',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (session_id) REFERENCES sessions (id)
                 )
             ''')
             
+            # Cơ sở dữ liệu cũ chưa có cột status: mọi mục cũ coi như đã chốt
+            cursor.execute('PRAGMA table_info(transcripts)')
+            if 'status' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE transcripts ADD COLUMN status TEXT DEFAULT 'final'")
+            
             # Bảng exports - lưu thông tin các lần xuất file
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS exports (
@@ -98,12 +104,13 @@ class StorageManager:
             
             return session_id
     
-    def end_session(self, session_id: int):
+    def end_session(self, session_id: int, metadata: Dict = None):
         """
         Kết thúc phiên ghi chép
         
         Args:
             session_id: ID của phiên
+            metadata: Thông tin bổ sung lúc kết thúc (gộp vào metadata của phiên)
         """
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
@@ -114,6 +121,14 @@ class StorageManager:
                 WHERE id = ?
             ''', (datetime.now(), session_id))
             
+            if metadata:
+                cursor.execute('SELECT metadata FROM sessions WHERE id = ?', (session_id,))
+                row = cursor.fetchone()
+                merged = json.loads(row[0]) if row and row[0] else {}
+                merged.update(metadata)
+                cursor.execute('UPDATE sessions SET metadata = ? WHERE id = ?',
+                               (json.dumps(merged), session_id))
+            
             conn.commit()
     
     def save_transcript_entry(self, session_id: int, text_data: Dict):
@@ -129,26 +144,28 @@ class StorageManager:
             
             cursor.execute('''
                 INSERT INTO transcripts 
-                (session_id, text_id, content, timestamp, confidence, is_incremental)
-                VALUES (?, ?, ?, ?, ?, ?)
+                (session_id, text_id, content, timestamp, confidence, is_incremental, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
                 session_id,
                 text_data['id'],
                 text_data['text'],
                 text_data['timestamp'],
                 text_data['confidence'],
-                text_data['is_incremental']
+                text_data['is_incremental'],
+                text_data.get('status', 'final')
             ))
             
             conn.commit()
     
-    def get_session_transcript(self, session_id: int) -> List[Dict]:
+    def get_session_transcript(self, session_id: int, include_partials: bool = False) -> List[Dict]:
         """
         Lấy transcript của một phiên
         
         Args:
             session_id: ID của phiên
-            
+            include_partials: Lấy cả các bản cập nhật tạm (nếu đã lưu với keep_partials)
+        
         Returns:
             Danh sách các mục transcript
         """
@@ -156,11 +173,11 @@ class StorageManager:
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT text_id, content, timestamp, confidence, is_incremental
+                SELECT text_id, content, timestamp, confidence, is_incremental, status
                 FROM transcripts
-                WHERE session_id = ?
+                WHERE session_id = ? AND (? OR status IS NULL OR status != 'partial')
                 ORDER BY timestamp
-            ''', (session_id,))
+            ''', (session_id, include_partials))
             
             rows = cursor.fetchall()
             
@@ -170,7 +187,8 @@ class StorageManager:
                     'content': row[1],
                     'timestamp': datetime.fromisoformat(row[2]),
                     'confidence': row[3],
-                    'is_incremental': bool(row[4])
+                    'is_incremental': bool(row[4]),
+                    'status': row[5] or 'final'
                 }
                 for row in rows
             ]
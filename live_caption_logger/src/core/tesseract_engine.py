@@ -0,0 +1,153 @@
+# Module Tesseract chạy trong tiến trình cho Live Caption Logger
+
+import threading
+import numpy as np
+from PIL import Image
+from typing import Dict, List, Optional, Union
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr là phụ thuộc tùy chọn
+    tesserocr = None
+
+# Các cột của image_to_data theo đúng thứ tự TSV của Tesseract
+TSV_COLUMNS = [
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text'
+]
+
+
+def parse_tsv(tsv: str) -> Dict[str, List]:
+    """
+    Chuyển đầu ra TSV của Tesseract sang dict giống pytesseract.Output.DICT
+    
+    Args:
+        tsv: Chuỗi TSV (có hoặc không có dòng tiêu đề)
+        
+    Returns:
+        Dictionary các cột, mỗi cột là một list
+    """
+    data = {column: [] for column in TSV_COLUMNS}
+    for line in tsv.splitlines():
+        fields = line.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue
+        if len(fields) == len(TSV_COLUMNS) - 1:
+            fields.append('')
+        
+        # pytesseract chuyển các cột số (kể cả conf) về int
+        for column, value in zip(TSV_COLUMNS[:-1], fields[:-1]):
+            data[column].append(int(float(value)))
+        data['text'].append(fields[-1])
+    
+    return data
+
+
+class InProcessTesseract:
+    """
+    Engine Tesseract nạp một lần trong tiến trình qua C API (tesserocr)
+    
+    Tránh việc fork tiến trình tesseract, nạp lại traineddata và ghi ảnh ra
+    file tạm ở mỗi khung hình như pytesseract. Một engine không an toàn khi
+    dùng song song nên mọi lời gọi được bảo vệ bằng lock.
+    """
+    
+    def __init__(self, language: str = 'eng', psm: int = 6, oem: int = 3,
+                 variables: Optional[Dict[str, str]] = None):
+        """
+        Khởi tạo và nạp engine
+        
+        Args:
+            language: Ngôn ngữ OCR
+            psm: Page Segmentation Mode
+            oem: OCR Engine Mode
+            variables: Biến cấu hình Tesseract chỉ đặt được khi khởi tạo (ví dụ load_system_dawg)
+        """
+        if tesserocr is None:
+            raise ImportError("Chưa cài đặt tesserocr (pip install tesserocr)")
+        
+        self.language = language
+        self.psm = psm
+        self.oem = oem
+        self.variables = variables or {}
+        self.lock = threading.Lock()
+        self.api = tesserocr.PyTessBaseAPI(init=False)
+        self.api.Init(lang=language, oem=oem, variables=self.variables)
+        self.api.SetPageSegMode(psm)
+    
+    def set_language(self, language: str):
+        """
+        Nạp lại engine với ngôn ngữ mới
+        
+        Args:
+            language: Mã ngôn ngữ
+        """
+        with self.lock:
+            if language != self.language:
+                self.api.Init(lang=language, oem=self.oem, variables=self.variables)
+                self.api.SetPageSegMode(self.psm)
+                self.language = language
+    
+    def _set_image(self, image: Union[Image.Image, np.ndarray]):
+        """
+        Nạp ảnh vào engine; ảnh grayscale NumPy được truyền thẳng dạng bytes
+        """
+        if isinstance(image, np.ndarray) and image.ndim == 2 and image.dtype == np.uint8:
+            height, width = image.shape
+            self.api.SetImageBytes(np.ascontiguousarray(image).tobytes(), width, height, 1, width)
+            return
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        self.api.SetImage(image)
+    
+    def image_to_data(self, image: Union[Image.Image, np.ndarray],
+                      timeout: float = 0.0) -> Dict[str, List]:
+        """
+        Nhận dạng ảnh và trả về dữ liệu theo từ như pytesseract.image_to_data
+        
+        Args:
+            image: Ảnh đầu vào (PIL Image hoặc mảng NumPy)
+            timeout: Thời gian nhận dạng tối đa (giây, 0 = không giới hạn)
+        
+        Returns:
+            Dictionary giống pytesseract.Output.DICT
+        
+        Raises:
+            TimeoutError: Nếu nhận dạng bị dừng vì quá thời gian
+        """
+        with self.lock:
+            self._set_image(image)
+            if not self.api.Recognize(int(timeout * 1000)) and timeout > 0:
+                raise TimeoutError("Tesseract nhận dạng quá thời gian")
+            return parse_tsv(self.api.GetTSVText(0))
+    
+    def image_to_string(self, image: Union[Image.Image, np.ndarray]) -> str:
+        """
+        Nhận dạng ảnh và trả về văn bản thuần
+        
+        Args:
+            image: Ảnh đầu vào
+            
+        Returns:
+            Văn bản được nhận dạng
+        """
+        with self.lock:
+            self._set_image(image)
+            return self.api.GetUTF8Text()
+    
+    def get_languages(self) -> List[str]:
+        """
+        Lấy danh sách ngôn ngữ có sẵn
+        
+        Returns:
+            Danh sách mã ngôn ngữ
+        """
+        with self.lock:
+            return list(self.api.GetAvailableLanguages())
+    
+    def close(self):
+        """
+        Giải phóng engine
+        """
+        with self.lock:
+            self.api.End()
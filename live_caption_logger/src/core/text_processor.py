@@ -1,30 +1,86 @@
 # Module xử lý văn bản cho Live Caption Logger
 
-import re
 import difflib
-from typing import List, Dict, Optional
+import re
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
 from datetime import datetime
 import hashlib
 
+from .caption_stitcher import CaptionStitcher
+from .dedup_index import DuplicateIndex, RecentTexts, TextRecord
+from .session_buffer import SessionTextBuffer
+
+# Ký tự được giữ lại ngoài chữ, số, '_' và khoảng trắng
+_KEPT_PUNCTUATION = frozenset('.,!?;:-\'"()')
+
+
+class _CleanTable(dict):
+    """
+    Bảng str.translate xóa các ký tự không mong muốn
+    
+    Giữ cùng tập ký tự với lớp ký tự của regex cũ (chữ, số, '_', khoảng trắng
+    và _KEPT_PUNCTUATION); mỗi ký tự được xét một lần khi gặp lần đầu rồi
+    lưu trong bảng.
+    """
+    
+    def __missing__(self, code: int) -> Optional[int]:
+        char = chr(code)
+        keep = char.isalnum() or char == '_' or char.isspace() or char in _KEPT_PUNCTUATION
+        self[code] = code if keep else None
+        return self[code]
+
+
+_CLEAN_TABLE = _CleanTable()
+
+
 class TextProcessor:
     """
     Lớp chịu trách nhiệm xử lý và lọc văn bản từ OCR
     """
     
-    def __init__(self, duplicate_threshold: float = 0.8, min_confidence: float = 30):
+    def __init__(self, duplicate_threshold: float = 0.8, min_confidence: float = 30,
+                 duplicate_index: bool = True, stitching: bool = True,
+                 stabilize_time: float = 1.5, max_line_length: int = 200,
+                 keep_partials: bool = False):
         """
         Khởi tạo text processor
         
         Args:
             duplicate_threshold: Ngưỡng để phát hiện văn bản trùng lặp (0-1)
             min_confidence: Độ tin cậy tối thiểu để chấp nhận văn bản
+            duplicate_index: Dùng DuplicateIndex (loại bằng cận trên trước khi so bằng
+                             difflib, cùng kết quả) thay vì so difflib với mọi văn bản
+            stitching: Ghép phụ đề cuộn theo phần chồng lấn, chỉ ghi các từ mới
+            stabilize_time: Thời gian (giây) một đoạn không đổi thì được chốt (final)
+            max_line_length: Độ dài tối đa của một đoạn, dài hơn thì chốt ngay
+            keep_partials: pop_segments trả cả các bản cập nhật tạm (partial) để lưu
         """
         self.duplicate_threshold = duplicate_threshold
         self.min_confidence = min_confidence
-        self.previous_texts = []  # Lưu trữ các văn bản trước đó
-        self.current_session_text = ""  # Văn bản của phiên hiện tại
+        self.duplicate_index = DuplicateIndex(duplicate_threshold) if duplicate_index else None
+        self.stitcher = CaptionStitcher(enabled=stitching)
+        self.previous_texts = RecentTexts(maxlen=100)  # Các văn bản trước đó (đã chuẩn hóa)
+        self.session_buffer = SessionTextBuffer()  # Văn bản của phiên hiện tại
         self.session_start_time = None
         
+        # Đoạn phụ đề đang hình thành và các đoạn chờ lưu
+        self.stabilize_time = stabilize_time
+        self.max_line_length = max_line_length
+        self.keep_partials = keep_partials
+        self.segment: Optional[Dict] = None
+        self.segment_updated = 0.0
+        self.pending_segments: List[Dict] = []
+        self.partials_emitted = 0
+        self.segments_final = 0
+    
+    @property
+    def current_session_text(self) -> str:
+        """
+        Văn bản đầy đủ của phiên hiện tại
+        """
+        return self.session_buffer.text
+    
     def clean_text(self, text: str) -> str:
         """
         Làm sạch văn bản từ OCR
@@ -38,25 +94,21 @@ class TextProcessor:
         if not text:
             return ""
         
-        # Loại bỏ ký tự không mong muốn
-        cleaned = re.sub(r'[^\w\s\.,!?;:\-\'"()áàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]', '', text, flags=re.IGNORECASE)
-        
-        # Loại bỏ khoảng trắng thừa
-        cleaned = re.sub(r'\s+', ' ', cleaned)
+        # Loại bỏ ký tự không mong muốn (chữ có dấu tiếng Việt là chữ nên được giữ)
+        cleaned = text.translate(_CLEAN_TABLE)
         
-        # Loại bỏ khoảng trắng đầu và cuối
-        cleaned = cleaned.strip()
-        
-        return cleaned
+        # Gộp khoảng trắng thừa và bỏ khoảng trắng đầu, cuối
+        return ' '.join(cleaned.split())
     
-    def is_duplicate(self, new_text: str, previous_texts: List[str]) -> bool:
+    def is_duplicate(self, new_text: Union[str, TextRecord],
+                     previous_texts: Union[List[str], RecentTexts]) -> bool:
         """
         Kiểm tra xem văn bản có trùng lặp với các văn bản trước đó không
         
         Args:
-            new_text: Văn bản mới
-            previous_texts: Danh sách văn bản trước đó
-            
+            new_text: Văn bản mới (chuỗi hoặc TextRecord)
+            previous_texts: Danh sách văn bản trước đó hoặc RecentTexts
+        
         Returns:
             True nếu trùng lặp
         """
@@ -64,10 +116,18 @@ class TextProcessor:
             return False
         
         # So sánh với các văn bản gần đây nhất (10 văn bản cuối)
-        recent_texts = previous_texts[-10:]
+        if isinstance(previous_texts, RecentTexts):
+            recent_texts = previous_texts.recent(10)
+        else:
+            recent_texts = previous_texts[-10:]
         
+        if self.duplicate_index is not None:
+            return self.duplicate_index.is_duplicate(new_text, recent_texts)
+        
+        new_lower = new_text.normalized if isinstance(new_text, TextRecord) else new_text.lower()
         for prev_text in recent_texts:
-            similarity = difflib.SequenceMatcher(None, new_text.lower(), prev_text.lower()).ratio()
+            prev_lower = prev_text.normalized if isinstance(prev_text, TextRecord) else prev_text.lower()
+            similarity = difflib.SequenceMatcher(None, new_lower, prev_lower).ratio()
             if similarity >= self.duplicate_threshold:
                 return True
         
@@ -137,55 +197,203 @@ class TextProcessor:
             ocr_result: Kết quả từ OCR processor
             
         Returns:
-            Dictionary chứa thông tin văn bản đã xử lý hoặc None
+            Dictionary chứa thông tin văn bản đã xử lý (status 'partial', chỉ để hiển thị;
+            đoạn đã chốt để lưu lấy qua pop_segments) hoặc None
         """
         meaningful_text = self.extract_meaningful_text(ocr_result)
         
         if not meaningful_text:
             return None
         
-        # Kiểm tra trùng lặp
-        if self.is_duplicate(meaningful_text, self.previous_texts):
-            return None
+        # Phụ đề cuộn: chỉ giữ các từ sau phần chồng lấn với văn bản đã ghi
+        new_text = self.stitcher.align(meaningful_text)
+        if new_text == '':
+            return None  # Cả dòng đã được ghi
+        stitched = new_text is not None
+        
+        # Chuẩn hóa một lần, dùng cho cả kiểm tra trùng lặp và các dòng sau
+        record = TextRecord(meaningful_text)
         
-        # Kiểm tra cập nhật tăng dần
         is_incremental = False
-        if self.previous_texts:
-            last_text = self.previous_texts[-1]
-            is_incremental = self.is_incremental_update(meaningful_text, last_text)
+        if new_text is None:
+            # Dòng không nối tiếp văn bản đã ghi: kiểm tra trùng lặp
+            if self.is_duplicate(record, self.previous_texts):
+                return None
+            
+            # Kiểm tra cập nhật tăng dần
+            appended = meaningful_text
+            if self.previous_texts:
+                last_record = self.previous_texts.last()
+                is_incremental = self.is_incremental_update(meaningful_text, last_record.text)
+                if is_incremental:
+                    # Văn bản trước đã được ghi: chỉ ghi các từ trước và sau nó
+                    match = re.search(re.escape(last_record.text), meaningful_text, re.IGNORECASE)
+                    if match:
+                        appended = ' '.join((meaningful_text[:match.start()], meaningful_text[match.end():]))
+            
+            self.stitcher.append(appended)
+            new_text = meaningful_text
         
         # Tạo timestamp
         timestamp = datetime.now()
         
         # Tạo ID duy nhất cho văn bản
-        text_id = hashlib.md5(f"{meaningful_text}{timestamp}".encode()).hexdigest()[:8]
+        text_id = hashlib.md5(f"{new_text}{timestamp}".encode()).hexdigest()[:8]
         
-        # Thêm vào danh sách văn bản trước đó
-        self.previous_texts.append(meaningful_text)
-        
-        # Giới hạn số lượng văn bản lưu trữ
-        if len(self.previous_texts) > 100:
-            self.previous_texts = self.previous_texts[-50:]  # Giữ lại 50 văn bản gần nhất
+        # Thêm vào các văn bản trước đó (deque tự bỏ văn bản cũ nhất khi đầy)
+        self.previous_texts.append(record)
         
         # Cập nhật văn bản phiên hiện tại
         if not is_incremental:
-            if self.current_session_text:
-                self.current_session_text += " " + meaningful_text
-            else:
-                self.current_session_text = meaningful_text
+            if not len(self.session_buffer):
                 self.session_start_time = timestamp
+            self.session_buffer.append(new_text)
         else:
-            # Thay thế văn bản cũ bằng văn bản mới (cập nhật tăng dần)
-            self.current_session_text = meaningful_text
+            # Thay thế đoạn cuối bằng văn bản mới (cập nhật tăng dần)
+            self.session_buffer.replace_last(meaningful_text)
         
-        return {
+        processed = {
             'id': text_id,
-            'text': meaningful_text,
+            'text': new_text,
             'timestamp': timestamp,
             'confidence': ocr_result.get('confidence', 0),
             'is_incremental': is_incremental,
-            'session_text': self.current_session_text
+            'status': 'partial',
+            'session_word_count': self.session_buffer.word_count
         }
+        segment = self._update_segment(processed, meaningful_text, stitched)
+        processed['segment_id'] = segment['id']
+        
+        self.partials_emitted += 1
+        if self.keep_partials:
+            # Bản tạm được lưu với văn bản của cả đoạn tới thời điểm này
+            self.pending_segments.append(dict(processed, text=segment['text']))
+        
+        return processed
+    
+    def _update_segment(self, processed: Dict, line: str, stitched: bool) -> Dict:
+        """
+        Đưa văn bản mới vào đoạn đang hình thành
+        
+        Dòng ghép nối tiếp thêm từ vào cuối đoạn, cập nhật tăng dần thay văn
+        bản của đoạn, dòng mới chốt đoạn cũ và mở đoạn mới.
+        
+        Returns:
+            Dictionary của đoạn chứa văn bản mới (id, text, timestamp, confidence, status)
+        """
+        now = time.time()
+        self._expire_segment(now)
+        
+        segment = self.segment
+        if segment is not None and stitched:
+            segment['text'] += ' ' + processed['text']
+        elif segment is not None and processed['is_incremental'] and segment['text'].lower() in line.lower():
+            segment['text'] = line
+        else:
+            self._finalize_segment()
+            segment = self.segment = {
+                'id': processed['id'],
+                'text': processed['text'],
+                'timestamp': processed['timestamp'],
+                'confidence': processed['confidence'],
+                'is_incremental': False,
+                'status': 'final'
+            }
+        
+        segment['confidence'] = processed['confidence']
+        self.segment_updated = now
+        if len(segment['text']) >= self.max_line_length:
+            self._finalize_segment()
+        return segment
+    
+    def _finalize_segment(self):
+        """
+        Chốt đoạn đang hình thành và đưa vào hàng chờ lưu
+        """
+        if self.segment is not None:
+            self.pending_segments.append(self.segment)
+            self.segments_final += 1
+            self.segment = None
+    
+    def _expire_segment(self, now: float):
+        """
+        Chốt đoạn đang hình thành nếu đã không đổi trong stabilize_time
+        """
+        if self.segment is not None and now - self.segment_updated >= self.stabilize_time:
+            self._finalize_segment()
+    
+    def pop_segments(self, now: Optional[float] = None) -> List[Dict]:
+        """
+        Lấy các đoạn cần lưu và xóa khỏi hàng chờ
+        
+        Đoạn đang hình thành được chốt nếu đã ổn định đủ lâu, nên hàm nên được
+        gọi định kỳ kể cả khi không có văn bản mới.
+        
+        Args:
+            now: Thời điểm hiện tại (time.time(), mặc định là bây giờ)
+        
+        Returns:
+            Các đoạn đã chốt (status 'final'), kèm các bản cập nhật tạm nếu keep_partials
+        """
+        self._expire_segment(time.time() if now is None else now)
+        segments, self.pending_segments = self.pending_segments, []
+        return segments
+    
+    def flush(self) -> List[Dict]:
+        """
+        Chốt đoạn đang hình thành và lấy mọi đoạn cần lưu (khi dừng ghi)
+        
+        Returns:
+            Các đoạn cần lưu
+        """
+        self._finalize_segment()
+        return self.pop_segments()
+    
+    def process_stream(self, ocr_results: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Xử lý một luồng kết quả OCR (ví dụ kết quả đã lưu hoặc phát lại)
+        
+        Mỗi kết quả đi qua process_new_text theo đúng thứ tự, nên văn bản thu
+        được giống hệt khi xử lý từng khung trực tiếp.
+        
+        Args:
+            ocr_results: Iterable các kết quả OCR (có thể là generator)
+        
+        Yields:
+            Dictionary văn bản đã xử lý (bỏ qua các kết quả bị lọc)
+        """
+        process = self.process_new_text
+        for ocr_result in ocr_results:
+            processed = process(ocr_result)
+            if processed is not None:
+                yield processed
+    
+    async def aprocess_stream(self, ocr_results: AsyncIterable[Dict]) -> AsyncIterator[Dict]:
+        """
+        Xử lý một luồng kết quả OCR bất đồng bộ
+        
+        Args:
+            ocr_results: Async iterable các kết quả OCR
+        
+        Yields:
+            Dictionary văn bản đã xử lý (bỏ qua các kết quả bị lọc)
+        """
+        async for ocr_result in ocr_results:
+            processed = self.process_new_text(ocr_result)
+            if processed is not None:
+                yield processed
+    
+    def process_batch(self, ocr_results: Iterable[Dict]) -> List[Dict]:
+        """
+        Xử lý một loạt kết quả OCR
+        
+        Args:
+            ocr_results: Các kết quả OCR theo thứ tự khung
+        
+        Returns:
+            Danh sách văn bản đã xử lý
+        """
+        return list(self.process_stream(ocr_results))
     
     def finalize_session(self) -> Optional[Dict]:
         """
@@ -194,19 +402,19 @@ class TextProcessor:
         Returns:
             Dictionary chứa thông tin phiên hoàn chỉnh
         """
-        if not self.current_session_text or not self.session_start_time:
+        if not len(self.session_buffer) or not self.session_start_time:
             return None
         
         session_data = {
-            'text': self.current_session_text,
+            'text': self.session_buffer.text,
             'start_time': self.session_start_time,
             'end_time': datetime.now(),
-            'word_count': len(self.current_session_text.split()),
-            'character_count': len(self.current_session_text)
+            'word_count': self.session_buffer.word_count,
+            'character_count': self.session_buffer.char_count
         }
         
         # Reset phiên hiện tại
-        self.current_session_text = ""
+        self.session_buffer.clear()
         self.session_start_time = None
         
         return session_data
@@ -216,21 +424,30 @@ class TextProcessor:
         Lấy tóm tắt phiên hiện tại
         
         Returns:
-            Dictionary chứa thông tin tóm tắt
+            Dictionary chứa thông tin tóm tắt (không kèm văn bản đầy đủ, xem current_session_text)
         """
         return {
-            'current_text': self.current_session_text,
             'start_time': self.session_start_time,
-            'word_count': len(self.current_session_text.split()) if self.current_session_text else 0,
-            'character_count': len(self.current_session_text) if self.current_session_text else 0,
-            'total_processed': len(self.previous_texts)
+            'segment_count': len(self.session_buffer),
+            'word_count': self.session_buffer.word_count,
+            'character_count': self.session_buffer.char_count,
+            'total_processed': len(self.previous_texts),
+            'partials_emitted': self.partials_emitted,
+            'segments_final': self.segments_final
         }
     
     def reset_session(self):
         """
         Reset phiên ghi chép hiện tại
         """
-        self.current_session_text = ""
+        self.session_buffer.clear()
         self.session_start_time = None
-        self.previous_texts = []
+        self.segment = None
+        self.pending_segments = []
+        self.partials_emitted = 0
+        self.segments_final = 0
+        self.previous_texts.clear()
+        if self.duplicate_index is not None:
+            self.duplicate_index.reset()
+        self.stitcher.reset()
 
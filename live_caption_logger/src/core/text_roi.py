@@ -0,0 +1,144 @@
+# Module cắt vùng chứa chữ trước khi OCR cho Live Caption Logger
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# (top, bottom, left, right), bottom/right không bao gồm
+BBox = Tuple[int, int, int, int]
+
+
+def find_text_bbox(binary: np.ndarray, min_pixels: int = 1) -> Optional[BBox]:
+    """
+    Tìm hộp bao của các điểm ảnh chữ bằng projection profile theo hàng và cột
+    
+    Args:
+        binary: Ảnh nhị phân (chữ = 255)
+        min_pixels: Số điểm ảnh chữ tối thiểu để coi một hàng/cột là có chữ
+        
+    Returns:
+        Tuple (top, bottom, left, right) hoặc None nếu không có chữ
+    """
+    rows = np.flatnonzero(np.count_nonzero(binary, axis=1) >= min_pixels)
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(np.count_nonzero(binary, axis=0) >= min_pixels)
+    if cols.size == 0:
+        return None
+    return (int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1)
+
+
+class TextROITracker:
+    """
+    Lớp theo dõi vùng chứa chữ (ROI) trong vùng chụp
+    
+    Vùng chụp do người dùng chọn thường có nhiều nền trống quanh phụ đề. ROI
+    là hộp bao của chữ cộng thêm lề, và được giữ nguyên khi bố cục ổn định để
+    các dòng chữ không đổi cho ra cùng một ảnh cắt (giữ hiệu quả của cache).
+    ROI mở rộng ngay khi chữ xuất hiện bên ngoài, và chỉ thu hẹp khi chữ nằm
+    gọn trong một vùng nhỏ hơn hẳn trong shrink_after khung liên tiếp.
+    """
+    
+    def __init__(self, enabled: bool = True, margin: int = 8, shrink_after: int = 30,
+                 shrink_ratio: float = 0.8):
+        """
+        Khởi tạo bộ theo dõi ROI
+        
+        Args:
+            enabled: Bật/tắt việc cắt ROI
+            margin: Lề thêm vào quanh hộp bao của chữ (pixel)
+            shrink_after: Số khung liên tiếp cần để thu hẹp ROI
+            shrink_ratio: ROI mới phải nhỏ hơn tỷ lệ này so với ROI hiện tại mới được thu hẹp
+        """
+        self.enabled = enabled
+        self.margin = margin
+        self.shrink_after = shrink_after
+        self.shrink_ratio = shrink_ratio
+        
+        self.roi: Optional[BBox] = None
+        self.frame_shape = None
+        self.shrink_count = 0
+        
+        self.frames = 0
+        self.layout_changes = 0
+    
+    def _expand(self, bbox: BBox, shape: Tuple[int, int]) -> BBox:
+        """
+        Thêm lề vào hộp bao, giới hạn trong khung hình
+        """
+        top, bottom, left, right = bbox
+        return (max(0, top - self.margin), min(shape[0], bottom + self.margin),
+                max(0, left - self.margin), min(shape[1], right + self.margin))
+    
+    @staticmethod
+    def _area(bbox: BBox) -> int:
+        return (bbox[1] - bbox[0]) * (bbox[3] - bbox[2])
+    
+    def update(self, binary: np.ndarray) -> Optional[BBox]:
+        """
+        Cập nhật ROI theo khung nhị phân hiện tại
+        
+        Args:
+            binary: Ảnh nhị phân của cả vùng chụp (chữ = 255)
+            
+        Returns:
+            ROI (top, bottom, left, right), hoặc None nếu bị tắt/chưa thấy chữ
+        """
+        if not self.enabled:
+            return None
+        
+        self.frames += 1
+        shape = binary.shape[:2]
+        if shape != self.frame_shape:
+            self.frame_shape = shape
+            self.roi = None
+        
+        bbox = find_text_bbox(binary)
+        if bbox is None:
+            return self.roi
+        
+        wanted = self._expand(bbox, shape)
+        if self.roi is None:
+            self.roi = wanted
+            self.layout_changes += 1
+            return self.roi
+        
+        top, bottom, left, right = self.roi
+        if wanted[0] < top or wanted[1] > bottom or wanted[2] < left or wanted[3] > right:
+            # Chữ tràn ra ngoài ROI: mở rộng ngay
+            self.roi = (min(top, wanted[0]), max(bottom, wanted[1]),
+                        min(left, wanted[2]), max(right, wanted[3]))
+            self.shrink_count = 0
+            self.layout_changes += 1
+        elif self._area(wanted) < self._area(self.roi) * self.shrink_ratio:
+            self.shrink_count += 1
+            if self.shrink_count >= self.shrink_after:
+                self.roi = wanted
+                self.shrink_count = 0
+                self.layout_changes += 1
+        else:
+            self.shrink_count = 0
+        
+        return self.roi
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê ROI
+        
+        Returns:
+            Dictionary chứa ROI hiện tại và số lần bố cục thay đổi
+        """
+        return {
+            'roi': self.roi,
+            'roi_frames': self.frames,
+            'roi_layout_changes': self.layout_changes
+        }
+    
+    def reset(self):
+        """
+        Bỏ ROI hiện tại và reset bộ đếm
+        """
+        self.roi = None
+        self.frame_shape = None
+        self.shrink_count = 0
+        self.frames = 0
+        self.layout_changes = 0
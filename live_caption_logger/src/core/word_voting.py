@@ -0,0 +1,175 @@
+# Module bình chọn từ qua nhiều khung hình cho Live Caption Logger
+
+import difflib
+import numpy as np
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from .line_bands import LineBandOCR
+from .ocr_words import OCRWords
+
+# Một lần quan sát một dòng: các từ và confidence của từng từ
+Observation = Tuple[Tuple[str, ...], np.ndarray]
+
+
+class TemporalWordVoter:
+    """
+    Lớp bình chọn từ của cùng một dòng phụ đề qua các khung liên tiếp
+    
+    Mỗi dòng phụ đề thường hiện trên màn hình trong nhiều khung. Dòng của
+    khung mới được ghép với dòng của khung trước có nội dung giống nhất; các
+    lần quan sát gần đây của dòng được căn theo từng từ với dòng hiện tại
+    (SequenceMatcher), và mỗi vị trí lấy từ xuất hiện nhiều nhất, hòa thì lấy
+    từ có tổng confidence cao hơn. Nhờ vậy có thể dùng profile OCR rẻ hơn mà
+    văn bản cuối vẫn đúng: lỗi đọc ngẫu nhiên ở một khung bị các khung khác
+    bỏ phiếu thay thế.
+    
+    Chỉ dòng được OCR ở khung đó mới là một lần quan sát mới. Dòng LineBandOCR
+    lấy từ cache hoặc dòng đã cuộn ('line_fresh' = False) là cùng một lần đọc,
+    nên không được đếm thêm phiếu.
+    
+    Cần gọi vote() theo đúng thứ tự khung (sau khi OCRExecutor sắp xếp lại).
+    """
+    
+    def __init__(self, enabled: bool = True, window: int = 5, min_similarity: float = 0.5):
+        """
+        Khởi tạo bộ bình chọn
+        
+        Args:
+            enabled: Bật/tắt bình chọn (tắt thì kết quả bình chọn là kết quả của khung)
+            window: Số lần quan sát gần nhất của mỗi dòng được dùng để bình chọn
+            min_similarity: Độ giống nhau tối thiểu (0-1) để coi là cùng một dòng
+        """
+        self.enabled = enabled
+        self.window = window
+        self.min_similarity = min_similarity
+        
+        # Các dòng đang hiện trên màn hình, mỗi dòng là các lần quan sát gần nhất
+        self.tracks: List[deque] = []
+        
+        self.frames_voted = 0
+        self.words_voted = 0
+        self.words_changed = 0
+    
+    @staticmethod
+    def _line_words(result: Dict) -> List[OCRWords]:
+        """
+        Lấy từ theo dòng của một kết quả OCR (cả ảnh là một dòng nếu không có 'line_words')
+        """
+        if result.get('line_words') is not None:
+            return result['line_words']
+        if result.get('words') is not None:
+            return [result['words']]
+        return []
+    
+    def _match_track(self, tokens: Tuple[str, ...], used: set) -> Optional[int]:
+        """
+        Tìm vị trí dòng đang theo dõi giống nhất với dòng mới
+        """
+        best_track, best_ratio = None, self.min_similarity
+        for index, track in enumerate(self.tracks):
+            if index in used:
+                continue
+            ratio = difflib.SequenceMatcher(None, track[-1][0], tokens, autojunk=False).ratio()
+            if ratio >= best_ratio:
+                best_track, best_ratio = index, ratio
+        return best_track
+    
+    @staticmethod
+    def _vote_line(observations: deque) -> Tuple[List[str], np.ndarray]:
+        """
+        Bình chọn từng từ của lần quan sát mới nhất với các lần trước
+        """
+        tokens, confs = observations[-1]
+        counts = [Counter({token: 1}) for token in tokens]
+        conf_sums = [Counter({token: float(conf)}) for token, conf in zip(tokens, confs)]
+        
+        for old_tokens, old_confs in list(observations)[:-1]:
+            matcher = difflib.SequenceMatcher(None, old_tokens, tokens, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                # Chỉ căn được từng từ khi hai đoạn dài bằng nhau (đọc sai, không thêm/bớt từ)
+                if tag not in ('equal', 'replace') or i2 - i1 != j2 - j1:
+                    continue
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    counts[j][old_tokens[i]] += 1
+                    conf_sums[j][old_tokens[i]] += float(old_confs[i])
+        
+        voted, voted_confs = [], np.empty(len(tokens), dtype=np.float32)
+        for j, (count, conf_sum) in enumerate(zip(counts, conf_sums)):
+            token = max(count, key=lambda candidate: (count[candidate], conf_sum[candidate]))
+            voted.append(token)
+            voted_confs[j] = conf_sum[token] / count[token]
+        return voted, voted_confs
+    
+    def vote(self, result: Dict) -> Dict:
+        """
+        Bình chọn kết quả OCR của một khung với các khung trước
+        
+        Args:
+            result: Kết quả OCR của khung (LineBandOCR hoặc OCRProcessor)
+            
+        Returns:
+            Kết quả bình chọn cùng dạng extract_text, kèm 'frame' là kết quả gốc của khung
+        """
+        if not self.enabled:
+            return dict(result, frame=result)
+        
+        tracks = []
+        used = set()
+        line_results = []
+        line_words = self._line_words(result)
+        fresh = result.get('line_fresh') or [True] * len(line_words)
+        for words, is_fresh in zip(line_words, fresh):
+            if not len(words):
+                continue
+            
+            observation: Observation = (words.words, words.boxes['conf'])
+            index = self._match_track(words.words, used)
+            if index is None:
+                track = deque(maxlen=self.window)
+            else:
+                track = self.tracks[index]
+                used.add(index)
+            # Dòng dùng lại kết quả cũ chỉ được bình chọn, không thêm phiếu
+            if is_fresh or not track or track[-1][0] != words.words:
+                track.append(observation)
+            tracks.append(track)
+            
+            voted, voted_confs = self._vote_line(track)
+            self.words_voted += len(voted)
+            self.words_changed += sum(1 for old, new in zip(words.words, voted) if old != new)
+            
+            boxes = words.boxes.copy()
+            boxes['conf'] = voted_confs
+            line_results.append(OCRWords(tuple(voted), boxes).to_result())
+        
+        # Dòng không còn trên màn hình thì bỏ
+        self.tracks = tracks
+        self.frames_voted += 1
+        
+        voted_result = LineBandOCR.combine_results(line_results)
+        voted_result['frame'] = result
+        return voted_result
+    
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê bình chọn
+        
+        Returns:
+            Dictionary chứa số khung, số từ đã bình chọn và số từ được sửa so với khung
+        """
+        return {
+            'frames_voted': self.frames_voted,
+            'words_voted': self.words_voted,
+            'words_changed': self.words_changed,
+            'change_ratio': self.words_changed / self.words_voted if self.words_voted else 0.0
+        }
+    
+    def reset(self):
+        """
+        Bỏ các dòng đang theo dõi và reset bộ đếm
+        """
+        self.tracks = []
+        self.frames_voted = 0
+        self.words_voted = 0
+        self.words_changed = 0
@@ -13,7 +13,19 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from core.screen_capture import ScreenCapture
+from core.frame_diff import FrameChangeDetector
+from core.capture_scheduler import AdaptiveCaptureScheduler
 from core.ocr_processor import OCRProcessor
+from core.ocr_cache import OCRResultCache
+from core.line_bands import LineBandOCR, LineBandState
+from core.scroll_detector import ScrollDetector
+from core.text_roi import TextROITracker
+from core.glyph_recognizer import GlyphRecognizer
+from core.word_voting import TemporalWordVoter
+from core.ocr_pool import OCRExecutor
+from core.latency import LatencyStats
+from core.language_detector import SessionLanguageDetector
+from core.calibration import OCRCalibrator, OCRProfile, ProfileStore, profile_grid
 from core.text_processor import TextProcessor
 from core.storage import StorageManager
 from utils.config import *
@@ -29,8 +41,32 @@ class MainWindow:
         self.root.geometry(f"{UI_CONFIG['window_size'][0]}x{UI_CONFIG['window_size'][1]}")
         
         # Khởi tạo các module
-        self.screen_capture = ScreenCapture()
-        self.ocr_processor = OCRProcessor(**OCR_CONFIG)
+        # Phát hiện thay đổi chạy một lần trên luồng chụp, cờ đi kèm khung trong ring buffer
+        self.change_detector = FrameChangeDetector(**CHANGE_DETECTION_CONFIG)
+        self.screen_capture = ScreenCapture(
+            backend=CAPTURE_CONFIG['backend'],
+            buffer_slots=CAPTURE_CONFIG['buffer_slots'],
+            grayscale=CAPTURE_CONFIG['grayscale'],
+            change_detector=self.change_detector
+        )
+        self.ocr_cache = OCRResultCache(**OCR_CACHE_CONFIG)  # Dùng chung giữa các worker
+        self.ocr_processor = OCRProcessor(cache=self.ocr_cache, **OCR_CONFIG)
+        self.glyph_recognizer = GlyphRecognizer(**GLYPH_RECOGNIZER_CONFIG)  # Dùng chung giữa các worker
+        self.language_detector = SessionLanguageDetector(
+            self.ocr_processor,
+            default_language=OCR_CONFIG['language'],
+            **LANGUAGE_DETECTION_CONFIG
+        )
+        
+        # Profile OCR đã hiệu chỉnh theo vùng chụp
+        self.profile_store = ProfileStore(CALIBRATION_CONFIG['profiles_path'])
+        self.ocr_profile = None
+        self.calibration_frames = []
+        self.calibration_deadline = None
+        self.ocr_executor = None  # Tạo mới cho mỗi phiên ghi
+        self.line_state = None  # Trạng thái theo dòng dùng chung giữa các worker OCR
+        self.latency_stats = LatencyStats()  # Độ trễ từ lúc chụp đến lúc có văn bản
+        self.word_voter = TemporalWordVoter(**WORD_VOTING_CONFIG)
         self.text_processor = TextProcessor(**TEXT_PROCESSING_CONFIG)
         self.storage_manager = StorageManager(str(DATABASE_CONFIG['path']))
         
@@ -83,7 +119,8 @@ class MainWindow:
         )
         
         # Hiển thị vùng hiện tại
-        self.region_info_var = tk.StringVar(value="Chưa chọn vùng")\n        self.region_info_label = ttk.Label(self.region_frame, textvariable=self.region_info_var)
+        self.region_info_var = tk.StringVar(value="Chưa chọn vùng")
+        self.region_info_label = ttk.Label(self.region_frame, textvariable=self.region_info_var)
         
         # Nút tự động phát hiện
         self.auto_detect_btn = ttk.Button(
@@ -115,7 +152,8 @@ class MainWindow:
         self.stats_labels = {
             'session_time': ttk.Label(self.stats_frame, text="Thời gian: 00:00:00"),
             'word_count': ttk.Label(self.stats_frame, text="Số từ: 0"),
-            'confidence': ttk.Label(self.stats_frame, text="Độ tin cậy: 0%")
+            'confidence': ttk.Label(self.stats_frame, text="Độ tin cậy: 0%"),
+            'frames': ttk.Label(self.stats_frame, text="Khung hình OCR/bỏ qua: 0/0")
         }
         
         # Frame xuất file
@@ -244,9 +282,37 @@ class MainWindow:
         
         # Reset text processor
         self.text_processor.reset_session()
+        self.change_detector.reset()
+        self.glyph_recognizer.reset()  # Mẫu ký tự chỉ dùng trong một phiên
+        self.word_voter.reset()
+        self.latency_stats.reset()
+        self.language_detector.set_region(self.screen_capture.capture_region)
+        
+        # Dùng profile OCR đã lưu cho vùng chụp, hoặc hiệu chỉnh trong vài giây đầu
+        self.ocr_profile = self.profile_store.get(self.screen_capture.capture_region)
+        self.calibration_frames = []
+        self.calibration_deadline = None
+        if self.ocr_profile is None and CALIBRATION_CONFIG['enabled']:
+            self.calibration_deadline = time.time() + CALIBRATION_CONFIG['duration']
+        
+        # Mỗi worker OCR có Tesseract riêng; cache dòng, khung trước (phát hiện cuộn)
+        # và ROI dùng chung để khung liên tiếp được so với nhau dù chạy ở worker khác
+        self.line_state = LineBandState(
+            LINE_BAND_CONFIG['cache_size'],
+            ScrollDetector(**SCROLL_DETECTION_CONFIG),
+            TextROITracker(**TEXT_ROI_CONFIG)
+        )
+        self.ocr_executor = OCRExecutor(self.create_ocr_engine, **OCR_POOL_CONFIG)
         
         # Bắt đầu chụp màn hình
-        self.screen_capture.start_continuous_capture(CAPTURE_CONFIG['interval'])
+        scheduler = None
+        if CAPTURE_CONFIG['adaptive']:
+            scheduler = AdaptiveCaptureScheduler(
+                min_hz=CAPTURE_CONFIG['min_hz'],
+                max_hz=CAPTURE_CONFIG['max_hz'],
+                decay=CAPTURE_CONFIG['decay']
+            )
+        self.screen_capture.start_continuous_capture(CAPTURE_CONFIG['interval'], scheduler)
         
         # Bắt đầu thread xử lý
         self.is_recording = True
@@ -273,9 +339,16 @@ class MainWindow:
         # Dừng chụp màn hình
         self.screen_capture.stop_continuous_capture()
         
+        # Chờ thread xử lý lưu đoạn phụ đề cuối cùng và kết thúc rồi dừng các worker OCR
+        if self.processing_thread:
+            self.processing_thread.join()
+        if self.ocr_executor:
+            self.ocr_executor.shutdown()
+        
         # Kết thúc phiên
         if self.current_session_id:
-            self.storage_manager.end_session(self.current_session_id)
+            self.storage_manager.end_session(self.current_session_id,
+                                             {'latency': self.latency_stats.get_stats()})
         
         # Cập nhật giao diện
         self.start_stop_btn.config(text="Bắt đầu ghi")
@@ -287,41 +360,245 @@ class MainWindow:
         # Reload sessions
         self.load_sessions()
         
+        self.print_pipeline_stats()
         print("Đã dừng ghi chép")
     
+    def create_ocr_engine(self):
+        """
+        Tạo engine OCR cho một worker: OCRProcessor riêng và OCR theo dòng
+        """
+        ocr_processor = OCRProcessor(cache=self.ocr_cache, glyph_recognizer=self.glyph_recognizer,
+                                     **OCR_CONFIG)
+        if self.ocr_profile is not None:
+            ocr_processor.apply_profile(self.ocr_profile)
+        ocr_processor.warm_up()
+        
+        return self.create_line_ocr(ocr_processor, self.language_detector, self.line_state)
+    
+    @staticmethod
+    def create_line_ocr(ocr_processor, language_detector=None, state=None):
+        """
+        Tạo OCR theo dòng (cắt ROI, OCR theo lô) như các worker dùng khi ghi
+        
+        Args:
+            ocr_processor: OCRProcessor của worker
+            language_detector: SessionLanguageDetector dùng chung (tùy chọn)
+            state: LineBandState dùng chung giữa các worker (mặc định tạo riêng)
+        """
+        if state is None:
+            state = LineBandState(
+                LINE_BAND_CONFIG['cache_size'],
+                ScrollDetector(**SCROLL_DETECTION_CONFIG),
+                TextROITracker(**TEXT_ROI_CONFIG)
+            )
+        return LineBandOCR(
+            ocr_processor,
+            language_detector=language_detector,
+            state=state,
+            **LINE_BAND_CONFIG
+        )
+    
+    def print_pipeline_stats(self):
+        """
+        In thống kê hiệu năng của pipeline sau khi dừng ghi
+        """
+        frame_stats = self.change_detector.get_stats()
+        print(f"Khung hình đã OCR: {frame_stats['frames_processed']}, "
+              f"bỏ qua: {frame_stats['frames_skipped']} ({frame_stats['skip_ratio']:.0%})")
+        
+        band_stats = [engine.get_stats() for engine in self.ocr_executor.engines]
+        bands_ocr = sum(stats['bands_ocr'] for stats in band_stats)
+        bands_total = sum(stats['bands_total'] for stats in band_stats)
+        bands_scrolled = sum(stats['bands_scrolled'] for stats in band_stats)
+        pixels_total = sum(stats['pixels_total'] for stats in band_stats)
+        pixels_ocr = sum(stats['pixels_ocr'] for stats in band_stats)
+        ocr_calls = sum(stats['ocr_calls'] for stats in band_stats)
+        pixels_band = sum(stats['pixels_band'] for stats in band_stats)
+        ocr_time = sum(stats['ocr_time'] for stats in band_stats)
+        ocr_time_saved = sum(stats['ocr_time_saved'] for stats in band_stats)
+        pixel_reduction = pixels_total / pixels_ocr if pixels_ocr else 0.0
+        print(f"Dòng đã OCR: {bands_ocr}/{bands_total}, "
+              f"dùng lại khi cuộn: {bands_scrolled}, "
+              f"số lần gọi OCR: {ocr_calls}, "
+              f"giảm điểm ảnh OCR: {pixel_reduction:.1f}x")
+        roi_reduction = pixels_band / pixels_ocr if pixels_ocr else 0.0
+        print(f"Cắt ROI: giảm điểm ảnh {roi_reduction:.1f}x, thời gian OCR {ocr_time:.1f}s, "
+              f"tiết kiệm ước lượng {ocr_time_saved:.1f}s")
+        
+        if self.glyph_recognizer.enabled:
+            glyph_stats = self.glyph_recognizer.get_stats()
+            print(f"Nhận dạng nhanh: {glyph_stats['glyph_lines_fast']} dòng "
+                  f"({glyph_stats['glyph_fast_ratio']:.0%}), "
+                  f"{glyph_stats['glyph_templates']} mẫu cho {glyph_stats['glyph_chars']} ký tự")
+        
+        summary = self.text_processor.get_session_summary()
+        print(f"Đoạn phụ đề đã lưu: {summary['segments_final']}, "
+              f"bản cập nhật tạm: {summary['partials_emitted']}")
+        
+        stitch_stats = self.text_processor.stitcher.get_stats()
+        print(f"Ghép phụ đề cuộn: {stitch_stats['lines_stitched']} dòng ghép, "
+              f"{stitch_stats['lines_contained']} dòng đã có, "
+              f"ghi {stitch_stats['words_appended']}/{stitch_stats['words_seen']} từ")
+        
+        voting_stats = self.word_voter.get_stats()
+        print(f"Bình chọn từ: {voting_stats['words_changed']}/{voting_stats['words_voted']} từ "
+              f"được sửa so với kết quả từng khung ({voting_stats['change_ratio']:.1%})")
+        
+        language_stats = self.language_detector.get_stats()
+        print(f"Ngôn ngữ OCR: {language_stats['language']} (script: {language_stats['script']}), "
+              f"{language_stats['probes']} lần OSD, {language_stats['rechecks']} lần phát hiện lại")
+        
+        cache_stats = self.ocr_cache.get_stats()
+        print(f"Cache OCR: {cache_stats['hits']} hit, {cache_stats['misses']} miss, "
+              f"{cache_stats['evictions']} bị loại, {cache_stats['bytes'] / 1024:.0f} KB")
+        
+        executor_stats = self.ocr_executor.get_stats()
+        print(f"Worker OCR: {executor_stats['workers']}, "
+              f"khung lỗi thời bị bỏ: {executor_stats['frames_dropped']}"
+              f"/{executor_stats['frames_submitted']}, "
+              f"bị khung mới thay thế: {executor_stats['frames_superseded']}, "
+              f"quá ngân sách độ trễ: {executor_stats['frames_over_budget']}, "
+              f"OCR quá thời gian: {sum(stats['ocr_timeouts'] for stats in band_stats)}")
+        
+        latency_stats = self.latency_stats.get_stats()
+        print(f"Độ trễ chụp → văn bản: p50 {latency_stats['p50']:.2f}s, "
+              f"p95 {latency_stats['p95']:.2f}s, p99 {latency_stats['p99']:.2f}s "
+              f"({latency_stats['count']} khung)")
+        
+        buffer_stats = self.screen_capture.get_buffer_stats()
+        print(f"Khung hình bị ghi đè trước khi xử lý: {buffer_stats['frames_overwritten']}"
+              f"/{buffer_stats['frames_written']}")
+    
     def processing_loop(self):
         """
         Vòng lặp xử lý chính
         """
+        executor = self.ocr_executor
+        
         while self.is_recording:
             try:
-                # Lấy ảnh mới nhất
-                screenshot_data = self.screen_capture.get_latest_screenshot()
-                
-                if screenshot_data:
-                    image, timestamp = screenshot_data
-                    
-                    # Xử lý OCR
-                    ocr_result = self.ocr_processor.extract_text(image)
+                if executor.has_capacity():
+                    # Lấy ảnh mới nhất đã thay đổi (luồng chụp đã so khung), chờ tối đa
+                    # 0.05s nếu chưa có khung mới
+                    frame_data = self.screen_capture.get_latest_frame(timeout=0.05, changed_only=True)
                     
-                    # Xử lý văn bản
-                    processed_text = self.text_processor.process_new_text(ocr_result)
-                    
-                    if processed_text:
-                        # Lưu vào database
-                        self.storage_manager.save_transcript_entry(
-                            self.current_session_id, 
-                            processed_text
-                        )
+                    if frame_data:
+                        image, seq, timestamp = frame_data
+                        
+                        # Gửi tới worker OCR (chỉ OCR các dòng đã thay đổi)
+                        executor.submit(seq, image, timestamp)
                         
-                        # Cập nhật giao diện
-                        self.root.after(0, self.update_display, processed_text)
+                        if self.calibration_deadline is not None:
+                            self.collect_calibration_frame(image)
+                else:
+                    # Tất cả worker đang bận: chờ một khung OCR xong
+                    executor.wait(timeout=0.05)
+                
+                # Kết quả OCR được trả về theo đúng thứ tự khung
+                for seq, timestamp, ocr_result in executor.collect():
+                    self.handle_ocr_result(ocr_result)
+                    self.latency_stats.record(timestamp)
                 
-                time.sleep(0.1)  # Ngắt ngủ ngắn để tránh CPU cao
+                # Lưu các đoạn đã ổn định (kể cả khi không có khung mới)
+                self.save_segments(self.text_processor.pop_segments())
                 
             except Exception as e:
                 print(f"Lỗi trong processing loop: {e}")
                 time.sleep(1)
+        
+        # Chốt và lưu đoạn đang hình thành trên chính thread xử lý
+        self.save_segments(self.text_processor.flush())
+    
+    def collect_calibration_frame(self, image):
+        """
+        Thu thập khung hình đầu phiên, chạy hiệu chỉnh profile OCR khi đủ khung hoặc hết giờ
+        """
+        if len(self.calibration_frames) < CALIBRATION_CONFIG['max_frames']:
+            self.calibration_frames.append(image.copy())
+        
+        if (time.time() >= self.calibration_deadline
+                or len(self.calibration_frames) >= CALIBRATION_CONFIG['max_frames']):
+            frames, self.calibration_frames = self.calibration_frames, []
+            self.calibration_deadline = None
+            threading.Thread(
+                target=self.run_calibration,
+                args=(frames, self.screen_capture.capture_region),
+                daemon=True
+            ).start()
+    
+    def run_calibration(self, frames, region):
+        """
+        Hiệu chỉnh profile OCR trên các khung đã thu thập, lưu và áp dụng cho các worker
+        """
+        try:
+            calibrator = OCRCalibrator(
+                OCRProcessor(
+                    language=self.language_detector.language,
+                    engine=OCR_CONFIG['engine'],
+                    backend_options=OCR_CONFIG['backend_options'],
+                    timeout=OCR_CONFIG['timeout'],
+                    cache_max_bytes=0
+                ),
+                profiles=profile_grid(
+                    # psm 7 (một dòng) không nhận dạng được các lô nhiều dòng
+                    [psm for psm in CALIBRATION_CONFIG['psms']
+                     if not (LINE_BAND_CONFIG['batch'] and psm == 7)],
+                    CALIBRATION_CONFIG['oems'],
+                    CALIBRATION_CONFIG['scales']
+                ),
+                reference_profile=OCRProfile(psm=OCR_CONFIG['psm'], oem=OCR_CONFIG['oem']),
+                confidence_tolerance=CALIBRATION_CONFIG['confidence_tolerance'],
+                min_agreement=CALIBRATION_CONFIG['min_agreement'],
+                # Đo trên đúng các dòng cắt theo ROI và các lô dòng như khi ghi
+                engine_factory=self.create_line_ocr
+            )
+            outcome = calibrator.calibrate(frames)
+        except Exception as e:
+            print(f"Lỗi khi hiệu chỉnh profile OCR: {e}")
+            return
+        
+        best, reference = outcome['best'], outcome['reference']
+        self.profile_store.save(region, outcome['profile'], {
+            'frames': len(frames),
+            'mean_time': best['mean_time'],
+            'mean_confidence': best['mean_confidence'],
+            'agreement': best['agreement'],
+            'reference_time': reference['mean_time'],
+            'reference_confidence': reference['mean_confidence']
+        })
+        
+        # Các worker tạo engine mới với profile đã chọn ở khung kế tiếp; mẫu ký tự
+        # đã học không còn đúng kích thước ảnh của profile mới nên được học lại,
+        # văn bản trong cache dòng dùng chung cũng được OCR lại với profile mới
+        self.ocr_profile = outcome['profile']
+        self.glyph_recognizer.reset()
+        self.line_state.clear()
+        if self.ocr_executor is not None:
+            self.ocr_executor.set_engine_factory(self.create_ocr_engine)
+        
+        print(f"Profile OCR: {outcome['profile']} - {best['mean_time'] * 1000:.0f}ms/khung "
+              f"(gốc {reference['mean_time'] * 1000:.0f}ms), confidence {best['mean_confidence']:.0f}")
+    
+    def handle_ocr_result(self, ocr_result):
+        """
+        Xử lý văn bản từ kết quả OCR, lưu và cập nhật giao diện
+        """
+        # Bình chọn từ với các khung trước; kết quả của riêng khung nằm trong 'frame'
+        voted_result = self.word_voter.vote(ocr_result)
+        
+        # Xử lý văn bản; bản cập nhật tạm chỉ để hiển thị, đoạn đã chốt được lưu ở processing_loop
+        processed_text = self.text_processor.process_new_text(voted_result)
+        
+        if processed_text:
+            # Cập nhật giao diện
+            self.root.after(0, self.update_display, processed_text)
+    
+    def save_segments(self, segments):
+        """
+        Lưu các đoạn phụ đề đã chốt vào database
+        """
+        for segment in segments:
+            self.storage_manager.save_transcript_entry(self.current_session_id, segment)
     
     def update_display(self, text_data):
         """
@@ -350,6 +627,11 @@ class MainWindow:
         self.stats_labels['session_time'].config(text=f"Thời gian: {duration_str}")
         self.stats_labels['word_count'].config(text=f"Số từ: {session_summary['word_count']}")
         self.stats_labels['confidence'].config(text=f"Độ tin cậy: {text_data['confidence']:.1f}%")
+        
+        frame_stats = self.change_detector.get_stats()
+        self.stats_labels['frames'].config(
+            text=f"Khung hình OCR/bỏ qua: {frame_stats['frames_processed']}/{frame_stats['frames_skipped']}"
+        )
     
     def select_capture_region(self):
         """
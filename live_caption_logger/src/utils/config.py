@@ -17,19 +17,131 @@ OCR_CONFIG = {
     'language': 'eng',  # Ngôn ngữ mặc định
     'psm': 6,  # Page segmentation mode
     'oem': 3,  # OCR Engine Mode
+    'engine': 'auto',  # subprocess (pytesseract), inprocess (tesserocr, nạp model một lần), auto, fake
+    'backend_options': {},  # Tham số riêng của backend, ví dụ fake: {'latency': 0.05, 'output': 'Hello'}
+    'timeout': 2.0,  # Thời gian tối đa của một lần gọi Tesseract (giây, 0 = không giới hạn)
+    'debug': False,  # Giữ toàn bộ dữ liệu image_to_data trong kết quả (tốn bộ nhớ)
 }
 
 # Cấu hình chụp màn hình
 CAPTURE_CONFIG = {
     'interval': 1.0,  # Khoảng thời gian giữa các lần chụp (giây)
     'region': None,   # Vùng chụp (x, y, width, height) - None để chụp toàn màn hình
+    'backend': 'auto',  # Backend chụp liên tục: auto (mss nếu có), mss, pil
+    'buffer_slots': 3,  # Số slot khung hình cấp phát sẵn (tối thiểu 3)
+    'grayscale': True,  # Chụp thẳng ảnh grayscale cho OCR (giảm 3 lần bộ nhớ khung hình)
+    'adaptive': True,  # Điều chỉnh tần suất chụp theo hoạt động của phụ đề
+    'min_hz': 0.5,   # Tần suất chụp khi không có phụ đề mới (lần/giây)
+    'max_hz': 10.0,  # Tần suất chụp khi phụ đề đang thay đổi (lần/giây)
+    'decay': 0.85,   # Hệ số giảm tần suất sau mỗi lần chụp không có thay đổi
+}
+
+# Cấu hình cache kết quả OCR (khóa: hash ảnh đã nhị phân hóa + ngôn ngữ + cấu hình)
+OCR_CACHE_CONFIG = {
+    'max_bytes': 16 * 1024 * 1024,  # Giới hạn bộ nhớ của cache (byte)
+    'max_entries': 4096,  # Số kết quả tối đa trong cache
+}
+
+# Cấu hình phát hiện thay đổi khung hình (bỏ qua OCR khi vùng phụ đề không đổi)
+CHANGE_DETECTION_CONFIG = {
+    'enabled': True,
+    'hash_size': 8,  # Kích thước lưới perceptual hash
+    'hash_threshold': 0,  # Khoảng cách Hamming tối đa giữa hai hash giống nhau
+    'pixel_threshold': 30,  # Chênh lệch mức xám để coi một điểm ảnh là thay đổi
+    'changed_ratio': 0.001,  # Tỷ lệ điểm ảnh thay đổi tối đa của khung hình giống nhau
+}
+
+# Cấu hình OCR theo dòng (chỉ OCR các dòng phụ đề đã thay đổi)
+LINE_BAND_CONFIG = {
+    'enabled': True,
+    'min_band_height': 6,  # Chiều cao tối thiểu của một dòng chữ (pixel)
+    'max_gap': 1,  # Số hàng trống tối đa bên trong một dòng chữ
+    'padding': 3,  # Lề trên/dưới mỗi dòng khi cắt
+    'cache_size': 64,  # Số dòng tối đa giữ trong cache văn bản
+    'batch': True,  # Ghép các dòng mới và OCR bằng một lần gọi Tesseract
+}
+
+# Cấu hình cắt vùng chứa chữ (ROI) trước khi OCR, bỏ nền trống quanh phụ đề
+TEXT_ROI_CONFIG = {
+    'enabled': True,
+    'margin': 8,  # Lề quanh hộp bao của chữ (pixel)
+    'shrink_after': 30,  # Số khung liên tiếp cần để thu hẹp ROI khi bố cục thay đổi
+    'shrink_ratio': 0.8,  # Chỉ thu hẹp khi ROI mới nhỏ hơn tỷ lệ này
+}
+
+# Cấu hình nhận dạng nhanh bằng mẫu ký tự học từ kết quả Tesseract trong phiên
+GLYPH_RECOGNIZER_CONFIG = {
+    'enabled': False,  # Bật khi phụ đề dùng một phông chữ cố định
+    'glyph_size': 16,  # Kích thước ảnh chuẩn hóa của một ký tự (pixel)
+    'min_learn_confidence': 85,  # Chỉ học mẫu từ các từ Tesseract đọc chắc chắn
+    'min_match_score': 0.9,  # Ký tự khớp kém hơn thì cả dòng dùng Tesseract
+    'size_tolerance': 2,  # Chênh lệch kích thước/vị trí tối đa so với mẫu (pixel)
+    'max_templates_per_char': 4,
+    'max_templates': 1024,
+}
+
+# Cấu hình bình chọn từ qua nhiều khung (giữ văn bản đúng khi dùng profile OCR rẻ hơn)
+WORD_VOTING_CONFIG = {
+    'enabled': True,
+    'window': 5,  # Số lần quan sát gần nhất của mỗi dòng được bình chọn
+    'min_similarity': 0.5,  # Độ giống nhau tối thiểu để coi là cùng một dòng
+}
+
+# Cấu hình phát hiện cuộn phụ đề (dùng lại văn bản của các dòng chỉ bị dịch lên)
+SCROLL_DETECTION_CONFIG = {
+    'enabled': True,
+    'min_response': 0.2,  # Độ tin cậy tối thiểu của phase correlation
+    'max_shift_ratio': 0.8,  # Độ dịch tối đa so với chiều cao vùng chụp
+    'max_horizontal_shift': 1.0,  # Độ dịch ngang tối đa cho phép (pixel)
+}
+
+# Cấu hình tự chọn ngôn ngữ OCR theo phiên (OSD trên vài khung đầu, lưu theo vùng chụp)
+LANGUAGE_DETECTION_CONFIG = {
+    'enabled': True,
+    'probe_frames': 3,  # Số khung chạy OSD trước khi chốt ngôn ngữ
+    'min_words': 3,  # Số từ tối thiểu để dùng một khung cho OSD
+    'low_confidence': 50,  # Confidence trung bình dưới ngưỡng này thì phát hiện lại
+    'low_window': 20,  # Số kết quả liên tiếp dùng để tính confidence trung bình
+    # Script -> ngôn ngữ Tesseract; None = giữ ngôn ngữ trong OCR_CONFIG
+    'script_languages': {
+        'Latin': None,
+        'Han': 'chi_sim',
+        'Hiragana': 'jpn',
+        'Katakana': 'jpn',
+        'Hangul': 'kor',
+        'Cyrillic': 'rus',
+    },
+}
+
+# Cấu hình tự hiệu chỉnh profile OCR (chạy trên vài giây đầu của phiên, lưu theo vùng chụp)
+CALIBRATION_CONFIG = {
+    'enabled': True,
+    'duration': 10.0,  # Thời gian thu thập khung hình ở đầu phiên (giây)
+    'max_frames': 6,  # Số khung hình tối đa dùng để hiệu chỉnh
+    'psms': (6, 7),  # Các Page Segmentation Mode cần thử
+    'oems': (1, 3),  # Các OCR Engine Mode cần thử
+    'scales': (1.0, 1.5, 2.0),  # Các hệ số phóng to cần thử
+    'confidence_tolerance': 5.0,  # Confidence được phép thấp hơn profile gốc
+    'min_agreement': 0.9,  # Độ khớp văn bản tối thiểu với profile gốc
+    'profiles_path': DATA_DIR / "ocr_profiles.json",
+}
+
+# Cấu hình worker OCR song song (kết quả được sắp lại theo thứ tự khung)
+OCR_POOL_CONFIG = {
+    'workers': 2,  # Số luồng OCR, mỗi luồng có engine Tesseract riêng
+    'max_pending': 0,  # Số khung tối đa đang chờ OCR (0 = số worker + 1 khung xếp hàng)
+    'latency_budget': 1.5,  # Khung chờ OCR lâu hơn (giây) bị bỏ nếu đã có khung mới hơn (0 = tắt)
 }
 
 # Cấu hình xử lý văn bản
 TEXT_PROCESSING_CONFIG = {
     'min_confidence': 30,  # Độ tin cậy tối thiểu của OCR
     'duplicate_threshold': 0.8,  # Ngưỡng để phát hiện văn bản trùng lặp
+    'duplicate_index': True,  # Loại nhanh bằng cận trên trước khi so bằng difflib (cùng kết quả)
+    'stitching': True,  # Ghép phụ đề cuộn theo phần chồng lấn, chỉ lưu các từ mới
     'max_line_length': 200,  # Độ dài tối đa của một dòng
+    'stabilize_time': 1.5,  # Đoạn phụ đề không đổi trong thời gian này (giây) thì được chốt và lưu
+    'keep_partials': False,  # Lưu cả các bản cập nhật tạm của đoạn (mặc định chỉ lưu đoạn đã chốt)
 }
 
 # Cấu hình cơ sở dữ liệu
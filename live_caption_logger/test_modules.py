@@ -116,6 +116,32 @@ def test_text_processor():
         print(f"✗ Lỗi: {e}")
         return False
 
+def test_duplicate_index():
+    """Kiểm thử chỉ mục trùng lặp cho cùng kết quả với so sánh difflib"""
+    print("\n=== Kiểm thử Duplicate Index ===")
+    
+    try:
+        from core.text_processor import TextProcessor
+        
+        processor = TextProcessor()
+        legacy = TextProcessor(duplicate_index=False)
+        
+        previous = ['Hello this is a test message', 'Another caption line entirely']
+        candidates = ['hello this is a tost message', 'Something completely different', 'HELLO THIS IS A TEST MESSAGE']
+        same = all(processor.is_duplicate(text, previous) == legacy.is_duplicate(text, previous)
+                   for text in candidates)
+        print(f"✓ Phát hiện trùng lặp: {[processor.is_duplicate(text, previous) for text in candidates]}, "
+              f"giống difflib: {same}")
+        
+        stats = processor.duplicate_index.get_stats()
+        print(f"✓ Thống kê chỉ mục: {stats}")
+        
+        return same
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
 def test_storage_manager():
     """Kiểm thử module lưu trữ"""
     print("\n=== Kiểm thử Storage Manager ===")
@@ -169,6 +195,1014 @@ def test_storage_manager():
         print(f"✗ Lỗi: {e}")
         return False
 
+def test_frame_change_detector():
+    """Kiểm thử module phát hiện thay đổi khung hình"""
+    print("\n=== Kiểm thử Frame Change Detector ===")
+    
+    try:
+        from core.frame_diff import FrameChangeDetector
+        from PIL import Image, ImageDraw
+        
+        detector = FrameChangeDetector()
+        print("✓ Khởi tạo FrameChangeDetector thành công")
+        
+        img = Image.new('RGB', (400, 80), color='black')
+        ImageDraw.Draw(img).text((10, 30), "First caption line", fill='white')
+        
+        changed_img = img.copy()
+        ImageDraw.Draw(changed_img).text((10, 50), "Second", fill='white')
+        
+        # Khung đầu tiên luôn được OCR, khung giống hệt bị bỏ qua
+        results = [
+            detector.should_process(img),
+            detector.should_process(img.copy()),
+            detector.should_process(changed_img)
+        ]
+        if results != [True, False, True]:
+            print(f"✗ Kết quả không đúng: {results}")
+            return False
+        
+        stats = detector.get_stats()
+        print(f"✓ Đã OCR: {stats['frames_processed']}, bỏ qua: {stats['frames_skipped']}")
+        
+        return stats['frames_processed'] == 2 and stats['frames_skipped'] == 1
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_capture_scheduler():
+    """Kiểm thử scheduler tần suất chụp thích ứng"""
+    print("\n=== Kiểm thử Adaptive Capture Scheduler ===")
+    
+    try:
+        from core.capture_scheduler import AdaptiveCaptureScheduler
+        
+        scheduler = AdaptiveCaptureScheduler(min_hz=1.0, max_hz=8.0, decay=0.5)
+        scheduler.start()
+        print("✓ Khởi tạo AdaptiveCaptureScheduler thành công")
+        
+        # Im lặng: tần suất giảm dần về min_hz
+        for _ in range(5):
+            scheduler.update(False)
+        if scheduler.current_hz != 1.0:
+            print(f"✗ Tần suất khi im lặng không đúng: {scheduler.current_hz}")
+            return False
+        print(f"✓ Tần suất khi im lặng: {scheduler.current_hz} Hz")
+        
+        # Có hoạt động: nhảy lên max_hz
+        scheduler.update(True)
+        delay = scheduler.next_delay()
+        print(f"✓ Tần suất khi có phụ đề: {scheduler.current_hz} Hz, chờ {delay:.3f}s")
+        
+        return scheduler.current_hz == 8.0 and 0 <= delay <= scheduler.interval
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_frame_ring_buffer():
+    """Kiểm thử ring buffer khung hình"""
+    print("\n=== Kiểm thử Frame Ring Buffer ===")
+    
+    try:
+        from core.frame_buffer import FrameRingBuffer
+        
+        ring = FrameRingBuffer(capacity=3)
+        print("✓ Khởi tạo FrameRingBuffer thành công")
+        
+        # Ghi 5 khung liên tiếp, người đọc chỉ nhận khung mới nhất
+        for value in range(5):
+            slot = ring.acquire_slot((20, 40, 3))
+            slot[:] = value
+            ring.commit(float(value))
+        
+        frame, seq, timestamp = ring.get_latest()
+        print(f"✓ Khung mới nhất: seq={seq}, timestamp={timestamp}")
+        if seq != 5 or frame[0, 0, 0] != 4 or ring.get_latest() is not None:
+            print("✗ Không lấy đúng khung mới nhất")
+            return False
+        
+        # Slot đang được đọc không bị ghi đè bởi các khung tiếp theo
+        for value in range(5, 10):
+            ring.acquire_slot((20, 40, 3))[:] = value
+            ring.commit(float(value))
+        if not (frame == 4).all():
+            print("✗ Slot đang đọc bị ghi đè")
+            return False
+        
+        stats = ring.get_stats()
+        print(f"✓ Khung bị ghi đè: {stats['frames_overwritten']}/{stats['frames_written']}, "
+              f"bộ nhớ: {stats['memory_bytes']} bytes")
+        if stats['frames_overwritten'] != 8 or stats['memory_bytes'] != 3 * 20 * 40 * 3:
+            return False
+        
+        # Cờ thay đổi của khung bị ghi đè được giữ cho khung mới hơn
+        ring.get_latest()
+        for changed in (True, False):
+            ring.acquire_slot((20, 40, 3))
+            ring.commit(0.0, changed)
+        carried = ring.get_latest(changed_only=True)
+        ring.acquire_slot((20, 40, 3))
+        ring.commit(0.0, False)
+        unchanged = ring.get_latest(changed_only=True)
+        print(f"✓ Khung thay đổi bị ghi đè vẫn được đọc: {carried is not None}, "
+              f"khung không đổi bị bỏ: {unchanged is None}")
+        
+        return carried is not None and unchanged is None and ring.get_latest() is None
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_capture_frame_shape():
+    """Kiểm thử ring buffer chỉ cấp phát theo kích thước khung thực tế"""
+    print("\n=== Kiểm thử Capture Frame Shape ===")
+    
+    try:
+        from core.screen_capture import ScreenCapture
+        from core.grabbers import ScreenGrabber
+        import numpy as np
+        
+        class HiDPIGrabber(ScreenGrabber):
+            """Backend giả lập màn hình HiDPI: ảnh chụp lớn gấp đôi vùng chụp"""
+            def grab(self, out=None):
+                _, _, width, height = self.region
+                target = self._target(self._shape(height * 2, width * 2), out)
+                target[:] = 128
+                return target
+        
+        capture = ScreenCapture()
+        capture.grabber = HiDPIGrabber()
+        capture.set_capture_region(0, 0, 40, 20)
+        capture.grabber.open(capture.capture_region)
+        
+        allocations = []
+        for _ in range(5):
+            frame = capture._grab_into_buffer()
+            capture.frame_buffer.commit(0.0)
+            if not allocations or allocations[-1] is not capture.frame_buffer.frames:
+                allocations.append(capture.frame_buffer.frames)
+        
+        print(f"✓ Kích thước khung: {frame.shape}, số lần cấp phát ring buffer: {len(allocations)}")
+        
+        return frame.shape == (40, 80, 3) and len(allocations) == 1
+    
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_line_bands():
+    """Kiểm thử tách dòng phụ đề"""
+    print("\n=== Kiểm thử Line Bands ===")
+    
+    try:
+        from core.line_bands import LineBandOCR
+        from PIL import Image, ImageDraw
+        import numpy as np
+        
+        # Ảnh giả lập Live Caption: 2 dòng chữ trắng trên nền đen
+        img = Image.new('RGB', (300, 60), color='black')
+        draw = ImageDraw.Draw(img)
+        draw.text((5, 5), "First caption line", fill='white')
+        draw.text((5, 32), "Second caption line", fill='white')
+        
+        line_ocr = LineBandOCR(ocr_processor=None)
+        gray = np.asarray(img.convert('L'))
+        bands = line_ocr.split_bands(gray)
+        print(f"✓ Các dải dòng: {bands}")
+        
+        if len(bands) != 2 or bands[0][1] > bands[1][0]:
+            print("✗ Tách dòng không đúng")
+            return False
+        
+        # Dòng không đổi có cùng hash
+        first_hash = line_ocr.hash_band(gray[bands[0][0]:bands[0][1]])
+        second_hash = line_ocr.hash_band(gray[bands[1][0]:bands[1][1]])
+        print("✓ Hash theo dòng khác nhau cho các dòng khác nhau")
+        
+        return first_hash != second_hash
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_ocr_executor():
+    """Kiểm thử executor OCR song song"""
+    print("\n=== Kiểm thử OCR Executor ===")
+    
+    try:
+        from core.ocr_pool import OCRExecutor
+        import numpy as np
+        import time
+        
+        class SleepyEngine:
+            """Engine giả lập: thời gian OCR phụ thuộc vào giá trị điểm ảnh"""
+            def extract_text(self, image):
+                time.sleep(float(image[0, 0]) / 100)
+                return {'text': f"frame {image[0, 0]}", 'confidence': 90, 'word_count': 2}
+        
+        executor = OCRExecutor(SleepyEngine, workers=3)
+        print("✓ Khởi tạo OCRExecutor thành công")
+        
+        # Khung 1 chậm, khung 2 và 3 nhanh: khung 1 bị bỏ vì lỗi thời
+        for seq, delay in [(1, 30), (2, 1), (3, 2)]:
+            executor.submit(seq, np.full((4, 4), delay, dtype=np.uint8), time.time())
+        
+        emitted = []
+        deadline = time.time() + 2
+        while len(emitted) < 2 and time.time() < deadline:
+            executor.wait(timeout=0.1)
+            emitted.extend(seq for seq, _, _ in executor.collect())
+        
+        stats = executor.get_stats()
+        executor.shutdown()
+        print(f"✓ Thứ tự khung trả về: {emitted}, bị bỏ: {stats['frames_dropped']}")
+        
+        return emitted == [2, 3] and stats['frames_dropped'] == 1
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_ocr_result_cache():
+    """Kiểm thử cache kết quả OCR"""
+    print("\n=== Kiểm thử OCR Result Cache ===")
+    
+    try:
+        from core.ocr_cache import OCRResultCache
+        import numpy as np
+        
+        cache = OCRResultCache(max_bytes=1024 * 1024, max_entries=2)
+        print("✓ Khởi tạo OCRResultCache thành công")
+        
+        images = [np.full((10, 40), value, dtype=np.uint8) for value in (0, 128, 255)]
+        keys = [cache.make_key(image, 'eng', '--psm 6 --oem 3') for image in images]
+        
+        # Cùng ảnh nhưng khác ngôn ngữ phải có khóa khác
+        if cache.make_key(images[0], 'vie', '--psm 6 --oem 3') == keys[0]:
+            print("✗ Khóa cache không phụ thuộc ngôn ngữ")
+            return False
+        
+        for index, key in enumerate(keys):
+            cache.put(key, {'text': f'line {index}', 'confidence': 90, 'word_count': 2, 'raw_data': None})
+        
+        # Mục đầu tiên bị loại vì vượt quá max_entries
+        results = [cache.get(key) for key in keys]
+        stats = cache.get_stats()
+        print(f"✓ Hit: {stats['hits']}, miss: {stats['misses']}, bị loại: {stats['evictions']}")
+        
+        return results[0] is None and results[2]['text'] == 'line 2' and stats['evictions'] == 1
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_ocr_batch():
+    """Kiểm thử OCR theo lô"""
+    print("\n=== Kiểm thử OCR Batch ===")
+    
+    try:
+        from core.ocr_processor import OCRProcessor
+        from core.ocr_backends import OCRBackend
+        from core.line_bands import find_line_bands
+        import numpy as np
+        
+        class CountingBackend(OCRBackend):
+            """Giả lập Tesseract: mỗi dải chữ trong ảnh ghép là một từ"""
+            calls = 0
+            
+            def image_to_data(self, image):
+                self.calls += 1
+                bands = find_line_bands(255 - np.asarray(image), padding=0)
+                return {
+                    'text': [f"line{i}" for i in range(len(bands))],
+                    'conf': [90] * len(bands),
+                    'left': [0] * len(bands),
+                    'top': [top for top, _ in bands],
+                    'width': [image.shape[1]] * len(bands),
+                    'height': [bottom - top for top, bottom in bands]
+                }
+        
+        ocr = OCRProcessor(engine='fake', cache_max_bytes=0)
+        ocr.backend = CountingBackend()
+        
+        # Ba ảnh có chiều cao khác nhau, ảnh giữa để trống
+        crops = []
+        for height, has_text in [(20, True), (14, False), (30, True)]:
+            crop = np.zeros((height, 120, 3), dtype=np.uint8)
+            if has_text:
+                crop[4:height - 4, 10:100] = 255
+            crops.append(crop)
+        
+        results = ocr.extract_text_batch(crops)
+        texts = [result['text'] for result in results]
+        print(f"✓ Kết quả theo ảnh: {texts}, số lần gọi OCR: {ocr.backend.calls}")
+        
+        return ocr.backend.calls == 1 and texts == ['line0', '', 'line1']
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_ocr_words():
+    """Kiểm thử kết quả OCR dạng mảng"""
+    print("\n=== Kiểm thử OCR Words ===")
+    
+    try:
+        from core.ocr_words import OCRWords
+        
+        # Dữ liệu giống pytesseract.image_to_data: có mục rỗng và conf = -1
+        data = {
+            'text': ['', 'Hello', ' ', 'world', 'noise'],
+            'conf': [-1, 90, -1, 80, 0],
+            'left': [0, 5, 0, 60, 100],
+            'top': [0, 2, 0, 3, 2],
+            'width': [200, 50, 0, 55, 10],
+            'height': [20, 14, 0, 14, 14]
+        }
+        
+        words = OCRWords.from_data(data)
+        result = words.to_result()
+        print(f"✓ Văn bản: '{result['text']}', confidence: {result['confidence']}")
+        print(f"✓ Dung lượng: {words.nbytes} byte cho {len(words)} từ")
+        
+        return (result['text'] == 'Hello world' and result['confidence'] == 85
+                and result['raw_data'] is None and list(words.boxes['left']) == [5, 60])
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_language_detector():
+    """Kiểm thử tự chọn ngôn ngữ theo phiên"""
+    print("\n=== Kiểm thử Language Detector ===")
+    
+    try:
+        from core.language_detector import SessionLanguageDetector
+        
+        class FakeOSD:
+            """Giả lập OSD: luôn nhận ra chữ Hán"""
+            osd_calls = 0
+            
+            def detect_script(self, image):
+                self.osd_calls += 1
+                return ('Han', 5.0)
+            
+            def get_available_languages(self):
+                return ['eng', 'chi_sim']
+        
+        osd = FakeOSD()
+        detector = SessionLanguageDetector(osd, default_language='eng', probe_frames=2,
+                                           min_words=2, low_confidence=50, low_window=3)
+        detector.set_region((0, 0, 100, 40))
+        
+        good = {'text': 'a b c', 'confidence': 90, 'word_count': 3}
+        for _ in range(5):
+            detector.observe(None, good)
+        print(f"✓ Ngôn ngữ: {detector.language} sau {osd.osd_calls} lần OSD")
+        
+        if detector.language != 'chi_sim' or osd.osd_calls != 2:
+            return False
+        
+        # Confidence thấp kéo dài thì phát hiện lại
+        for _ in range(3):
+            detector.observe(None, {'text': 'x y z', 'confidence': 20, 'word_count': 3})
+        stats = detector.get_stats()
+        print(f"✓ Phát hiện lại: {stats['rechecks']}")
+        
+        return stats['rechecks'] == 1 and detector.needs_probe()
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_calibration():
+    """Kiểm thử tự hiệu chỉnh profile OCR"""
+    print("\n=== Kiểm thử Calibration ===")
+    
+    try:
+        from core.calibration import OCRCalibrator, OCRProfile, ProfileStore, profile_grid
+        from core.ocr_processor import OCRProcessor
+        from core.line_bands import LineBandOCR
+        from PIL import Image, ImageDraw
+        import numpy as np
+        import tempfile
+        import time
+        
+        class FakeProcessor:
+            """Giả lập OCR: CLAHE/median tốn thời gian, tắt từ điển làm sai chữ, psm 7 kém tin cậy"""
+            def apply_profile(self, profile):
+                self.profile = profile
+            
+            def extract_text(self, image):
+                profile = self.profile
+                time.sleep(0.001 * (1 + 2 * profile.clahe + profile.median))
+                text = 'hello world' if profile.dictionaries else 'hxxxx wxrld'
+                confidence = 90 if profile.psm == 6 else 60
+                return {'text': text, 'confidence': confidence, 'word_count': 2}
+        
+        profiles = profile_grid(psms=(6, 7), oems=(3,), scales=(1.0,))
+        calibrator = OCRCalibrator(FakeProcessor(), profiles=profiles)
+        outcome = calibrator.calibrate([None, None])
+        best = outcome['profile']
+        print(f"✓ Đã thử {len(outcome['results'])} profile, chọn {best}")
+        
+        if best != OCRProfile(psm=6, oem=3, clahe=False, median=False, dictionaries=True):
+            return False
+        
+        # Chạy thử qua OCR theo dòng; mỗi nhóm psm/oem/từ điển chỉ tạo backend một lần
+        img = Image.new('RGB', (300, 60), color='black')
+        draw = ImageDraw.Draw(img)
+        draw.text((5, 5), "First caption line", fill='white')
+        draw.text((5, 32), "Second caption line", fill='white')
+        
+        ocr = OCRProcessor(engine='fake', cache_max_bytes=0)
+        backends = []
+        init_backend = ocr._init_backend
+        
+        def counting_init_backend():
+            init_backend()
+            backends.append(ocr.backend)
+        
+        ocr._init_backend = counting_init_backend
+        grid = profile_grid(psms=(6,), oems=(1, 3), scales=(1.0, 2.0))
+        outcome = OCRCalibrator(ocr, profiles=grid, engine_factory=LineBandOCR).calibrate([np.asarray(img)])
+        groups = {profile.backend_key for profile in grid}
+        print(f"✓ {len(outcome['results'])} profile, {len(backends)} lần tạo backend "
+              f"cho {len(groups)} nhóm, văn bản: '{outcome['best']['texts'][0]}'")
+        if len(backends) > len(groups) or not outcome['best']['texts'][0]:
+            return False
+        
+        # Profile được lưu và đọc lại theo vùng chụp
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'profiles.json')
+            ProfileStore(path).save((0, 0, 100, 40), best, {'mean_time': 0.001})
+            loaded = ProfileStore(path).get((0, 0, 100, 40))
+        print(f"✓ Profile đọc lại: {loaded}")
+        
+        return loaded == best
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_text_roi():
+    """Kiểm thử cắt vùng chứa chữ"""
+    print("\n=== Kiểm thử Text ROI ===")
+    
+    try:
+        from core.text_roi import TextROITracker
+        import numpy as np
+        
+        tracker = TextROITracker(margin=4, shrink_after=3)
+        binary = np.zeros((60, 400), dtype=np.uint8)
+        binary[10:20, 100:200] = 255
+        
+        roi = tracker.update(binary)
+        print(f"✓ ROI ban đầu: {roi}")
+        if roi != (6, 24, 96, 204):
+            return False
+        
+        # Chữ ngắn hơn một chút: ROI giữ nguyên để ảnh cắt không đổi
+        binary[10:20, 180:200] = 0
+        if tracker.update(binary) != roi:
+            print("✗ ROI thay đổi khi bố cục ổn định")
+            return False
+        
+        # Chữ tràn ra ngoài: mở rộng ngay
+        binary[30:40, 250:300] = 255
+        roi = tracker.update(binary)
+        print(f"✓ ROI mở rộng: {roi}")
+        
+        # Chữ thu lại vùng nhỏ: chỉ thu hẹp sau shrink_after khung
+        binary[:] = 0
+        binary[10:20, 100:120] = 255
+        rois = [tracker.update(binary) for _ in range(3)]
+        print(f"✓ ROI thu hẹp: {rois[-1]}, số lần đổi bố cục: {tracker.layout_changes}")
+        
+        return rois[0] == roi and rois[-1] == (6, 24, 96, 124)
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_glyph_recognizer():
+    """Kiểm thử nhận dạng nhanh bằng mẫu ký tự"""
+    print("\n=== Kiểm thử Glyph Recognizer ===")
+    
+    try:
+        from core.glyph_recognizer import GlyphRecognizer
+        from core.ocr_words import OCRWords
+        import numpy as np
+        import cv2
+        
+        def draw_line(words):
+            # Vẽ từng ký tự cách nhau 3px, trả về ảnh nhị phân và hộp bao của từ
+            image = np.zeros((40, 600), dtype=np.uint8)
+            data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+            x = 5
+            for word in words:
+                start = x
+                for char in word:
+                    (width, _), _ = cv2.getTextSize(char, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+                    cv2.putText(image, char, (x, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 255, 2)
+                    x += width + 3
+                for key, value in (('text', word), ('conf', 95), ('left', start),
+                                   ('top', 5), ('width', x - start), ('height', 30)):
+                    data[key].append(value)
+                x += 16
+            return np.where(image > 127, 255, 0).astype(np.uint8), OCRWords.from_data(data)
+        
+        recognizer = GlyphRecognizer()
+        binary, words = draw_line(["the", "quick", "brown", "fox", "jumps"])
+        if recognizer.recognize(binary) is not None:
+            print("✗ Nhận dạng khi chưa học mẫu")
+            return False
+        
+        recognizer.learn(binary, words)
+        stats = recognizer.get_stats()
+        print(f"✓ Đã học {stats['glyph_templates']} mẫu cho {stats['glyph_chars']} ký tự")
+        
+        # Dòng mới chỉ gồm các ký tự đã học, chữ tối trên nền sáng
+        binary, _ = draw_line(["think", "of", "crown"])
+        result = recognizer.recognize(cv2.bitwise_not(binary))
+        print(f"✓ Nhận dạng nhanh: '{result.text if result else None}'")
+        if result is None or result.text != "think of crown":
+            return False
+        
+        # Ký tự chưa học: trả về None để dùng Tesseract
+        binary, _ = draw_line(["zebra"])
+        if recognizer.recognize(binary) is not None:
+            print("✗ Nhận dạng ký tự chưa học")
+            return False
+        print(f"✓ Ký tự chưa học chuyển sang Tesseract, thống kê: {recognizer.get_stats()}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_word_voting():
+    """Kiểm thử bình chọn từ qua nhiều khung"""
+    print("\n=== Kiểm thử Word Voting ===")
+    
+    try:
+        from core.word_voting import TemporalWordVoter
+        from core.line_bands import LineBandOCR
+        from core.ocr_words import OCRWords
+        
+        def frame(*lines):
+            # Mỗi dòng là danh sách (từ, confidence)
+            results = []
+            for line in lines:
+                data = {'text': [word for word, _ in line], 'conf': [conf for _, conf in line]}
+                for column in ('left', 'top', 'width', 'height'):
+                    data[column] = [10] * len(line)
+                results.append(OCRWords.from_data(data).to_result())
+            return LineBandOCR.combine_results(results, [30 * i for i in range(len(results))])
+        
+        voter = TemporalWordVoter(window=5)
+        clean = [("the", 90), ("quick", 90), ("brown", 90), ("fox", 90)]
+        other = [("second", 80), ("line", 80)]
+        
+        voter.vote(frame(clean, other))
+        voter.vote(frame(clean, other))
+        
+        # Khung đọc sai một từ với confidence cao: bị các khung trước bỏ phiếu thay thế
+        noisy = [("the", 90), ("qu1ck", 95), ("brown", 90), ("fox", 90)]
+        voted = voter.vote(frame(noisy, other))
+        print(f"✓ Khung: '{voted['frame']['text']}' -> bình chọn: '{voted['text']}'")
+        if voted['text'] != "the quick brown fox second line":
+            return False
+        
+        # Dòng dài thêm: từ mới chỉ có một phiếu nhưng vẫn được giữ
+        grown = clean + [("jumps", 85)]
+        voted = voter.vote(frame(grown, other))
+        print(f"✓ Dòng dài thêm: '{voted['lines'][0]}'")
+        if voted['lines'][0] != "the quick brown fox jumps":
+            return False
+        
+        stats = voter.get_stats()
+        print(f"✓ Thống kê: {stats}")
+        if stats['words_changed'] != 1 or len(voter.tracks) != 2:
+            return False
+        
+        # Dòng lấy từ cache của LineBandOCR ở các khung sau không được đếm thêm phiếu
+        def cached(*lines):
+            combined = frame(*lines)
+            combined['line_fresh'] = [False] * len(lines)
+            return combined
+        
+        voter = TemporalWordVoter(window=5)
+        for line_frame in (frame(clean), frame(clean), frame(noisy)):
+            voter.vote(line_frame)
+        for _ in range(3):
+            voted = voter.vote(cached(noisy))
+        print(f"✓ Đọc sai lặp lại từ cache: '{voted['text']}', "
+              f"{len(voter.tracks[0])} lần quan sát")
+        
+        return voted['text'] == "the quick brown fox" and len(voter.tracks[0]) == 3
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_ocr_backends():
+    """Kiểm thử backend OCR giả lập"""
+    print("\n=== Kiểm thử OCR Backends ===")
+    
+    try:
+        from core.ocr_processor import OCRProcessor
+        from core.ocr_backends import create_backend, split_stacked_data
+        import numpy as np
+        import time
+        
+        backend = create_backend('fake', output=['hello world', 'second caption'], latency=0.01)
+        start_time = time.perf_counter()
+        data = backend.image_to_data(np.zeros((20, 100), dtype=np.uint8))
+        elapsed = time.perf_counter() - start_time
+        print(f"✓ Backend {backend.name}: {data['text']}, độ trễ {elapsed * 1000:.0f}ms")
+        if data['text'] != ['hello', 'world'] or elapsed < 0.01:
+            return False
+        
+        # OCRProcessor dùng backend giả lập cho cả ảnh đơn và theo lô
+        ocr = OCRProcessor(engine='fake', cache_max_bytes=0,
+                           backend_options={'output': ['one', 'two', 'three'], 'languages': ['eng', 'vie']})
+        image = np.zeros((30, 200, 3), dtype=np.uint8)
+        image[10:20, 20:180] = 255
+        texts = [ocr.extract_text(image)['text']]
+        texts += [result['text'] for result in ocr.extract_text_batch([image, image])]
+        print(f"✓ Kết quả: {texts}, ngôn ngữ: {ocr.get_available_languages()}, "
+              f"script: {ocr.detect_script(image)}")
+        if texts != ['one', 'two', 'three'] or ocr.backend.calls != 2:
+            return False
+        
+        # Chia dữ liệu của ảnh ghép về từng ảnh theo tâm dọc của hộp bao
+        stacked = {'text': ['a', 'b'], 'conf': [90, 80], 'left': [0, 5],
+                   'top': [18, 50], 'width': [10, 10], 'height': [10, 10]}
+        parts = split_stacked_data(stacked, [16, 46])
+        print(f"✓ Chia ảnh ghép: {[(part['text'], part['top']) for part in parts]}")
+        
+        return parts[0]['text'] == ['a'] and parts[1]['top'] == [4]
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_latency_budget():
+    """Kiểm thử giới hạn độ trễ: timeout OCR, bỏ khung quá hạn và phân vị độ trễ"""
+    print("\n=== Kiểm thử Latency Budget ===")
+    
+    try:
+        from core.ocr_processor import OCRProcessor
+        from core.ocr_pool import OCRExecutor
+        from core.latency import LatencyStats
+        import numpy as np
+        import time
+        
+        # Backend chậm hơn timeout: trả kết quả rỗng thay vì giữ worker
+        ocr = OCRProcessor(engine='fake', cache_max_bytes=0, timeout=0.05,
+                           backend_options={'latency': 0.5})
+        start_time = time.perf_counter()
+        result = ocr.extract_text(np.zeros((20, 100), dtype=np.uint8), preprocess=False)
+        elapsed = time.perf_counter() - start_time
+        print(f"✓ OCR quá thời gian: '{result['text']}', {elapsed * 1000:.0f}ms, "
+              f"timeouts: {ocr.timeouts}")
+        if result['text'] or ocr.timeouts != 1 or elapsed > 0.3:
+            return False
+        
+        class SleepyEngine:
+            """Engine giả lập: thời gian OCR phụ thuộc vào giá trị điểm ảnh"""
+            def extract_text(self, image):
+                time.sleep(float(image[0, 0]) / 100)
+                return {'text': f"frame {image[0, 0]}", 'confidence': 90, 'word_count': 2}
+        
+        # Một worker: khung 1 chậm đang chạy, khung 2 bị khung 3 thay thế,
+        # khung 1 quá ngân sách độ trễ nên bị bỏ, chỉ khung 3 được trả về
+        executor = OCRExecutor(SleepyEngine, workers=1, latency_budget=0.1)
+        executor.submit(1, np.full((4, 4), 30, dtype=np.uint8), time.time())
+        time.sleep(0.02)
+        for seq in (2, 3):
+            # Khung xếp hàng có thể được thay thế nên executor vẫn nhận khung mới
+            if not executor.has_capacity():
+                return False
+            executor.submit(seq, np.full((4, 4), 1, dtype=np.uint8), time.time())
+        
+        emitted = []
+        deadline = time.time() + 2
+        while not emitted and time.time() < deadline:
+            executor.wait(timeout=0.05)
+            emitted.extend(seq for seq, _, _ in executor.collect())
+        
+        stats = executor.get_stats()
+        executor.shutdown()
+        print(f"✓ Khung trả về: {emitted}, bị thay thế: {stats['frames_superseded']}, "
+              f"quá ngân sách: {stats['frames_over_budget']}")
+        if emitted != [3] or stats['frames_superseded'] != 1 or stats['frames_over_budget'] != 1:
+            return False
+        
+        # Phân vị độ trễ capture-to-text
+        latency = LatencyStats()
+        for delay in range(1, 101):
+            latency.record(0.0, delay / 100)
+        percentiles = latency.get_stats()
+        print(f"✓ Độ trễ p50 {percentiles['p50']:.2f}s, p95 {percentiles['p95']:.2f}s, "
+              f"p99 {percentiles['p99']:.2f}s")
+        
+        return percentiles['count'] == 100 and abs(percentiles['p95'] - 0.95) < 0.01
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_line_band_retry():
+    """Kiểm thử dòng OCR quá thời gian không bị giữ trong cache dòng"""
+    print("\n=== Kiểm thử Line Band Retry ===")
+    
+    try:
+        from core.ocr_processor import OCRProcessor
+        from core.line_bands import LineBandOCR
+        from PIL import Image, ImageDraw
+        import numpy as np
+        
+        img = Image.new('RGB', (300, 30), color='black')
+        ImageDraw.Draw(img).text((5, 8), "Caption line that timed out", fill='white')
+        frame = np.asarray(img)
+        
+        ocr = OCRProcessor(engine='fake', cache_max_bytes=0, timeout=0.1,
+                           backend_options={'latency': 0.3, 'output': 'caption line'})
+        line_ocr = LineBandOCR(ocr)
+        first = line_ocr.extract_text(frame)
+        
+        # Backend hết chậm: cùng dòng (điểm ảnh không đổi) phải được OCR lại
+        ocr.backend.latency = 0
+        second = line_ocr.extract_text(frame)
+        third = line_ocr.extract_text(frame)
+        stats = line_ocr.get_stats()
+        print(f"✓ Khung 1: '{first['text']}', khung 2: '{second['text']}', khung 3: '{third['text']}'")
+        print(f"✓ Dòng đã OCR: {stats['bands_ocr']}, timeouts: {stats['ocr_timeouts']}")
+        
+        return (first['text'] == '' and second['text'] == 'caption line'
+                and third['text'] == 'caption line' and stats['bands_ocr'] == 2
+                and stats['ocr_timeouts'] == 1)
+    
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_shared_line_state():
+    """Kiểm thử các worker OCR dùng chung trạng thái theo dòng khi phụ đề cuộn"""
+    print("\n=== Kiểm thử Shared Line State ===")
+    
+    try:
+        from core.ocr_processor import OCRProcessor
+        from core.line_bands import LineBandOCR, LineBandState
+        from core.ocr_pool import OCRExecutor
+        from PIL import Image, ImageDraw
+        import numpy as np
+        import time
+        
+        tall = Image.new('RGB', (320, 400), color='black')
+        draw = ImageDraw.Draw(tall)
+        for i in range(19):
+            draw.text((5, 6 + i * 20), f"Caption line number {i} scrolls up", fill='white')
+        tall = np.asarray(tall)
+        
+        # Phụ đề cuộn 7 pixel mỗi khung trên nền có độ sáng thay đổi theo hàng: dải
+        # dòng khác hash sau mỗi lần cuộn nên chỉ dùng lại được nhờ phát hiện cuộn
+        shade = (np.arange(80) // 4)[:, None, None].astype(np.uint8)
+        frames = [np.maximum(tall[7 * k:7 * k + 80], shade) for k in range(30)]
+        
+        def run(workers):
+            state = LineBandState()
+            executor = OCRExecutor(
+                lambda: LineBandOCR(OCRProcessor(engine='fake', cache_max_bytes=0,
+                                                 backend_options={'latency': 0.02}), state=state),
+                workers=workers
+            )
+            for seq, frame in enumerate(frames, 1):
+                while len(executor.pending) >= workers:
+                    executor.wait(timeout=0.1)
+                    executor.collect()
+                executor.submit(seq, frame, time.time())
+            deadline = time.time() + 5
+            while executor.pending and time.time() < deadline:
+                executor.wait(timeout=0.1)
+                executor.collect()
+            scrolled = sum(engine.get_stats()['bands_scrolled'] for engine in executor.engines)
+            executor.shutdown()
+            return scrolled
+        
+        single, pooled = run(1), run(2)
+        print(f"✓ Dòng dùng lại khi cuộn: 1 worker {single}, 2 worker {pooled}")
+        
+        return single > 0 and pooled >= single * 0.9
+    
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_caption_stitcher():
+    """Kiểm thử ghép phụ đề cuộn theo phần chồng lấn"""
+    print("\n=== Kiểm thử Caption Stitcher ===")
+    
+    try:
+        from core.caption_stitcher import suffix_prefix_overlap
+        from core.text_processor import TextProcessor
+        
+        overlap = suffix_prefix_overlap('a b c d'.split(), 'c d e'.split())
+        contained = suffix_prefix_overlap('a b c d'.split(), 'b c'.split())
+        print(f"✓ Chồng lấn: {overlap}, nằm trong: {contained}")
+        if overlap != (2, False) or contained != (0, True):
+            return False
+        
+        # Phụ đề cuộn: mỗi khung bỏ một từ ở đầu, thêm một từ ở cuối, mỗi dòng hiện 2 khung
+        words = "we are testing rolling captions that shift by one word every single frame".split()
+        processor = TextProcessor()
+        rows = []
+        for start in range(len(words) - 5):
+            line = ' '.join(words[start:start + 6])
+            for _ in range(2):
+                processed = processor.process_new_text({'text': line, 'confidence': 90})
+                if processed:
+                    rows.append(processed['text'])
+        
+        print(f"✓ Các dòng được ghi: {rows}")
+        print(f"✓ Văn bản phiên: '{processor.current_session_text}'")
+        if len(rows) != len(words) - 5 or processor.current_session_text != ' '.join(words):
+            return False
+        
+        # Cập nhật tăng dần chỉ ghi thêm các từ mới vào văn bản dùng để so khớp
+        growing = TextProcessor()
+        for line in ('Hello', 'Hello there friend'):
+            growing.process_new_text({'text': line, 'confidence': 90})
+        tail = list(growing.stitcher.tail)
+        
+        # Dòng trước nằm giữa dòng mới: giữ cả các từ trước và sau nó
+        wrapped = TextProcessor()
+        for line in ('Hello there', 'Well hello there my friend'):
+            wrapped.process_new_text({'text': line, 'confidence': 90})
+        wrapped_tail = list(wrapped.stitcher.tail)
+        
+        # Dòng không liên quan chỉ tình cờ bắt đầu bằng "of the" không bị cắt từ
+        unrelated = TextProcessor()
+        unrelated.process_new_text({'text': 'we talked about the state of the', 'confidence': 90})
+        kept = unrelated.process_new_text({'text': 'of the new budget plan for next year', 'confidence': 90})
+        print(f"✓ Đuôi sau cập nhật tăng dần: {tail}, {wrapped_tail}, dòng không liên quan: '{kept['text']}'")
+        
+        return (tail == ['hello', 'there', 'friend']
+                and wrapped_tail == ['hello', 'there', 'well', 'my', 'friend']
+                and kept['text'] == 'of the new budget plan for next year')
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_session_buffer():
+    """Kiểm thử bộ đệm văn bản phiên"""
+    print("\n=== Kiểm thử Session Text Buffer ===")
+    
+    try:
+        from core.session_buffer import SessionTextBuffer
+        import time
+        
+        buffer = SessionTextBuffer()
+        buffer.append("hello world")
+        buffer.append("this is")
+        buffer.replace_last("this is a caption")
+        print(f"✓ Văn bản: '{buffer.text}', thống kê: {buffer.get_stats()}")
+        if (buffer.text != "hello world this is a caption" or buffer.word_count != 6
+                or buffer.char_count != len(buffer.text)):
+            return False
+        
+        # Thêm đoạn và đọc thống kê không phụ thuộc độ dài phiên
+        start_time = time.perf_counter()
+        for i in range(100000):
+            buffer.append(f"caption line number {i}")
+            buffer.get_stats()
+        elapsed = time.perf_counter() - start_time
+        print(f"✓ 100000 lần thêm + thống kê: {elapsed:.2f}s, {buffer.word_count} từ")
+        
+        return buffer.word_count == 6 + 4 * 100000 and buffer.char_count == len(buffer.text)
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_text_stream():
+    """Kiểm thử xử lý văn bản theo luồng và bộ làm sạch văn bản"""
+    print("\n=== Kiểm thử Text Stream ===")
+    
+    try:
+        from core.text_processor import TextProcessor
+        import asyncio
+        import re
+        
+        # Bộ làm sạch mới cho cùng kết quả với regex cũ
+        legacy_pattern = r'[^\w\s\.,!?;:\-\'"()]'
+        samples = ['Hello @#$%^&*() World!!!', '  Xin chào — các bạn ** đây là phụ đề  ',
+                   'tab\tand\nnewline_ok 123 ½ ©', '']
+        processor = TextProcessor()
+        same = all(processor.clean_text(sample) == re.sub(r'\s+', ' ', re.sub(legacy_pattern, '', sample)).strip()
+                   for sample in samples)
+        print(f"✓ Làm sạch văn bản giống regex cũ: {same}")
+        if not same:
+            return False
+        
+        captions = ['first caption line here', 'first caption line here', 'caption line here and more',
+                    'something else entirely', 'low confidence text']
+        ocr_results = [{'text': text, 'confidence': 20 if 'low' in text else 90} for text in captions]
+        
+        direct = TextProcessor()
+        expected = [result['text'] for result in map(direct.process_new_text, ocr_results) if result]
+        streamed = [result['text'] for result in TextProcessor().process_stream(iter(ocr_results))]
+        
+        async def replay():
+            for ocr_result in ocr_results:
+                yield ocr_result
+        
+        async def collect():
+            return [result['text'] async for result in TextProcessor().aprocess_stream(replay())]
+        
+        asynced = asyncio.run(collect())
+        print(f"✓ Trực tiếp: {expected}")
+        print(f"✓ Theo luồng: {streamed}, bất đồng bộ: {asynced == expected}")
+        
+        return streamed == expected and asynced == expected
+        
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
+def test_caption_segments():
+    """Kiểm thử bản cập nhật tạm và đoạn đã chốt của phụ đề"""
+    print("\n=== Kiểm thử Caption Segments ===")
+    
+    try:
+        from core.text_processor import TextProcessor
+        from core.storage import StorageManager
+        import tempfile
+        import time
+        
+        processor = TextProcessor()
+        lines = ['the quick brown fox', 'the quick brown fox jumps over', 'brown fox jumps over the lazy dog']
+        partials = [processor.process_new_text({'text': line, 'confidence': 90}) for line in lines]
+        statuses = [result['status'] for result in partials if result]
+        segment_ids = {result['segment_id'] for result in partials if result}
+        print(f"✓ Trạng thái cập nhật: {statuses}, số đoạn: {len(segment_ids)}")
+        
+        # Chưa ổn định thì chưa có đoạn nào cần lưu
+        pending = processor.pop_segments()
+        later = processor.pop_segments(now=time.time() + processor.stabilize_time + 1)
+        final_text = later[0]['text'] if later else ''
+        print(f"✓ Trước khi ổn định: {len(pending)} đoạn, sau khi ổn định: {final_text!r}")
+        
+        # Dòng không liên quan chốt đoạn trước
+        processor.process_new_text({'text': 'hello everyone welcome back', 'confidence': 90})
+        processor.process_new_text({'text': 'something else entirely now', 'confidence': 90})
+        popped = processor.pop_segments()
+        flushed = processor.flush()
+        print(f"✓ Dòng mới chốt đoạn trước: {[s['text'] for s in popped]}, flush: {[s['text'] for s in flushed]}")
+        
+        keeper = TextProcessor(keep_partials=True)
+        for line in lines:
+            keeper.process_new_text({'text': line, 'confidence': 90})
+        kept_segments = keeper.flush()
+        kept = [segment['status'] for segment in kept_segments]
+        # Bản tạm giữ văn bản của cả đoạn tới lúc đó, không chỉ phần mới ghép
+        kept_texts = [segment['text'] for segment in kept_segments]
+        print(f"✓ keep_partials: {kept}, {kept_texts}")
+        
+        # Storage chỉ trả đoạn đã chốt trừ khi yêu cầu cả bản tạm
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+            db_path = tmp.name
+        storage = StorageManager(db_path)
+        session_id = storage.create_session("Segments Test")
+        keeper = TextProcessor(keep_partials=True)
+        for line in lines:
+            keeper.process_new_text({'text': line, 'confidence': 90})
+        for segment in keeper.flush():
+            storage.save_transcript_entry(session_id, segment)
+        finals = storage.get_session_transcript(session_id)
+        everything = storage.get_session_transcript(session_id, include_partials=True)
+        print(f"✓ Storage: {len(finals)} đoạn đã chốt, {len(everything)} bản ghi kể cả bản tạm")
+        os.unlink(db_path)
+        
+        return (statuses == ['partial'] * 3 and len(segment_ids) == 1 and not pending
+                and final_text == 'the quick brown fox jumps over the lazy dog'
+                and [s['text'] for s in popped] == ['hello everyone welcome back']
+                and [s['text'] for s in flushed] == ['something else entirely now']
+                and kept == ['partial'] * 3 + ['final']
+                and kept_texts[1] == 'the quick brown fox jumps over'
+                and kept_texts[2] == kept_texts[3] == final_text
+                and len(finals) == 1 and len(everything) == 4)
+    
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        return False
+
 def test_integration():
     """Kiểm thử tích hợp các module"""
     print("\n=== Kiểm thử tích hợp ===")
@@ -206,7 +1240,8 @@ def test_integration():
         processed_text = text_processor.process_new_text(ocr_result)
         
         if processed_text:
-            storage.save_transcript_entry(session_id, processed_text)
+            for segment in text_processor.flush():
+                storage.save_transcript_entry(session_id, segment)
             print("✓ Quy trình tích hợp thành công")
             
             # Xuất file test
@@ -244,7 +1279,30 @@ def main():
         test_screen_capture,
         test_ocr_processor,
         test_text_processor,
+        test_duplicate_index,
         test_storage_manager,
+        test_frame_change_detector,
+        test_capture_scheduler,
+        test_frame_ring_buffer,
+        test_capture_frame_shape,
+        test_line_bands,
+        test_ocr_executor,
+        test_ocr_result_cache,
+        test_ocr_batch,
+        test_ocr_words,
+        test_language_detector,
+        test_calibration,
+        test_text_roi,
+        test_glyph_recognizer,
+        test_word_voting,
+        test_ocr_backends,
+        test_latency_budget,
+        test_line_band_retry,
+        test_shared_line_state,
+        test_caption_stitcher,
+        test_session_buffer,
+        test_text_stream,
+        test_caption_segments,
         test_integration
     ]
     